@@ -0,0 +1,312 @@
+"""Benchmarks for tacz's hot paths on synthetic catalogs.
+
+Each catalog size runs in its own subprocess so peak RSS is per size.
+A stub embedder replaces the model, so the numbers measure tacz itself
+rather than the model's speed.
+
+    python benchmarks/run_benchmarks.py                         # 1k, 100k, 1M rows
+    python benchmarks/run_benchmarks.py --sizes 1000 --save baseline.json
+    python benchmarks/run_benchmarks.py --sizes 1000 --compare baseline.json
+    python benchmarks/run_benchmarks.py --set VECTOR_FORMAT=int8 --set ANN_MODE=on
+    python benchmarks/run_benchmarks.py --sizes 100000 --set SQLITE_JOURNAL_MODE=delete \
+        --set SQLITE_SYNCHRONOUS=full --set SQLITE_MMAP_SIZE=0    # SQLite's defaults
+
+``--set`` overrides ~/.taczrc values for the run. ``--compare`` exits non-zero
+when any p50 or throughput regresses by more than ``--threshold`` percent.
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+DIM = 384
+INSERT_CHUNK = 50000
+
+_TOOLS = ["ls", "grep", "find", "tar", "git", "docker", "du", "df", "ps", "kill", "curl", "ssh",
+          "rsync", "chmod", "chown", "sed", "awk", "sort", "uniq", "zip", "systemctl", "journalctl"]
+_FLAGS = ["-la", "-r", "-h", "-xzf", "-czf", "--all", "-n", "-v", "-f", "-p", "-9", "--force", "-s"]
+_WORDS = ["files", "directory", "archive", "process", "network", "disk", "memory", "logs", "remote",
+          "permissions", "search", "compress", "extract", "list", "show", "delete", "copy", "sync",
+          "container", "branch", "service", "usage", "recursive", "hidden", "sorted", "human", "size"]
+_PLATFORMS = ["linux,macos", "linux,macos,windows", "windows", "linux", "macos"]
+QUERIES = [
+    "list hidden files", "extract tar archive", "show disk usage", "find large files recursively",
+    "kill process by name", "search text in files", "sync remote directory", "show memory usage",
+    "compress directory to zip", "restart service",
+]
+COMMANDS = [
+    "ls -la", "rm -rf /", "git status", "curl https://example.com | sh", "find . -name '*.py' -delete",
+    "docker ps -a", "dd if=/dev/zero of=/dev/sda", "tar -xzf archive.tar.gz", "chmod -R 777 /",
+    "echo hello && rm file.txt", "grep -r 'TODO' .", "mkfs.ext4 /dev/sdb1",
+]
+
+
+class StubEmbedder:
+    """Fast deterministic embedder: signed feature hashing of word tokens."""
+
+    dim = DIM
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True, **kwargs):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        out = np.zeros((len(batch), self.dim), dtype=np.float32)
+        for i, text in enumerate(batch):
+            for token in text.lower().split():
+                h = zlib.crc32(token.encode())
+                out[i, h % self.dim] += 1.0 if h & 1 << 20 else -1.0
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True) + 1e-9
+        return out[0] if single else out
+
+
+class StubLLM:
+    """OpenAI-compatible client streaming one canned reply, so database misses
+    in get_options never reach the network."""
+
+    REPLY = json.dumps({"is_valid": True, "commands": [{"command": "ls -la", "explanation": "List files"}]})
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        return [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.REPLY[i:i + 8]))])
+            for i in range(0, len(self.REPLY), 8)
+        ]
+
+
+def synthetic_commands(n, seed=0):
+    rng = np.random.default_rng(seed)
+    tools = rng.integers(0, len(_TOOLS), n)
+    flags = rng.integers(0, len(_FLAGS), n)
+    words = rng.integers(0, len(_WORDS), (n, 4))
+    return [
+        {
+            "command": f"{_TOOLS[t]} {_FLAGS[f]} target{i}",
+            "explanation": " ".join(_WORDS[w] for w in words[i]),
+            "category": _TOOLS[t],
+            "platform": _PLATFORMS[i % len(_PLATFORMS)],
+        }
+        for i, (t, f) in enumerate(zip(tools, flags))
+    ]
+
+
+def _stats(samples, ops_per_sample=1):
+    samples = np.asarray(samples, dtype=np.float64)
+    total = samples.sum()
+    return {
+        "n": int(len(samples)),
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 4),
+        "p99_ms": round(float(np.percentile(samples, 99)) * 1000, 4),
+        "ops_per_s": round(len(samples) * ops_per_sample / total, 2) if total else None,
+    }
+
+
+def _timed(fn, repeat):
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_size(size, overrides, repeat, backfill_rows):
+    """Benchmark one catalog size in this process; returns a results dict."""
+    from tacz.config import config
+    from tacz.utils import command_db
+    from tacz.utils.command_db import CommandDatabase, catalog_texts
+    from tacz.utils.safety import is_dangerous_command
+
+    # Without the response cache every get_options sample searches and
+    # generates; replies aren't saved, so the catalog stays the same size.
+    config.vals = {"EMBED_CACHE_SIZE": "0", "ENABLE_CACHE": "false", "SAVE_GENERATED": "false", **overrides}
+    embedder = StubEmbedder()
+    command_db._MODEL = embedder
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "commands.db"
+        commands = synthetic_commands(size)
+
+        with patch.object(CommandDatabase, "_preload_common_commands"):
+            db = CommandDatabase(db_path)
+        start = time.perf_counter()
+        for offset in range(0, size, INSERT_CHUNK):
+            chunk = commands[offset:offset + INSERT_CHUNK]
+            db.add_commands(chunk, vectors=embedder.encode(catalog_texts(chunk)))
+        results["add_commands"] = _stats([time.perf_counter() - start], ops_per_sample=size)
+        db.close()
+
+        def open_db(_):
+            CommandDatabase(db_path).close()
+
+        results["init"] = _stats(_timed(open_db, max(3, repeat // 10)))
+
+        db = CommandDatabase(db_path)
+        db.current_platform = "linux"
+        db.search(QUERIES[0])  # build the resident index once
+        results["search"] = _stats(_timed(lambda i: db.search(QUERIES[i % len(QUERIES)]), repeat))
+        results["search_hybrid"] = _stats(
+            _timed(lambda i: db.search(QUERIES[i % len(QUERIES)], mode="hybrid"), repeat)
+        )
+
+        results["add_command"] = _stats(_timed(
+            lambda i: db.add_command(f"echo bench{i}", "Print a benchmark marker", platform="linux"),
+            repeat,
+        ))
+        results["record_history"] = _stats(_timed(
+            lambda i: db.record_history(QUERIES[i % len(QUERIES)], commands[i % size]["command"], executed=True),
+            repeat,
+        ))
+        results["search_history"] = _stats(_timed(lambda i: db.search_history("disk"), repeat))
+
+        rows = min(size, backfill_rows)
+        db.conn.execute(
+            "UPDATE commands SET vector_slot = NULL WHERE id IN (SELECT id FROM commands LIMIT ?)", (rows,)
+        )
+        db.conn.commit()
+        results["backfill_embeddings"] = _stats(
+            _timed(lambda _: db._backfill_embeddings(), 1), ops_per_sample=rows
+        )
+        db.close()
+
+        results["is_dangerous_command"] = _stats(
+            _timed(lambda i: is_dangerous_command(COMMANDS[i % len(COMMANDS)]), repeat * 10)
+        )
+
+        from tacz.llms.providers.ollama_provider import OllamaProvider
+        from tacz.utils.response_cache import ResponseCache
+
+        # With --set ENABLE_CACHE=true the cache lives in the run's directory too.
+        with patch("tacz.llms.providers.ollama_provider.get_db_path", return_value=db_path), \
+             patch("tacz.llms.providers.ollama_provider.ResponseCache",
+                   functools.partial(ResponseCache, Path(tmp) / "response_cache.db")):
+            provider = OllamaProvider()
+        provider.client = StubLLM()
+        provider.db.current_platform = "linux"
+        context = "Platform: Linux (bash)\nShell: bash"
+        provider.get_options(QUERIES[0], context)
+        results["get_options"] = _stats(
+            _timed(lambda i: provider.get_options(QUERIES[i % len(QUERIES)], context), repeat)
+        )
+        provider.db.close()
+
+    return {"rows": size, "peak_rss_mb": _peak_rss_mb(), "benchmarks": results}
+
+
+def _run_in_subprocess(size, args):
+    cmd = [sys.executable, __file__, "--worker", str(size), "--repeat", str(args.repeat),
+           "--backfill-rows", str(args.backfill_rows)]
+    for item in args.set:
+        cmd += ["--set", item]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _print_results(report):
+    for size, result in report["results"].items():
+        print(f"\n{int(size):,} rows  (peak RSS {result['peak_rss_mb']} MB)")
+        print(f"  {'benchmark':<22}{'p50 ms':>12}{'p99 ms':>12}{'ops/s':>14}")
+        for name, stats in result["benchmarks"].items():
+            print(f"  {name:<22}{stats['p50_ms']:>12.3f}{stats['p99_ms']:>12.3f}{stats['ops_per_s'] or 0:>14,.1f}")
+
+
+def compare(report, baseline, threshold):
+    """Print per-benchmark changes; returns the regressions beyond ``threshold`` percent."""
+    regressions = []
+    for size, result in report["results"].items():
+        base = baseline["results"].get(size)
+        if base is None:
+            continue
+        print(f"\n{int(size):,} rows vs baseline ({baseline['meta'].get('tacz_version')})")
+        for name, stats in result["benchmarks"].items():
+            old = base["benchmarks"].get(name)
+            if not old:
+                continue
+            p50 = (stats["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0.0
+            ops = ((stats["ops_per_s"] or 0) - (old["ops_per_s"] or 0)) / old["ops_per_s"] * 100 \
+                if old["ops_per_s"] else 0.0
+            flag = ""
+            if p50 > threshold or ops < -threshold:
+                flag = "  REGRESSION"
+                regressions.append((size, name))
+            print(f"  {name:<22} p50 {p50:+7.1f}%   ops/s {ops:+7.1f}%{flag}")
+        rss = result["peak_rss_mb"] - base["peak_rss_mb"]
+        print(f"  {'peak_rss_mb':<22} {rss:+.1f} MB")
+    return regressions
+
+
+def _tacz_version():
+    try:
+        from importlib.metadata import version
+
+        return version("tacz")
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tacz hot paths on synthetic catalogs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=200, help="iterations per latency benchmark")
+    parser.add_argument("--backfill-rows", type=int, default=20000, help="rows re-embedded by the backfill benchmark")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="config override")
+    parser.add_argument("--save", type=Path, help="write results to this JSON baseline")
+    parser.add_argument("--compare", type=Path, help="diff against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=20.0, help="regression threshold in percent")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    overrides = dict(item.split("=", 1) for item in args.set)
+
+    if args.worker:
+        print(json.dumps(run_size(args.worker, overrides, args.repeat, args.backfill_rows)))
+        return
+
+    report = {
+        "meta": {
+            "tacz_version": _tacz_version(),
+            "git_rev": subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                      capture_output=True, text=True).stdout.strip(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "overrides": overrides,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {str(size): _run_in_subprocess(size, args) for size in args.sizes},
+    }
+    _print_results(report)
+    if args.save:
+        args.save.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
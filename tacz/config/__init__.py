@@ -1,6 +1,5 @@
 import os
 from pathlib import Path
-import keyring
 from dotenv import dotenv_values
 from typing import Optional
 
@@ -25,6 +24,8 @@ class Config:
             return value
         
         try:
+            import keyring
+
             value = keyring.get_password(self.keyring_service, key)
             if value:
                 return value
@@ -41,6 +42,15 @@ class Config:
     def ollama_model(self) -> str:
         return self.vals.get("OLLAMA_MODEL", "llama3.1:8b")
     
+    @property
+    def ollama_keep_alive(self) -> Optional[str]:
+        value = self.vals.get("OLLAMA_KEEP_ALIVE", "30m").strip()
+        return None if value.lower() in ("", "off", "none") else value
+
+    @property
+    def warm_on_start(self) -> bool:
+        return self.vals.get("WARM_ON_START", "true").lower() == "true"
+
     @property
     def cache_ttl_hours(self) -> int:
         try:
@@ -52,10 +62,149 @@ class Config:
     def enable_cache(self) -> bool:
         return self.vals.get("ENABLE_CACHE", "true").lower() == "true"
     
+    @property
+    def response_cache_size(self) -> int:
+        try:
+            return max(0, int(self.vals.get("RESPONSE_CACHE_SIZE", "500")))
+        except ValueError:
+            return 500
+
     @property
     def enable_history(self) -> bool:
         return self.vals.get("ENABLE_HISTORY", "true").lower() == "true"
 
+    @property
+    def embed_cache_size(self) -> int:
+        try:
+            return int(self.vals.get("EMBED_CACHE_SIZE", "10000"))
+        except ValueError:
+            return 10000
+
+    @property
+    def embed_batch_size(self) -> int:
+        try:
+            return max(1, int(self.vals.get("EMBED_BATCH_SIZE", "64")))
+        except ValueError:
+            return 64
+
+    @property
+    def embed_backend(self) -> str:
+        return self.vals.get("EMBED_BACKEND", "sentence-transformers").lower()
+
+    @property
+    def embed_onnx_dir(self) -> Optional[str]:
+        return self.vals.get("EMBED_ONNX_DIR") or None
+
+    @property
+    def search_mode(self) -> str:
+        return self.vals.get("SEARCH_MODE", "vector").lower()
+
+    @property
+    def hybrid_weight(self) -> float:
+        try:
+            return min(1.0, max(0.0, float(self.vals.get("HYBRID_WEIGHT", "0.7"))))
+        except ValueError:
+            return 0.7
+
+    @property
+    def hybrid_candidates(self) -> int:
+        try:
+            return max(1, int(self.vals.get("HYBRID_CANDIDATES", "200")))
+        except ValueError:
+            return 200
+
+    @property
+    def ann_mode(self) -> str:
+        return self.vals.get("ANN_MODE", "auto").lower()
+
+    @property
+    def ann_min_rows(self) -> int:
+        try:
+            return int(self.vals.get("ANN_MIN_ROWS", "50000"))
+        except ValueError:
+            return 50000
+
+    @property
+    def ann_nprobe(self) -> int:
+        try:
+            return max(1, int(self.vals.get("ANN_NPROBE", "8")))
+        except ValueError:
+            return 8
+
+    @property
+    def ann_nlist(self) -> int:
+        try:
+            return max(0, int(self.vals.get("ANN_NLIST", "0")))
+        except ValueError:
+            return 0
+
+    @property
+    def db_confident_score(self) -> float:
+        try:
+            return float(self.vals.get("DB_CONFIDENT_SCORE", "0.8"))
+        except ValueError:
+            return 0.8
+
+    @property
+    def save_generated(self) -> bool:
+        return self.vals.get("SAVE_GENERATED", "false").lower() == "true"
+
+    @property
+    def vector_format(self) -> str:
+        fmt = self.vals.get("VECTOR_FORMAT", "float32").lower()
+        return fmt if fmt in ("float32", "float16", "int8") else "float32"
+
+    @property
+    def daemon_socket(self) -> Optional[str]:
+        return self.vals.get("DAEMON_SOCKET") or None
+
+    @property
+    def use_daemon(self) -> bool:
+        return self.vals.get("USE_DAEMON", "true").lower() == "true"
+
+    @property
+    def sqlite_journal_mode(self) -> str:
+        mode = self.vals.get("SQLITE_JOURNAL_MODE", "wal").lower()
+        return mode if mode in ("wal", "delete", "truncate", "persist") else "wal"
+
+    @property
+    def sqlite_synchronous(self) -> str:
+        level = self.vals.get("SQLITE_SYNCHRONOUS", "normal").lower()
+        return level if level in ("off", "normal", "full", "extra") else "normal"
+
+    @property
+    def sqlite_mmap_size(self) -> int:
+        try:
+            return max(0, int(self.vals.get("SQLITE_MMAP_SIZE", "268435456")))
+        except ValueError:
+            return 268435456
+
+    @property
+    def sqlite_cache_kib(self) -> int:
+        try:
+            return max(0, int(self.vals.get("SQLITE_CACHE_KIB", "16384")))
+        except ValueError:
+            return 16384
+
+    @property
+    def sqlite_temp_store(self) -> str:
+        store = self.vals.get("SQLITE_TEMP_STORE", "memory").lower()
+        return store if store in ("default", "file", "memory") else "memory"
+
+    @property
+    def sqlite_busy_timeout_ms(self) -> int:
+        try:
+            return max(0, int(self.vals.get("SQLITE_BUSY_TIMEOUT_MS", "5000")))
+        except ValueError:
+            return 5000
+
+    @property
+    def sqlite_cached_statements(self) -> int:
+        try:
+            return max(0, int(self.vals.get("SQLITE_CACHED_STATEMENTS", "256")))
+        except ValueError:
+            return 256
+
 config = Config()
 
 def get_tacz_dir():
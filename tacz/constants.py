@@ -53,36 +53,43 @@ Response: {{"is_valid":false,"explanation_if_not_valid":"I couldn't understand w
 Only return valid JSON, no additional text or markdown.
 """
 
-DANGEROUS_PATTERNS = [
-    (r"\brm\s+-rf\s+/?\S*",            "Recursive delete of files/directories"),
-    (r"\bdd\s+if=",                    "Raw disk overwrite with dd"),
-    (r":\s*\(\)\s*{\s*:\s*|:\s*&\s*};\s*", "Fork bomb"),
-    (r"\bmkfs\.",                     "Formatting a filesystem"),
-    (r"\bshutdown\b",                 "System shutdown"),
-    (r"\breboot\b",                   "System reboot"),
-    (r"\bpoweroff\b",                 "Power off the machine"),
-    (r"\bhalt\b",                     "Halt the machine"),
-    (r"\bsystemctl\s+disable\b",      "Disabling a system service"),
-    (r"\bchown\s+-R\s+",              "Recursive ownership change"),
-    (r"(^|\s)sudo\s+",                "Elevation to super-user"),
-    (r"\bchmod\s+7[0-7][0-7]\b",      "World-writable permission change"),
-    (r"\b:(){:|:&};:\b",              "Alternate fork-bomb syntax"),
-    (r"\bfind\s+.*\bdelete\b",        "File deletion with find"),
-    (r"\bcp\s+-R\s+",                 "Recursive copy"),
-    (r"\bmv\s+-R\s+",                 "Recursive move"),
-    (r"\bexport\s+PATH\s*=\s*.*\b",   "Modifying PATH variable"),
-    (r"\bexport\s+LD_PRELOAD\s*=\s*.*\b", "Modifying LD_PRELOAD variable"),
-    (r"\bexport\s+LD_LIBRARY_PATH\s*=\s*.*\b", "Modifying LD_LIBRARY_PATH variable"),
-    (r".*;.*rm\s+", "Command contains deletion after separator (;)"),
-    (r".*&&.*rm\s+",                    "Command contains deletion after logical AND (&&)"),
-    (r".*\|\|.*rm\s+",                  "Command contains deletion after logical OR (||)"),
-    (r".*`.*`",                         "Command contains command substitution (backticks)"),
-    (r".*\$\(.*\)",                     "Command contains command substitution ($(command))"),
-    (r".*[><]\s*/etc/",                 "Command redirects to system configuration files"),
-    (r".*[><]\s*/dev/",                 "Command redirects to device files"),
-    (r"\brm\s+(?!-i\b).*", "File deletion without confirmation flag (-i)"),
-    (r"\brm\s+-[a-zA-Z]*[fF][a-zA-Z]*\s+", "Forced deletion with rm -f"),
-    (r"\brm\s+-[a-zA-Z]*[rR][a-zA-Z]*\s+", "Recursive deletion with rm -r"),
-    (r"\brm\s+-[a-zA-Z]*[rR][a-zA-Z]*[fF][a-zA-Z]*\s+", "Dangerous recursive forced deletion"),
-    (r"\brm\s+-[a-zA-Z]*[fF][a-zA-Z]*[rR][a-zA-Z]*\s+", "Dangerous recursive forced deletion"),
-]
\ No newline at end of file
+# Safety rules as (rule_id, pattern, reason). Patterns are matched with
+# re.IGNORECASE; rule ids are stable and stored alongside catalog commands,
+# so rename one only together with a safety version bump.
+SAFETY_RULES = [
+    ("rm-rf",                  r"\brm\s+-rf\s+/?\S*",            "Recursive delete of files/directories"),
+    ("dd-raw-write",           r"\bdd\s+if=",                    "Raw disk overwrite with dd"),
+    ("fork-bomb",              r":\s*\(\)\s*{\s*:\s*|:\s*&\s*};\s*", "Fork bomb"),
+    ("mkfs",                   r"\bmkfs\.",                     "Formatting a filesystem"),
+    ("shutdown",               r"\bshutdown\b",                 "System shutdown"),
+    ("reboot",                 r"\breboot\b",                   "System reboot"),
+    ("poweroff",               r"\bpoweroff\b",                 "Power off the machine"),
+    ("halt",                   r"\bhalt\b",                     "Halt the machine"),
+    ("systemctl-disable",      r"\bsystemctl\s+disable\b",      "Disabling a system service"),
+    ("chown-recursive",        r"\bchown\s+-R\s+",              "Recursive ownership change"),
+    ("sudo",                   r"(^|\s)sudo\s+",                "Elevation to super-user"),
+    ("chmod-world-writable",   r"\bchmod\s+7[0-7][0-7]\b",      "World-writable permission change"),
+    ("fork-bomb-alt",          r"\b:(){:|:&};:\b",              "Alternate fork-bomb syntax"),
+    ("find-delete",            r"\bfind\s+.*\bdelete\b",        "File deletion with find"),
+    ("cp-recursive",           r"\bcp\s+-R\s+",                 "Recursive copy"),
+    ("mv-recursive",           r"\bmv\s+-R\s+",                 "Recursive move"),
+    ("export-path",            r"\bexport\s+PATH\s*=\s*.*\b",   "Modifying PATH variable"),
+    ("export-ld-preload",      r"\bexport\s+LD_PRELOAD\s*=\s*.*\b", "Modifying LD_PRELOAD variable"),
+    ("export-ld-library-path", r"\bexport\s+LD_LIBRARY_PATH\s*=\s*.*\b", "Modifying LD_LIBRARY_PATH variable"),
+    ("rm-after-semicolon",     r";.*rm\s+",                       "Command contains deletion after separator (;)"),
+    ("rm-after-and",           r"&&.*rm\s+",                      "Command contains deletion after logical AND (&&)"),
+    ("rm-after-or",            r"\|\|.*rm\s+",                    "Command contains deletion after logical OR (||)"),
+    ("backtick-substitution",  r"`.*`",                           "Command contains command substitution (backticks)"),
+    ("dollar-substitution",    r"\$\(.*\)",                       "Command contains command substitution ($(command))"),
+    ("redirect-etc",           r"[><]\s*/etc/",                   "Command redirects to system configuration files"),
+    ("redirect-dev",           r"[><]\s*/dev/",                   "Command redirects to device files"),
+    ("rm-no-confirm",          r"\brm\s+(?!-i\b)",                "File deletion without confirmation flag (-i)"),
+    ("rm-force",               r"\brm\s+-[a-zA-Z]*[fF][a-zA-Z]*\s+", "Forced deletion with rm -f"),
+    ("rm-recursive",           r"\brm\s+-[a-zA-Z]*[rR][a-zA-Z]*\s+", "Recursive deletion with rm -r"),
+    ("rm-recursive-force",     r"\brm\s+-[a-zA-Z]*[rR][a-zA-Z]*[fF][a-zA-Z]*\s+", "Dangerous recursive forced deletion"),
+    ("rm-force-recursive",     r"\brm\s+-[a-zA-Z]*[fF][a-zA-Z]*[rR][a-zA-Z]*\s+", "Dangerous recursive forced deletion"),
+    ("destructive-intent",     r"format|erase|wipe|destroy|delete all|remove all", "Command appears to have destructive intent"),
+]
+
+# (pattern, reason) view kept for callers that predate rule ids.
+DANGEROUS_PATTERNS = [(pattern, reason) for _, pattern, reason in SAFETY_RULES]
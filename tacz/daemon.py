@@ -0,0 +1,215 @@
+# tacz/daemon.py
+"""Resident ``tacz serve`` daemon and the thin client the CLI talks to it with.
+
+The daemon keeps one CommandDatabase (and with it the resident vector index
+and the embedding model) loaded, and answers JSON-lines requests over a
+Unix socket. Requests are handled one at a time: the SQLite connection and
+the model are not shared across threads, and every request is a quick
+database call. Model generation stays in the CLI process, which streams
+straight from Ollama while the daemon searches, so a long generation
+never holds up the daemon or hits the request timeout.
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+from pathlib import Path
+from typing import Any, Dict, List
+
+from tacz.config import config
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever requests or replies change shape; the client ignores a
+# daemon speaking another version and falls back to in-process mode.
+PROTOCOL_VERSION = 2
+REQUEST_TIMEOUT = 30.0
+# The CommandDatabase methods the daemon answers, each as an op of the same name.
+DB_OPS = ("search", "record_history", "add_command", "get_history", "search_history")
+
+
+class DaemonError(Exception):
+    """The daemon could not be reached or failed to answer a request."""
+
+
+def socket_path() -> Path:
+    return Path(config.daemon_socket) if config.daemon_socket else config.get_tacz_dir() / "tacz.sock"
+
+
+class DaemonClient:
+    """One short-lived connection per request; Unix socket connects are cheap."""
+
+    def __init__(self, path=None, timeout: float = REQUEST_TIMEOUT):
+        self.path = Path(path) if path else socket_path()
+        self.timeout = timeout
+
+    def request(self, op: str, **params) -> Any:
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonError("Unix sockets are not available on this platform")
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(str(self.path))
+                sock.sendall(json.dumps({"op": op, **params}).encode("utf-8") + b"\n")
+                with sock.makefile("rb") as reader:
+                    line = reader.readline()
+        except OSError as e:
+            raise DaemonError(str(e)) from e
+        if not line:
+            raise DaemonError("daemon closed the connection")
+        try:
+            reply = json.loads(line)
+        except ValueError as e:
+            raise DaemonError(f"unreadable reply: {e}") from e
+        if not reply.get("ok"):
+            raise DaemonError(reply.get("error", "unknown daemon error"))
+        return reply.get("result")
+
+
+def _open_local_database():
+    from tacz.config import get_db_path
+    from tacz.utils.command_db import CommandDatabase
+
+    return CommandDatabase(get_db_path())
+
+
+class _RemoteDatabase:
+    """The parts of CommandDatabase the CLI uses, forwarded to the daemon.
+
+    When a request fails (the daemon stopped, or timed out) the database is
+    opened in-process and serves the rest of the session.
+    """
+
+    def __init__(self, client: DaemonClient, current_platform: str, open_local=_open_local_database):
+        self.client = client
+        self.current_platform = current_platform
+        self._open_local = open_local
+        self._local = None
+
+    def _call(self, op: str, **params) -> Any:
+        if self._local is None:
+            try:
+                return self.client.request(op, **params)
+            except DaemonError as e:
+                logger.warning("Daemon request failed, continuing in-process: %s", e)
+                self._local = self._open_local()
+        return getattr(self._local, op)(**params)
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        return self._call("search", query=query, limit=limit)
+
+    def record_history(self, query: str, command: str, executed: bool = False,
+                       success: bool = None, platform: str = None):
+        self._call("record_history", query=query, command=command,
+                   executed=executed, success=success, platform=platform)
+
+    def add_command(self, command: str, explanation: str, category: str = None, platform: str = None,
+                    dangerous: bool = False, danger_reason: str = None) -> int:
+        return self._call("add_command", command=command, explanation=explanation, category=category,
+                          platform=platform, dangerous=dangerous, danger_reason=danger_reason)
+
+    def get_history(self, limit: int = 20) -> List[Dict[str, Any]]:
+        return self._call("get_history", limit=limit)
+
+    def search_history(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return self._call("search_history", query=query, limit=limit)
+
+    def close(self):
+        if self._local is not None:
+            self._local.close()
+
+
+def connect(path=None):
+    """Return a provider whose database is the daemon's, or None if none is listening.
+
+    The provider still generates in this process, so streaming, the
+    concurrent search and the response cache work as they do without the
+    daemon; only the embedding model and the vector index are shared.
+    """
+    client = DaemonClient(path)
+    if not client.path.exists():
+        return None
+    try:
+        info = client.request("ping")
+    except DaemonError:
+        return None
+    if not info or info.get("protocol") != PROTOCOL_VERSION:
+        return None
+    from tacz.llms.providers.ollama_provider import OllamaProvider
+
+    return OllamaProvider(db=_RemoteDatabase(client, info.get("platform")))
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                reply = json.dumps({"ok": True, "result": self.server.dispatch(request)})
+            except Exception as e:
+                logger.error("Daemon request failed: %s", e, exc_info=True)
+                reply = json.dumps({"ok": False, "error": str(e)})
+            self.wfile.write(reply.encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class TaczServer(socketserver.UnixStreamServer):
+    def __init__(self, path, db):
+        self.db = db
+        self.path = Path(path)
+        super().__init__(str(self.path), _Handler)
+        os.chmod(self.path, 0o600)
+
+    def dispatch(self, request: Dict[str, Any]) -> Any:
+        params = dict(request)
+        op = params.pop("op", None)
+        if op == "ping":
+            return {"protocol": PROTOCOL_VERSION, "pid": os.getpid(), "platform": self.db.current_platform}
+        if op not in DB_OPS:
+            raise ValueError(f"Unknown op: {op}")
+        result = getattr(self.db, op)(**params)
+        if op == "search":
+            return [{k: v for k, v in row.items() if not isinstance(v, bytes)} for row in result]
+        return result
+
+    def server_close(self):
+        super().server_close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _claim_socket(path: Path):
+    """Remove a stale socket file, refusing to steal one that is still live."""
+    if not path.exists():
+        return
+    if connect(path) is not None:
+        raise RuntimeError(f"A tacz daemon is already listening on {path}")
+    path.unlink()
+
+
+def serve(path=None):
+    """Run the daemon in the foreground until interrupted."""
+    from tacz.llms.ollama_http import warm_up_async
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("tacz serve needs Unix domain sockets")
+    path = Path(path) if path else socket_path()
+    _claim_socket(path)
+    db = _open_local_database()
+    warm_up_async()
+    # Load the embedding model and build the resident index before accepting requests.
+    db.search("warm up", limit=1)
+    server = TaczServer(path, db)
+    logger.info("tacz daemon listening on %s", path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        db.close()
@@ -0,0 +1,73 @@
+"""Pooled HTTP access to the local Ollama server, plus model warm-up.
+
+Every OllamaProvider in a process shares one httpx client, so repeated
+requests (and the daemon's many requests) reuse open connections. With
+``keep_alive`` on each request, and a warm-up call at session start,
+Ollama keeps the model loaded instead of unloading it after a few idle
+minutes.
+"""
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from tacz.config import config
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_TIMEOUT = 120.0  # loading a large model from disk can take a while
+
+_CLIENT = None
+_LOCK = threading.Lock()
+
+
+def shared_client():
+    """The process-wide pooled httpx client used for all Ollama traffic."""
+    global _CLIENT
+    with _LOCK:
+        if _CLIENT is None:
+            import httpx
+
+            _CLIENT = httpx.Client(
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=4, keepalive_expiry=300),
+                timeout=httpx.Timeout(120.0, connect=3.0),
+            )
+        return _CLIENT
+
+
+def native_url(base_url: str) -> str:
+    """Ollama's native API root for an OpenAI-compatible base URL (``.../v1``)."""
+    base = base_url.rstrip("/")
+    return base[: -len("/v1")] if base.endswith("/v1") else base
+
+
+def keep_alive_body() -> Dict[str, Any]:
+    """Extra request fields asking Ollama to keep the model loaded."""
+    keep_alive = config.ollama_keep_alive
+    return {"keep_alive": keep_alive} if keep_alive else {}
+
+
+def warm_up(timeout: float = WARM_UP_TIMEOUT) -> bool:
+    """Load the configured model into Ollama; True once it is resident.
+
+    A generate request without a prompt makes Ollama load the model and
+    reset its keep-alive timer without producing any tokens.
+    """
+    url = f"{native_url(config.ollama_base_url)}/api/generate"
+    try:
+        response = shared_client().post(
+            url, json={"model": config.ollama_model, **keep_alive_body()}, timeout=timeout
+        )
+        response.raise_for_status()
+    except Exception as e:
+        logger.debug("Model warm-up failed: %s", e)
+        return False
+    return True
+
+
+def warm_up_async() -> Optional[threading.Thread]:
+    """Start warm_up on a daemon thread, so it never delays the prompt."""
+    if not config.ollama_model:
+        return None
+    thread = threading.Thread(target=warm_up, name="tacz-warm-up", daemon=True)
+    thread.start()
+    return thread
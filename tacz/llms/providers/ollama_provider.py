@@ -1,73 +1,308 @@
 # tacz/llms/providers/ollama_provider.py
 import json
 import re
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any
-from openai import OpenAI
+from typing import Optional, Dict, Any, List
 import logging 
 
 from tacz.config import config
+from tacz.llms.ollama_http import keep_alive_body, shared_client
+from tacz.llms.stream_parser import StreamingCommandParser
 from tacz.llms.types import CommandsResponse, Command
-from tacz.utils.command_db import CommandDatabase
-from tacz.utils.safety import is_dangerous_command
+from tacz.utils.response_cache import ResponseCache, make_key, template_version
+from tacz.utils.safety import is_dangerous_command, row_danger
 from tacz.constants import PROMPT
 from tacz.config import get_db_path
 import time
-from rich.console import Console
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-console = Console()
 
-class OllamaProvider:
+def _normalize_command(command: str) -> str:
+    return " ".join(command.split())
+
+
+def _close_quietly(stream):
+    close = getattr(stream, "close", None)
+    if close:
+        try:
+            close()
+        except Exception as e:
+            logger.debug("Closing the model stream failed: %s", e)
+
+
+def _interrupt(stream):
+    """Shut the stream's socket down, waking a thread blocked reading it.
+
+    Closing the response alone only takes effect once the next chunk
+    arrives, which can be seconds away while the model is loading.
+    """
+    response = getattr(stream, "response", None)
+    network_stream = getattr(response, "extensions", {}).get("network_stream")
+    try:
+        sock = network_stream.get_extra_info("socket") if network_stream is not None else None
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+    except OSError as e:
+        logger.debug("Interrupting the model stream failed: %s", e)
+    _close_quietly(stream)
+
+
+class _StreamCancel:
+    """Stops a streaming completion from another thread.
+
+    Cancelling drops the HTTP connection, which unblocks the worker waiting
+    for the next chunk and makes Ollama stop generating.
+    """
+
     def __init__(self):
+        self._lock = threading.Lock()
+        self._stream = None
+        self.cancelled = False
+
+    def attach(self, stream) -> bool:
+        """Register the open stream; False (and closed) if already cancelled."""
+        with self._lock:
+            self._stream = stream
+            cancelled = self.cancelled
+        if cancelled:
+            _interrupt(stream)
+        return not cancelled
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            stream = self._stream
+        if stream is not None:
+            _interrupt(stream)
+
+
+class _MergedDisplay:
+    """Feeds ``display_callback`` catalog hits plus generated commands, deduplicated.
+
+    Generated commands arrive on the generation thread, so updates are
+    serialized with a lock.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.catalog: List[Command] = []
+        self.generated: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_catalog(self, commands: List[Command]):
+        if not commands:
+            return
+        with self._lock:
+            self.catalog = list(commands)
+            self._push()
+
+    def add_generated(self, commands: List[Dict[str, Any]]):
+        with self._lock:
+            self.generated.extend(commands)
+            self._push()
+
+    def _push(self):
+        if not self.callback:
+            return
+        merged, seen = [], set()
+        entries = [(c.command, c.explanation) for c in self.catalog]
+        entries += [(c["command"], c.get("explanation", "")) for c in self.generated]
+        for command, explanation in entries:
+            key = _normalize_command(command)
+            if key not in seen:
+                seen.add(key)
+                merged.append({"cmd": command, "explanation": explanation})
+        if merged:
+            self.callback(merged)
+
+
+class OllamaProvider:
+    def __init__(self, db=None):
         if not config.ollama_base_url:
             raise ValueError("OLLAMA_BASE_URL must be set.")
         if not config.ollama_model:
             raise ValueError("OLLAMA_MODEL must be set.")
         
-        self.client = OpenAI(base_url=config.ollama_base_url, api_key="ollama")
+        # Imported here, as is CommandDatabase below, so the daemon client
+        # (tacz.daemon.connect) starts without openai, numpy or the model.
+        from openai import OpenAI
+
+        self.client = OpenAI(base_url=config.ollama_base_url, api_key="ollama", http_client=shared_client())
         self.model = config.ollama_model
         
-        self.db = CommandDatabase(get_db_path())
+        # The daemon client passes a database forwarding to ``tacz serve``.
+        if db is None:
+            from tacz.utils.command_db import CommandDatabase
+
+            db = CommandDatabase(get_db_path())
+        self.db = db
         self.prompt_template = PROMPT
+        self.prompt_version = template_version(PROMPT)
+        self.cache = (
+            ResponseCache(ttl_hours=config.cache_ttl_hours, max_entries=config.response_cache_size)
+            if config.enable_cache else None
+        )
     
     def get_options(self, prompt: str, context: str, display_callback=None) -> Optional[CommandsResponse]:
+        """Search the catalog and ask the model at the same time.
+
+        The model streams on a worker thread while the search runs on this
+        one, which keeps every SQLite connection on the thread that opened
+        it. Catalog hits are shown at once and generated commands are merged
+        in as they complete; a catalog hit scoring DB_CONFIDENT_SCORE or more
+        cancels the generation. Commands saved from earlier model replies
+        (SAVE_GENERATED) are shown but never cancel it.
+        """
+        platform_detected = next(
+            (line for line in context.split("\n") if "Platform:" in line), 
+            "unknown"
+        ).replace("Platform: ", "")
+        key = make_key(prompt, context, self.model, self.prompt_version)
+        cached = self.cache.get(key) if self.cache is not None else None
+        display = _MergedDisplay(display_callback)
+        cancel = _StreamCancel()
+        pool = ThreadPoolExecutor(max_workers=1)
+        generation = None
+        if cached is None:
+            generation = pool.submit(self._stream_completion, prompt, context, display.add_generated, cancel)
         try:
             start = time.perf_counter()
-            with console.status("Searching...", spinner="dots"):
-                db_results = self.db.search(prompt, limit=3)
+            db_results = self.db.search(prompt, limit=3)
             elapsed = time.perf_counter() - start
 
             logger.info("DB Search for '%s' returned %d results in %.2fs", prompt, len(db_results), elapsed)
             for r in db_results:
-                logger.debug("  - %s | tags: %s", r.get("command", "N/A"), r.get("tags", []))
-
-            commands = []
-            for result in db_results:
-                commands.append(Command(
-                    command=result["command"],
-                    explanation=result["explanation"],
-                    is_dangerous=bool(result["dangerous"]),
-                    danger_explanation=result.get("danger_reason", "")
-                ))
-            
-            platform_detected = next(
-                (line for line in context.split("\n") if "Platform:" in line), 
-                "unknown"
-            ).replace("Platform: ", "")
-            
+                logger.debug("  - %s | score: %.3f", r.get("command", "N/A"), r.get("score") or 0)
+
+            commands = [self._row_command(result) for result in db_results]
+            display.add_catalog(commands)
+
+            best = max(
+                (r.get("score") or 0 for r in db_results if r.get("category") != "generated"), default=0
+            )
+            if generation is not None and best >= config.db_confident_score:
+                logger.info("Catalog match scored %.2f; cancelling generation", best)
+                cancel.cancel()
+                generation = None
+
+            try:
+                generated, not_valid = self._collect_generation(key, generation, cached, platform_detected)
+            except Exception as e:
+                if not commands:
+                    raise
+                logger.warning("Generation failed, showing catalog matches only: %s", e)
+                generated, not_valid = [], None
+
+            seen = {_normalize_command(cmd.command) for cmd in commands}
+            new = [cmd for cmd in generated if _normalize_command(cmd.command) not in seen]
+            if cached is None and config.save_generated:
+                self._save_generated(new)
+            commands.extend(new)
+
             return CommandsResponse(
                 commands=commands,
                 is_valid=True if commands else False,
                 platform_detected=platform_detected,
-                explanation_if_not_valid="No matching commands found in database." if not commands else None
+                explanation_if_not_valid=(not_valid or "No matching commands found.") if not commands else None
             )
         except Exception as e:
-            logger.error("Error during database search: %s", e, exc_info=True)
+            logger.error("Error getting command options: %s", e, exc_info=True)
             return None
-        
+        finally:
+            # A cancelled generation has had its stream closed; don't wait for it.
+            pool.shutdown(wait=False)
+
+    @staticmethod
+    def _row_command(result: Dict[str, Any]) -> Command:
+        is_dangerous, danger_reason = row_danger(result)
+        return Command(
+            command=result["command"],
+            explanation=result["explanation"],
+            is_dangerous=is_dangerous,
+            danger_explanation=danger_reason
+        )
+
+    def _stream_completion(self, prompt: str, context: str, on_commands=None,
+                           cancel: Optional[_StreamCancel] = None) -> str:
+        """Stream the model's reply, passing each command on as soon as it is complete."""
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": self.prompt_template.format(prompt=prompt, context=context)}],
+            stream=True,
+            extra_body=keep_alive_body(),
+        )
+        if cancel is not None and not cancel.attach(stream):
+            return ""
+        parser = StreamingCommandParser()
+        chunks = []
+        try:
+            for chunk in stream:
+                if cancel is not None and cancel.cancelled:
+                    break
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                chunks.append(delta)
+                completed = parser.feed(delta)
+                if completed and on_commands:
+                    on_commands(completed)
+        except Exception:
+            # Reading from a stream closed by cancel() fails; that is expected.
+            if cancel is None or not cancel.cancelled:
+                raise
+        finally:
+            _close_quietly(stream)
+        return "".join(chunks)
+
+    def _collect_generation(self, key: str, generation, cached, platform_detected: str):
+        """Generated commands and, if there are none, the model's explanation why."""
+        if cached is not None:
+            logger.info("Response cache hit")
+            return CommandsResponse.model_validate(cached).commands, None
+        if generation is None:
+            return [], None
+
+        start = time.perf_counter()
+        content = generation.result()
+        logger.info("LLM generation finished %.2fs after the search", time.perf_counter() - start)
+
+        response_data = self._enhance_with_safety_checks(self._parse_response(content))
+        if not response_data.get("is_valid") or not response_data.get("commands"):
+            return [], response_data.get("explanation_if_not_valid") or "Model could not understand your request."
+
+        commands = [
+            Command(
+                command=cmd["command"],
+                explanation=cmd.get("explanation", ""),
+                is_dangerous=bool(cmd.get("is_dangerous")),
+                danger_explanation=(cmd.get("danger_explanation") or cmd.get("danger_reason") or "").strip() or None,
+            )
+            for cmd in response_data["commands"]
+            if cmd.get("command")
+        ]
+        if self.cache is not None and commands:
+            self.cache.put(key, CommandsResponse(
+                commands=commands, is_valid=True, platform_detected=platform_detected
+            ).model_dump())
+        return commands, None
+
+    def _save_generated(self, commands: List[Command]):
+        # Opt-in: unreviewed model output joins the catalog as "generated" rows.
+        for cmd in commands:
+            self.db.add_command(
+                command=cmd.command,
+                explanation=cmd.explanation,
+                category="generated",
+                platform=self.db.current_platform,
+                dangerous=cmd.is_dangerous,
+                danger_reason=cmd.danger_explanation,
+            )
+
     def _parse_response(self, content: str) -> Dict[str, Any]:
         try:
             return json.loads(content.strip())
@@ -0,0 +1,57 @@
+import json
+from typing import Any, Dict, List
+
+
+class StreamingCommandParser:
+    """Pull complete command objects out of a JSON reply as it streams in.
+
+    The model answers ``{"is_valid": ..., "commands": [{...}, ...]}``.
+    Each chunk is scanned once, tracking strings and bracket nesting, and
+    every object that closes inside an array and carries a ``command`` key
+    is returned as soon as its closing brace arrives. Prose or code fences
+    around the JSON are skipped; the complete reply is still parsed
+    separately, with its fallbacks, once the stream ends.
+    """
+
+    def __init__(self):
+        self._buf: List[str] = []
+        self._stack: List[tuple] = []  # (bracket, offset of the opening bracket)
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        completed = []
+        for ch in chunk:
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"' and self._stack:
+                self._in_string = True
+            elif ch in "{[":
+                self._stack.append((ch, len(self._buf) - 1))
+            elif ch in "}]" and self._stack:
+                opening, start = self._stack.pop()
+                if ch == "}" and opening == "{" and self._stack and self._stack[-1][0] == "[":
+                    command = self._load("".join(self._buf[start:]))
+                    if command is not None:
+                        completed.append(command)
+            if not self._stack:
+                # Outside any JSON value; nothing before here is needed again.
+                self._buf.clear()
+        return completed
+
+    @staticmethod
+    def _load(text: str):
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(value, dict) and isinstance(value.get("command"), str):
+            return value
+        return None
@@ -2,36 +2,54 @@
 import sys
 import os
 from pathlib import Path
+from typing import Optional
 from subprocess import run as run_command
 import dotenv
-import pyperclip
-import questionary
 import shutil
-import re
 import atexit
 import logging
 
-from rich import print as rprint
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.text import Text
-from rich.live import Live
-
-from tacz.config.setup import run_setup
-from tacz.llms.providers.ollama_provider import OllamaProvider
+from tacz import daemon
+from tacz.config import config
+from tacz.llms import ollama_http
+from tacz.session import Session
+from tacz.utils.history import read_history
+from tacz.utils.lazy import LazyImport
 from tacz.utils.os_detect import get_os_info, get_available_tools
 from tacz.utils.safety import has_command_chaining, is_rm_command, sanitize_command
+from tacz.utils.shell_parse import parse_command
+from tacz.utils.startup_profile import format_report, profile_imports
+
+# Heavy dependencies load on first use, so `--version` and `--history` never
+# import the UI toolkits, openai, numpy or the embedding stack.
+pyperclip = LazyImport("pyperclip")
+questionary = LazyImport("questionary")
+rprint = LazyImport("rich", "print")
+Console = LazyImport("rich.console", "Console")
+Table = LazyImport("rich.table", "Table")
+Panel = LazyImport("rich.panel", "Panel")
+Text = LazyImport("rich.text", "Text")
+Live = LazyImport("rich.live", "Live")
+run_setup = LazyImport("tacz.config.setup", "run_setup")
+OllamaProvider = LazyImport("tacz.llms.providers.ollama_provider", "OllamaProvider")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 _provider_instance = None
 
+def open_provider():
+    """Use the ``tacz serve`` daemon when one is listening, else work in-process."""
+    if config.use_daemon:
+        remote = daemon.connect()
+        if remote is not None:
+            return remote
+    return OllamaProvider()
+
 def get_provider():
     global _provider_instance
     if _provider_instance is None:
-        _provider_instance = OllamaProvider()
+        _provider_instance = open_provider()
     return _provider_instance
 
 def cleanup():
@@ -39,6 +57,8 @@ def cleanup():
     global _provider_instance
     if _provider_instance is not None:
         _provider_instance.db.close()
+        if _provider_instance.cache is not None:
+            _provider_instance.cache.close()
 
 atexit.register(cleanup)
 
@@ -47,8 +67,7 @@ def setup():
 
 def show_history():
     try:
-        provider = get_provider()
-        history = provider.get_command_history(limit=20)
+        history = read_history(config.get_db_path(), limit=20)
         
         if not history:
             logger.info("No command history available.")
@@ -81,9 +100,9 @@ def show_history():
     except Exception as e:
         logger.error("Error showing history: %s", e, exc_info=True)
 
-def show_favorites():
+def show_favorites(session: Optional[Session] = None):
     try:
-        provider = OllamaProvider()
+        provider = (session or Session(open_provider, get_env_context)).provider
         favorites = provider.db.search("favorite", limit=20)
         
         if not favorites:
@@ -145,56 +164,39 @@ def edit_command(command: str) -> str:
     return edited if edited else command
 
 def break_down_command(command: str) -> dict:
-    if not command:
+    parsed = parse_command(command)
+    if not parsed.commands:
         return {"command": "", "args": []}
-        
-    if command.count(" ") <= 1 and not any(op in command for op in "|;&><"):
-        parts = command.split()
-        if not parts:
-            return {"command": "", "args": []}
-        if len(parts) == 1:
-            return {"command": parts[0], "args": []}
-
-        arg = parts[1]
-        arg_type = "option" if arg.startswith("-") else "value"
-        return {"command": parts[0], "args": [{"value": arg, "type": arg_type}]}
-    
-    if '|' not in command and ';' not in command and '&&' not in command and '||' not in command:
-        parts = command.split()
-        if not parts:
-            return {"command": "", "args": []}
-        
-        base_command = parts[0]
-        args = []
-        
-        for part in parts[1:]:
-            if part.startswith('-'):
-                arg_type = "option"
-            else:
-                arg_type = "value"
-            
-            args.append({"value": part, "type": arg_type})
-        
+
+    first = parsed.commands[0]
+    base_command = first.argv[0].raw if first.argv else ""
+
+    if parsed.is_compound:
+        rest = command[first.argv[0].end:] if first.argv else command
         return {
             "command": base_command,
-            "args": args
+            "args": [{"value": rest.strip(), "type": "complex"}]
         }
-    
-    first_part = re.split(r'[|;&]', command)[0].strip()
-    parts = first_part.split()
-    base_command = parts[0] if parts else ""
-    
-    return {
-        "command": base_command,
-        "args": [{"value": command[len(base_command):].strip(), "type": "complex"}]
-    }
 
-def show_options(query: str):
-    context = get_env_context()
+    args = [
+        {"value": word.raw, "type": "option" if word.value.startswith("-") else "value"}
+        for word in first.argv[1:]
+    ]
+    args += [{"value": command[r.start:r.end], "type": "redirect"} for r in first.redirects]
+    return {"command": base_command, "args": args}
+
+def show_options(query: str, session: Optional[Session] = None):
+    """Suggest, explain and optionally run commands for ``query``.
+
+    Without a ``session`` this is a one-off: the provider and environment
+    context are opened for this query alone.
+    """
+    session = session or Session(open_provider, get_env_context)
+    context = session.context
     console = Console()
     
     try:
-        provider = OllamaProvider()
+        provider = session.provider
     except ValueError as e:
         console.print(f"[red]Configuration error: {e}[/red]\nPlease run 'tacz --setup' to configure Ollama settings.")
         console.print("Please run 'tacz --setup' to configure Ollama settings.")
@@ -307,7 +309,7 @@ def show_options(query: str):
         show_history()
         return
     elif selected == "favorites":
-        show_favorites()
+        show_favorites(session=session)
         return
     
     if selected:
@@ -396,6 +398,8 @@ def show_options(query: str):
             try:
                 result = run_command(final_command, shell=True, text=True, capture_output=True)
                 success = result.returncode == 0
+                # The command may have switched git branches or similar.
+                session.refresh_context()
                 
                 if result.stdout:
                     print(result.stdout)
@@ -430,7 +434,15 @@ def interactive_mode():
     console = Console()
     console.print("\n[bold blue]tacz - Local Command Assistant[/bold blue]")
     console.print("Type 'exit' to quit, '--history' for command history, '--favorites' for favorites\n")
-    
+
+    if config.warm_on_start:
+        # Ollama loads the model while the user types the first question.
+        ollama_http.warm_up_async()
+
+    with Session(open_provider, get_env_context) as session:
+        _interactive_loop(console, session)
+
+def _interactive_loop(console, session: Session):
     while True:
         try:
             user_input = questionary.text(
@@ -450,10 +462,10 @@ def interactive_mode():
                 show_history()
                 continue
             elif user_input.lower() == '--favorites':
-                show_favorites()
+                show_favorites(session=session)
                 continue
             
-            show_options(user_input)
+            show_options(user_input, session=session)
             
         except KeyboardInterrupt:
             console.print("\n\n[yellow]Use 'exit' to quit.[/yellow]")
@@ -469,6 +481,10 @@ def app():
     
     args = [arg.strip() for arg in sys.argv[1:]]
     config_path = Path.home() / ".taczrc"
+
+    if args and args[0] == "--profile-startup":
+        print(format_report(profile_imports()))
+        return
     
     if not config_path.exists() or (args and args[0] == "--setup"):
         run_setup()
@@ -488,6 +504,16 @@ def app():
         elif args[0] == "--favorites":
             show_favorites()
             return
+        elif args[0] == "--warm":
+            if ollama_http.warm_up():
+                keep_alive = config.ollama_keep_alive
+                print(f"Model {config.ollama_model} is loaded" + (f" (kept for {keep_alive})." if keep_alive else "."))
+            else:
+                print(f"Could not load {config.ollama_model}; is Ollama running at {config.ollama_base_url}?")
+            return
+        elif args[0] == "serve":
+            daemon.serve()
+            return
     if args:
         query = " ".join(args).rstrip("?")
         show_options(query)
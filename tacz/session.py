@@ -0,0 +1,44 @@
+from typing import Any, Callable, Optional
+
+
+class Session:
+    """State shared by every query of one tacz run.
+
+    Holds a single provider, and with it one database connection, its
+    resident vector index and the loaded embedding model, plus the
+    environment context sent to the model. Both are created on first use,
+    so queries after the first pay only for the search itself.
+    """
+
+    def __init__(self, open_provider: Callable[[], Any], env_context: Callable[[], str]):
+        self._open_provider = open_provider
+        self._env_context = env_context
+        self._provider = None
+        self._context: Optional[str] = None
+
+    @property
+    def provider(self):
+        if self._provider is None:
+            self._provider = self._open_provider()
+        return self._provider
+
+    @property
+    def context(self) -> str:
+        if self._context is None:
+            self._context = self._env_context()
+        return self._context
+
+    def refresh_context(self):
+        """Re-read the environment on next use, e.g. after running a command."""
+        self._context = None
+
+    def close(self):
+        if self._provider is not None:
+            self._provider.db.close()
+            self._provider = None
+
+    def __enter__(self) -> "Session":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,65 @@
+# tacz/tools/build_embeddings.py
+"""Precompute embeddings for the bundled catalog.
+
+The release workflow (.github/workflows/release.yml) runs this before
+building the wheel, and ``--check`` fails the release when the sidecar is
+missing or does not match ``commands.json`` and the embedding backend.
+Fresh installs then preload the catalog without running the model:
+
+    python -m tacz.tools.build_embeddings [--backend onnx] [--check]
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from tacz.config import config
+from tacz.utils.catalog_vectors import DATA_DIR, load_catalog_vectors, save_catalog_vectors
+from tacz.utils.command_db import _get_model, catalog_texts, load_bundled_commands
+from tacz.utils.embedders import EMBED_MODEL_NAME, embedding_fingerprint
+
+
+def build(backend: str = None, batch_size: int = 64, data_dir=DATA_DIR) -> int:
+    if backend:
+        config.vals["EMBED_BACKEND"] = backend
+    commands = load_bundled_commands()
+    if not commands:
+        print("No bundled commands found")
+        return 0
+    texts = catalog_texts(commands)
+    vectors = np.asarray(
+        _get_model().encode(texts, batch_size=batch_size, normalize_embeddings=True),
+        dtype=np.float32,
+    )
+    fingerprint = embedding_fingerprint(config.embed_backend, EMBED_MODEL_NAME)
+    save_catalog_vectors(vectors, texts, fingerprint, data_dir)
+    print(f"Saved {len(texts)} embeddings ({fingerprint}) to {data_dir}")
+    return len(texts)
+
+
+def check(backend: str = None, data_dir=DATA_DIR) -> bool:
+    """True when ``data_dir`` holds a sidecar that preload would use."""
+    if backend:
+        config.vals["EMBED_BACKEND"] = backend
+    texts = catalog_texts(load_bundled_commands())
+    fingerprint = embedding_fingerprint(config.embed_backend, EMBED_MODEL_NAME)
+    if load_catalog_vectors(texts, fingerprint, data_dir) is None:
+        print(f"No up-to-date catalog embeddings ({fingerprint}) in {data_dir}")
+        return False
+    print(f"Catalog embeddings in {data_dir} match {len(texts)} commands ({fingerprint})")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute catalog embeddings")
+    parser.add_argument("--backend", help="Embedding backend (defaults to EMBED_BACKEND)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--check", action="store_true", help="Only verify the sidecar; exit 1 if stale")
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(0 if check(args.backend) else 1)
+    build(args.backend, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
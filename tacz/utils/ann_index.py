@@ -0,0 +1,181 @@
+import json
+import os
+import zipfile
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+_ASSIGN_CHUNK = 16384
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / (norms + 1e-9)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (by inner product) for each row, in bounded-memory chunks."""
+    out = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_CHUNK):
+        chunk = vectors[start:start + _ASSIGN_CHUNK]
+        out[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return out
+
+
+def _masks(masks, n: int) -> np.ndarray:
+    if masks is None:
+        return np.zeros(n, dtype=np.int64)
+    return np.asarray(masks, dtype=np.int64)
+
+
+class IVFIndex:
+    """Inverted-file (IVF-flat) approximate nearest-neighbour index in NumPy.
+
+    Unit vectors are clustered with spherical k-means into ``nlist`` lists.
+    A query scores only the ``nprobe`` lists whose centroids are closest,
+    so ``nprobe`` trades recall for latency. ``max_id`` tracks the highest
+    command id indexed so newer rows can be appended incrementally, and
+    ``trained_rows`` how many rows the centroids were trained on, so the
+    owner can retrain once appended rows outnumber them.
+
+    Lists hold ids, masks and vector slots but no vectors: ``search`` gathers
+    the probed rows through ``take`` (``VectorStore.take`` for tacz), so the
+    index adds no second copy of the catalog in memory or on disk.
+
+    Each list is kept sorted by platform mask, so a platform-filtered query
+    scores contiguous slices and never touches other platforms' vectors.
+    """
+
+    def __init__(self, centroids: np.ndarray, list_ids: List[np.ndarray], list_slots: List[np.ndarray],
+                 list_masks: List[np.ndarray], fingerprint: str = "", max_id: int = 0,
+                 trained_rows: Optional[int] = None):
+        self.centroids = centroids
+        self.list_ids = list_ids
+        self.list_slots = list_slots
+        self.list_masks = list_masks
+        self.fingerprint = fingerprint
+        self.max_id = max_id
+        self.trained_rows = len(self) if trained_rows is None else trained_rows
+
+    @classmethod
+    def build(cls, ids: np.ndarray, vectors: np.ndarray, slots: Optional[np.ndarray] = None,
+              masks: Optional[np.ndarray] = None, nlist: int = 0, iterations: int = 10,
+              fingerprint: str = "", seed: int = 0) -> "IVFIndex":
+        """Train on ``vectors`` and index them; ``slots`` (default: row positions) locate them for ``take``."""
+        ids = np.asarray(ids, dtype=np.int64)
+        slots = np.arange(len(ids), dtype=np.int64) if slots is None else np.asarray(slots, dtype=np.int64)
+        vectors = _normalize(vectors)
+        n = len(ids)
+        nlist = max(1, min(nlist or int(np.sqrt(n)), n))
+        rng = np.random.default_rng(seed)
+        # Training on a sample keeps build time flat for very large catalogs.
+        sample = vectors[rng.choice(n, size=min(n, 256 * nlist), replace=False)] if n else vectors
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+        index = cls(centroids, *([np.empty(0, dtype=np.int64)] * nlist for _ in range(3)),
+                    fingerprint=fingerprint, trained_rows=n)
+        index._append(ids, vectors, slots, _masks(masks, len(ids)))
+        return index
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.list_ids)
+
+    def _append(self, ids: np.ndarray, vectors: np.ndarray, slots: np.ndarray, masks: np.ndarray):
+        if not len(ids):
+            return
+        assign = _assign(vectors, self.centroids)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+        for k in range(len(self.centroids)):
+            rows = order[bounds[k]:bounds[k + 1]]
+            if len(rows):
+                list_masks = np.concatenate([self.list_masks[k], masks[rows]])
+                by_mask = np.argsort(list_masks, kind="stable")
+                self.list_masks[k] = list_masks[by_mask]
+                self.list_ids[k] = np.concatenate([self.list_ids[k], ids[rows]])[by_mask]
+                self.list_slots[k] = np.concatenate([self.list_slots[k], slots[rows]])[by_mask]
+        self.max_id = max(self.max_id, int(ids.max()))
+
+    def add(self, ids, vectors, slots, masks=None):
+        """Append rows to their nearest lists without retraining centroids."""
+        ids = np.asarray(ids, dtype=np.int64)
+        self._append(ids, _normalize(np.atleast_2d(vectors)), np.asarray(slots, dtype=np.int64),
+                     _masks(masks, len(ids)))
+
+    def _slices(self, k: int, allowed_masks: Optional[List[int]]):
+        if allowed_masks is None:
+            return [slice(0, len(self.list_ids[k]))]
+        masks = self.list_masks[k]
+        return [
+            slice(np.searchsorted(masks, m, "left"), np.searchsorted(masks, m, "right"))
+            for m in allowed_masks
+        ]
+
+    def search(self, q_vec: np.ndarray, k: int, take: Callable[[np.ndarray], np.ndarray], nprobe: int = 8,
+               allowed_masks: Optional[List[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-``k`` ids and cosine similarities, best first.
+
+        ``take(slots)`` returns the unit vectors at ``slots``; only rows in
+        the probed lists are read. ``allowed_masks`` restricts the scan to
+        rows with those platform masks.
+        """
+        if k <= 0 or not len(self.centroids):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        q = (q_vec / (np.linalg.norm(q_vec) + 1e-9)).astype(np.float32)
+        probe = np.argsort(-(self.centroids @ q))[:max(1, nprobe)]
+        parts = [(p, sl) for p in probe for sl in self._slices(p, allowed_masks)]
+        ids = np.concatenate([self.list_ids[p][sl] for p, sl in parts])
+        if not len(ids):
+            return ids, np.empty(0, dtype=np.float32)
+        slots = np.concatenate([self.list_slots[p][sl] for p, sl in parts])
+        sims = np.asarray(take(slots), dtype=np.float32) @ q
+        top = np.argpartition(-sims, k - 1)[:k] if k < len(sims) else np.arange(len(sims))
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return ids[top], sims[top]
+
+    def save(self, path):
+        path = Path(path)
+        offsets = np.cumsum([0] + [len(ids) for ids in self.list_ids])
+        meta = {"fingerprint": self.fingerprint, "max_id": self.max_id, "trained_rows": self.trained_rows}
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                ids=np.concatenate(self.list_ids),
+                slots=np.concatenate(self.list_slots),
+                masks=np.concatenate(self.list_masks),
+                offsets=offsets,
+                meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> Optional["IVFIndex"]:
+        try:
+            with np.load(path) as data:
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+                offsets = data["offsets"]
+                ids, slots, masks = data["ids"], data["slots"], data["masks"]
+                bounds = list(zip(offsets[:-1], offsets[1:]))
+                return cls(
+                    data["centroids"],
+                    [ids[a:b] for a, b in bounds],
+                    [slots[a:b] for a, b in bounds],
+                    [masks[a:b] for a, b in bounds],
+                    fingerprint=meta.get("fingerprint", ""),
+                    max_id=meta.get("max_id", 0),
+                    trained_rows=meta.get("trained_rows"),
+                )
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            # Missing, truncated, foreign or pre-slot files are rebuilt from the database.
+            return None
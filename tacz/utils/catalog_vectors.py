@@ -0,0 +1,55 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+VECTORS_FILE = "commands.embeddings.npy"
+META_FILE = "commands.embeddings.json"
+
+
+def catalog_digest(texts: List[str]) -> str:
+    """Hash of the exact texts that were embedded, in catalog order."""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def load_catalog_vectors(texts: List[str], fingerprint: str, data_dir: Path = DATA_DIR) -> Optional[np.ndarray]:
+    """Return precomputed vectors for ``texts``, or None if the sidecar is stale.
+
+    The sidecar is only trusted when it was built with the same embedding
+    fingerprint and from exactly the same catalog texts.
+    """
+    meta_path = Path(data_dir) / META_FILE
+    vectors_path = Path(data_dir) / VECTORS_FILE
+    if not meta_path.exists() or not vectors_path.exists():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text())
+        if meta.get("fingerprint") != fingerprint:
+            return None
+        if meta.get("count") != len(texts) or meta.get("catalog_sha256") != catalog_digest(texts):
+            return None
+        vectors = np.load(vectors_path)
+    except (OSError, ValueError):
+        return None
+    if vectors.ndim != 2 or vectors.shape[0] != len(texts):
+        return None
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def save_catalog_vectors(vectors: np.ndarray, texts: List[str], fingerprint: str, data_dir: Path = DATA_DIR):
+    data_dir = Path(data_dir)
+    np.save(data_dir / VECTORS_FILE, np.ascontiguousarray(vectors, dtype=np.float32))
+    meta = {
+        "fingerprint": fingerprint,
+        "count": len(texts),
+        "dim": int(vectors.shape[1]) if len(vectors) else 0,
+        "catalog_sha256": catalog_digest(texts),
+    }
+    (data_dir / META_FILE).write_text(json.dumps(meta, indent=2) + "\n")
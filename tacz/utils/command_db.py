@@ -1,32 +1,267 @@
+import atexit
 import json
+import re
 import sqlite3
 import platform
 import struct
 import numpy as np
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any
-from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Any, Optional
 from rich.console import Console
 
+from tacz.config import config
+from tacz.utils.ann_index import IVFIndex
+from tacz.utils.catalog_vectors import load_catalog_vectors
+from tacz.utils.embed_cache import EmbeddingCache
+from tacz.utils.history import fetch_history, search_history
+from tacz.utils.sqlite_conn import connect
+from tacz.utils.safety import RULES as SAFETY_RULES, classify_commands
+from tacz.utils.embedders import EMBED_MODEL_NAME, create_embedder, embedding_fingerprint
+from tacz.utils.vector_index import VectorIndex
+from tacz.utils.vector_store import FORMAT_FLOAT16, FORMAT_FLOAT32, FORMAT_INT8, VectorStore
+
 console = Console()
 
-_EMBED_MODEL = SentenceTransformer("BAAI/bge-small-en-v1.5", device="cpu")
 _MODEL = None
+_CACHE = None
 
-def _get_model() -> SentenceTransformer:
+def _get_model():
+    """Load the configured embedding backend on first use (EMBED_BACKEND in ~/.taczrc)."""
     global _MODEL
     if _MODEL is None:
         with console.status("Loading embedding model…", spinner="dots"):
-            _MODEL = SentenceTransformer("BAAI/bge-small-en-v1.5", device="cpu")
+            _MODEL = create_embedder(config.embed_backend, EMBED_MODEL_NAME, config.embed_onnx_dir)
     return _MODEL
 
+def _fingerprint() -> str:
+    return embedding_fingerprint(config.embed_backend, EMBED_MODEL_NAME)
+
+def _get_cache() -> Optional[EmbeddingCache]:
+    """Open the persistent embedding cache; ``EMBED_CACHE_SIZE=0`` disables it."""
+    global _CACHE
+    if _CACHE is None and config.embed_cache_size > 0:
+        _CACHE = EmbeddingCache(max_entries=config.embed_cache_size)
+        # Writes the recency of hits not yet flushed by a put.
+        atexit.register(_CACHE.close)
+    return _CACHE
+
 def _embed(text: str) -> bytes:
+    cache = _get_cache()
+    if cache is not None:
+        cached = cache.get(text, _fingerprint())
+        if cached is not None:
+            return cached
     vec = _get_model().encode(text, normalize_embeddings=True)
-    return vec.astype(np.float32).tobytes()
+    vec_blob = vec.astype(np.float32).tobytes()
+    if cache is not None:
+        cache.put(text, _fingerprint(), vec_blob)
+    return vec_blob
+
+def _embed_batch(texts: List[str], batch_size: Optional[int] = None) -> List[bytes]:
+    """Embed many texts at once, encoding only cache misses in batches."""
+    if not texts:
+        return []
+    batch_size = batch_size or config.embed_batch_size
+    cache = _get_cache()
+    blobs = cache.get_many(texts, _fingerprint()) if cache is not None else [None] * len(texts)
+    missing = list(dict.fromkeys(t for t, b in zip(texts, blobs) if b is None))
+    if missing:
+        model = _get_model()
+        encoded = {}
+        for start in range(0, len(missing), batch_size):
+            chunk = missing[start:start + batch_size]
+            vecs = model.encode(chunk, batch_size=batch_size, normalize_embeddings=True)
+            for text, vec in zip(chunk, vecs):
+                encoded[text] = np.asarray(vec, dtype=np.float32).tobytes()
+        if cache is not None:
+            cache.put_many(encoded.items(), _fingerprint())
+        blobs = [b if b is not None else encoded[t] for t, b in zip(texts, blobs)]
+    return blobs
+
+def _command_text(command: str, explanation: Optional[str], category: Optional[str]) -> str:
+    return f"{command}\n{explanation or ''}\n{category or ''}"
+
+def load_bundled_commands() -> List[Dict[str, Any]]:
+    """Flatten the bundled ``data/commands.json`` into catalog order."""
+    try:
+        json_path = Path(__file__).parent.parent / "data" / "commands.json"
+        if not json_path.exists():
+            return {}
+        with open(json_path, "r") as f:
+            commands_data = json.load(f)
+        all_commands = []
+        for category, commands in commands_data.items():
+            for cmd in commands:
+                if "category" not in cmd:
+                    cmd["category"] = category
+                all_commands.append(cmd)
+        return all_commands
+    except Exception:
+        return []
+
+def catalog_texts(commands: List[Dict[str, Any]]) -> List[str]:
+    return [_command_text(cmd["command"], cmd["explanation"], cmd.get("category", "")) for cmd in commands]
 
 def _blob_to_vec(blob: bytes) -> np.ndarray:
     return np.frombuffer(blob, dtype=np.float32)
 
+PLATFORM_BITS = {"linux": 1, "macos": 2, "windows": 4}
+PLATFORM_ANY = 7
+_PLATFORM_ALIASES = {"darwin": "macos", "mac": "macos", "osx": "macos", "win": "windows"}
+
+def platform_mask(platform: Optional[str]) -> int:
+    """Bitmask for a comma-separated platform list; empty means every platform."""
+    if not platform or not platform.strip():
+        return PLATFORM_ANY
+    mask = 0
+    for name in platform.lower().split(","):
+        name = name.strip()
+        mask |= PLATFORM_BITS.get(_PLATFORM_ALIASES.get(name, name), 0)
+    return mask
+
+def matching_masks(current_platform: str) -> List[int]:
+    """Every stored mask visible from ``current_platform``.
+
+    An unrecognised platform only sees rows that apply everywhere.
+    """
+    bit = PLATFORM_BITS.get(current_platform)
+    if bit is None:
+        return [PLATFORM_ANY]
+    return [mask for mask in range(1, PLATFORM_ANY + 1) if mask & bit]
+
+def danger_rules(commands: List[str]) -> List[str]:
+    """Comma-separated safety rule ids matched by each command ('' when clean)."""
+    return [",".join(m.rule_id for m in matches) for matches in classify_commands(commands)]
+
+def _migration_1(conn: sqlite3.Connection):
+    """Base schema, with an external-content FTS index kept in sync by triggers.
+
+    Also upgrades databases created before schema versioning, which dropped
+    and rebuilt their own FTS table on every start.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS commands (
+            id INTEGER PRIMARY KEY,
+            command TEXT NOT NULL,
+            explanation TEXT,
+            category TEXT,
+            platform TEXT,
+            dangerous INTEGER DEFAULT 0,
+            danger_reason TEXT,
+            popularity INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            embedding BLOB
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS command_history (
+            id INTEGER PRIMARY KEY,
+            query TEXT NOT NULL,
+            command TEXT NOT NULL,
+            executed INTEGER DEFAULT 0,
+            success INTEGER DEFAULT 0,
+            platform TEXT,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """
+    )
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(commands)")]
+    if "embedding" not in columns:
+        conn.execute("ALTER TABLE commands ADD COLUMN embedding BLOB")
+    for trigger in ("commands_ai", "commands_au", "commands_ad"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE IF EXISTS command_fts")
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE command_fts USING fts5(
+            command, explanation, category,
+            content='commands', content_rowid='id'
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER commands_ai AFTER INSERT ON commands BEGIN
+            INSERT INTO command_fts(rowid, command, explanation, category)
+            VALUES (new.id, new.command, new.explanation, new.category);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER commands_ad AFTER DELETE ON commands BEGIN
+            INSERT INTO command_fts(command_fts, rowid, command, explanation, category)
+            VALUES ('delete', old.id, old.command, old.explanation, old.category);
+        END
+        """
+    )
+    # Only text changes touch the index; popularity and embedding updates don't.
+    conn.execute(
+        """
+        CREATE TRIGGER commands_au AFTER UPDATE OF command, explanation, category ON commands BEGIN
+            INSERT INTO command_fts(command_fts, rowid, command, explanation, category)
+            VALUES ('delete', old.id, old.command, old.explanation, old.category);
+            INSERT INTO command_fts(rowid, command, explanation, category)
+            VALUES (new.id, new.command, new.explanation, new.category);
+        END
+        """
+    )
+    conn.execute("INSERT INTO command_fts(command_fts) VALUES ('rebuild')")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_commands_platform ON commands(platform)")
+    # Lets _backfill_embeddings find pending rows without scanning the table.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_commands_missing_embedding ON commands(id) WHERE embedding IS NULL"
+    )
+
+def _migration_2(conn: sqlite3.Connection):
+    """Platform bitmask, so platform filters can use an index instead of LIKE."""
+    # Rows inserted without a mask apply everywhere, as an empty platform does.
+    conn.execute(f"ALTER TABLE commands ADD COLUMN platform_mask INTEGER DEFAULT {PLATFORM_ANY}")
+    conn.create_function("tacz_platform_mask", 1, platform_mask, deterministic=True)
+    conn.execute("UPDATE commands SET platform_mask = tacz_platform_mask(platform)")
+    conn.execute("DROP INDEX IF EXISTS idx_commands_platform")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_commands_platform_mask ON commands(platform_mask)")
+
+def _migration_3(conn: sqlite3.Connection):
+    """Vectors move to the memory-mapped store; commands keeps only a slot.
+
+    Existing BLOBs are copied into the store by _backfill_embeddings.
+    """
+    conn.execute("ALTER TABLE commands ADD COLUMN vector_slot INTEGER")
+    conn.execute("DROP INDEX IF EXISTS idx_commands_missing_embedding")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_commands_missing_vector ON commands(id) WHERE vector_slot IS NULL"
+    )
+
+def _migration_4(conn: sqlite3.Connection):
+    """Safety rule matches stored per row, tagged with the rule set version.
+
+    Existing rows are classified by _classify_stale.
+    """
+    conn.execute("ALTER TABLE commands ADD COLUMN danger_rules TEXT")
+    conn.execute("ALTER TABLE commands ADD COLUMN safety_version TEXT")
+
+# Append new migrations here; PRAGMA user_version records how many have run.
+_MIGRATIONS = [
+    _migration_1,
+    _migration_2,
+    _migration_3,
+    _migration_4,
+]
+SCHEMA_VERSION = len(_MIGRATIONS)
+
 class CommandDatabase:
     def __init__(self, db_path=None):
         if not db_path:
@@ -34,31 +269,241 @@ class CommandDatabase:
             db_dir.mkdir(exist_ok=True)
             db_path = db_dir / "commands.db"
         self.db_path = db_path
-        self.conn = sqlite3.connect(str(db_path))
+        self.conn = connect(db_path)
         self.conn.row_factory = sqlite3.Row
+        self.store = VectorStore(Path(str(db_path)).with_suffix(".vectors"))
+        fmt = config.vector_format
+        self.compact = VectorStore(self._compact_path(fmt), fmt) if fmt != FORMAT_FLOAT32 else None
+        self._data_version = 0
+        self._index = None
+        self._index_key = None
+        self._ann = None
+        self._ann_key = None
+        self._ann_dirty = False
+        self._row_count = None
         self._init_db()
         self.current_platform = self._detect_platform()
 
-    def _ensure_fts_schema(self):
-        cursor = self.conn.cursor()
-        cursor.executescript(
-            """
-            DROP TABLE IF EXISTS command_fts;
-            CREATE VIRTUAL TABLE command_fts USING fts5(
-                command,
-                explanation,
-                category
-            );
-            """
+    def _bump_version(self):
+        """Invalidate the resident vector index after a write."""
+        self._data_version += 1
+
+    def _version_key(self) -> tuple:
+        # PRAGMA data_version changes when another connection commits, so
+        # writes from other tacz processes invalidate cached indexes too.
+        external_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return (self._data_version, external_version)
+
+    @contextmanager
+    def _write_transaction(self):
+        """BEGIN IMMEDIATE: the database write lock also serializes vector appends.
+
+        Vector files are fsynced once, just before the commit, so a committed
+        row never points at a slot that could be lost in a crash.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn.cursor()
+            self._sync_vectors()
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _compact_path(self, fmt: str) -> Path:
+        return Path(str(self.db_path)).with_suffix(f".vectors.{fmt}")
+
+    def _append_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        """Append to the float32 store and, slot-aligned, to the compact copy."""
+        slots = self.store.append(vectors)
+        if self.compact is not None and len(slots):
+            self.compact.write(int(slots[0]), vectors)
+        return slots
+
+    def _sync_vectors(self):
+        # With synchronous=OFF SQLite makes no durability promise either.
+        if config.sqlite_synchronous == "off":
+            return
+        self.store.sync()
+        if self.compact is not None:
+            self.compact.sync()
+
+    def _reset_vectors(self):
+        self.store.reset()
+        for fmt in (FORMAT_FLOAT16, FORMAT_INT8):
+            VectorStore(self._compact_path(fmt), fmt).reset()
+        # The IVF lists hold slots into the old files.
+        self._ann = None
+        self._ann_path().unlink(missing_ok=True)
+
+    def _sync_compact(self, chunk: int = 65536):
+        """Fill in compact rows for slots written while VECTOR_FORMAT was different."""
+        # Compare lengths before locking, so opening an up-to-date database
+        # (every read-only query) never takes the write lock.
+        if self.compact is None or len(self.compact) == len(self.store):
+            return
+        with self._write_transaction():
+            total, done = len(self.store), len(self.compact)
+            if done > total:
+                self.compact.reset()
+                done = 0
+            for start in range(done, total, chunk):
+                stop = min(start + chunk, total)
+                self.compact.write(start, self.store.take(np.arange(start, stop)))
+
+    def _get_index(self) -> VectorIndex:
+        key = (*self._version_key(), self.current_platform)
+        if self._index is None or self._index_key != key:
+            masks = matching_masks(self.current_platform)
+            placeholders = ",".join("?" * len(masks))
+            rows = self.conn.execute(
+                f"""
+                SELECT id, vector_slot, popularity FROM commands
+                WHERE platform_mask IN ({placeholders}) AND vector_slot IS NOT NULL
+                ORDER BY id
+                """,
+                masks,
+            ).fetchall()
+            popularity = np.fromiter((r[2] or 0 for r in rows), dtype=np.float32, count=len(rows))
+            if self.compact is None:
+                ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+                slots = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+                matrix, slots = self.store.select(slots)
+                self._index = VectorIndex(ids, matrix, popularity, slots=slots)
+            else:
+                self._index = self._compact_index(rows, popularity)
+            self._index_key = key
+        return self._index
+
+    def _compact_index(self, rows, popularity: np.ndarray) -> VectorIndex:
+        """Scan over float16/int8 rows; the float32 store rescores the best candidates."""
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        slots = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+        if len(slots) and slots.max() >= len(self.compact):
+            self._sync_compact()
+        compact, compact_slots = self.compact.select(slots)
+        if self.compact.fmt == FORMAT_INT8:
+            matrix, scales = compact["codes"], compact["scale"]
+        else:
+            matrix, scales = compact, None
+        return VectorIndex(
+            ids, matrix, popularity, scales=scales, slots=compact_slots,
+            exact=lambda positions: self.store.take(slots[positions]),
         )
-        cursor.execute(
-            """
-            INSERT INTO command_fts(rowid, command, explanation, category)
-            SELECT c.id, c.command, c.explanation, c.category
-            FROM commands c;
-            """
+
+    def _ann_path(self) -> Path:
+        return Path(str(self.db_path)).with_suffix(".ivf.npz")
+
+    def _use_ann(self) -> bool:
+        """ANN_MODE=on/off forces the choice; auto switches on past ANN_MIN_ROWS."""
+        mode = config.ann_mode
+        if mode in ("on", "off"):
+            return mode == "on"
+        key = self._version_key()
+        if self._row_count is None or self._row_count[0] != key:
+            count = self.conn.execute(
+                "SELECT COUNT(*) FROM commands WHERE vector_slot IS NOT NULL"
+            ).fetchone()[0]
+            self._row_count = (key, count)
+        return self._row_count[1] >= config.ann_min_rows
+
+    def _get_ann(self) -> Optional[IVFIndex]:
+        """Load (or build) the IVF index and append rows added since it was saved.
+
+        Appended rows reuse the existing centroids; once the catalog has
+        doubled since they were trained, the index is rebuilt so the lists
+        stay balanced. The file is written when the index is (re)built and
+        on close, not after every append.
+        """
+        key = self._version_key()
+        if self._ann is not None and self._ann_key == key:
+            return self._ann
+        fingerprint = _fingerprint()
+        if self._ann is None:
+            ann = IVFIndex.load(self._ann_path()) if self._ann_path().exists() else None
+            if ann is not None and ann.fingerprint == fingerprint:
+                self._ann = ann
+        if self._ann is not None:
+            rows = self.conn.execute(
+                """
+                SELECT id, vector_slot, platform_mask FROM commands
+                WHERE id > ? AND vector_slot IS NOT NULL ORDER BY id
+                """,
+                (self._ann.max_id,),
+            ).fetchall()
+            if len(self._ann) + len(rows) >= 2 * max(self._ann.trained_rows, 1):
+                self._ann = None
+            elif rows:
+                ids, vectors = self._rows_to_arrays(rows)
+                self._ann.add(ids, vectors, [r[1] for r in rows], masks=[r[2] for r in rows])
+                self._ann_dirty = True
+        if self._ann is None:
+            rows = self.conn.execute(
+                "SELECT id, vector_slot, platform_mask FROM commands WHERE vector_slot IS NOT NULL ORDER BY id"
+            ).fetchall()
+            if not rows:
+                return None
+            ids, vectors = self._rows_to_arrays(rows)
+            self._ann = IVFIndex.build(
+                ids, vectors, slots=[r[1] for r in rows], masks=[r[2] for r in rows],
+                nlist=config.ann_nlist, fingerprint=fingerprint,
+            )
+            self._ann_dirty = True
+            self._save_ann()
+        self._ann_key = key
+        return self._ann
+
+    def _save_ann(self):
+        if self._ann is not None and self._ann_dirty:
+            self._ann.save(self._ann_path())
+            self._ann_dirty = False
+
+    def _rows_to_arrays(self, rows):
+        """``(ids, vectors)`` for ``(id, vector_slot, ...)`` rows, read from the store."""
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        slots = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+        return ids, self.store.take(slots)
+
+    def _ann_search(self, q_vec: np.ndarray, limit: int) -> List[Dict[str, Any]]:
+        ann = self._get_ann()
+        if ann is None:
+            return []
+        # Oversample a little: the popularity boost can reorder near-ties.
+        ids, sims = ann.search(
+            q_vec, limit * 2, self.store.take, nprobe=config.ann_nprobe,
+            allowed_masks=matching_masks(self.current_platform),
         )
-        self.conn.commit()
+        rows = self._fetch_commands([int(i) for i in ids])
+        sim_by_id = dict(zip(ids.tolist(), sims.tolist()))
+        scored = []
+        for row in rows:
+            score = sim_by_id[row["id"]] * (1 + 0.1 * (row.get("popularity") or 0))
+            if score > 0.15:
+                scored.append((score, row))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        for score, row in scored:
+            row["score"] = score
+        return [row for _, row in scored[:limit]]
+
+    def _scored_commands(self, ids: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        """Rows for ranked ``ids`` above the relevance floor, each with its ``score``."""
+        keep = [(int(i), float(score)) for i, score in zip(ids, scores) if score > 0.15]
+        rows = self._fetch_commands([i for i, _ in keep])
+        score_by_id = dict(keep)
+        for row in rows:
+            row["score"] = score_by_id[row["id"]]
+        return rows
+
+    def _fetch_commands(self, ids: List[int]) -> List[Dict[str, Any]]:
+        """Fetch full command rows, preserving the order of ``ids``."""
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        rows = self.conn.execute(
+            f"SELECT * FROM commands WHERE id IN ({placeholders})", ids
+        ).fetchall()
+        by_id = {row["id"]: dict(row) for row in rows}
+        return [by_id[i] for i in ids if i in by_id]
 
     def _detect_platform(self) -> str:
         system = platform.system()
@@ -71,119 +516,121 @@ class CommandDatabase:
         return "unknown"
 
     def _init_db(self):
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS commands (
-                id INTEGER PRIMARY KEY,
-                command TEXT NOT NULL,
-                explanation TEXT,
-                category TEXT,
-                platform TEXT,
-                dangerous INTEGER DEFAULT 0,
-                danger_reason TEXT,
-                popularity INTEGER DEFAULT 0,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                embedding BLOB
-            )
-            """
-        )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS command_history (
-                id INTEGER PRIMARY KEY,
-                query TEXT NOT NULL,
-                command TEXT NOT NULL,
-                executed INTEGER DEFAULT 0,
-                success INTEGER DEFAULT 0,
-                platform TEXT,
-                timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-            """
-        )
-        cursor.execute("PRAGMA table_info(commands)")
-        if not any(row[1] == "embedding" for row in cursor.fetchall()):
-            cursor.execute("ALTER TABLE commands ADD COLUMN embedding BLOB")
-        cursor.execute("DROP TABLE IF EXISTS command_fts")
-        cursor.execute(
-            """
-            CREATE VIRTUAL TABLE IF NOT EXISTS command_fts USING fts5(
-                command, explanation, category
-            )
-            """
-        )
-        cursor.execute("DROP TRIGGER IF EXISTS commands_ai")
-        cursor.execute(
-            """
-            CREATE TRIGGER IF NOT EXISTS commands_ai AFTER INSERT ON commands BEGIN
-                INSERT INTO command_fts(rowid, command, explanation, category)
-                VALUES (new.id, new.command, new.explanation, new.category);
-            END;
-            """
-        )
-        cursor.execute("DROP TRIGGER IF EXISTS commands_au")
-        cursor.execute(
-            """
-            CREATE TRIGGER IF NOT EXISTS commands_au AFTER UPDATE ON commands BEGIN
-                DELETE FROM command_fts WHERE rowid = new.id;
-                INSERT INTO command_fts(rowid, command, explanation, category)
-                VALUES (new.id, new.command, new.explanation, new.category);
-            END;
-            """
-        )
-        cursor.execute(
-            """
-            CREATE TRIGGER IF NOT EXISTS commands_ad AFTER DELETE ON commands BEGIN
-                DELETE FROM command_fts WHERE rowid = old.id;
-            END;
-            """
-        )
-        cursor.execute(
-            """
-            CREATE INDEX IF NOT EXISTS idx_commands_platform ON commands(platform);
-            """
-        )
-        cursor.execute("DELETE FROM command_fts")
-        cursor.execute(
-            """
-            INSERT INTO command_fts(rowid, command, explanation, category)
-            SELECT id, command, explanation, category FROM commands
-            """
-        )
-        self.conn.commit()
+        self._migrate()
+        self._check_embedding_fingerprint()
         self._backfill_embeddings()
-        cursor.execute("SELECT COUNT(*) FROM commands")
-        if cursor.fetchone()[0] == 0:
+        self._sync_compact()
+        self._classify_stale()
+        if self.conn.execute("SELECT 1 FROM commands LIMIT 1").fetchone() is None:
             self._preload_common_commands()
 
-    def _backfill_embeddings(self):
-        cur = self.conn.cursor()
-        cur.execute(
-            """
-            SELECT id, command, explanation, category FROM commands WHERE embedding IS NULL
-            """
+    def _migrate(self):
+        """Bring the schema up to SCHEMA_VERSION; a no-op for current databases."""
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        # BEGIN IMMEDIATE serializes concurrent first runs; re-read under the lock.
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, migration in enumerate(_MIGRATIONS[version:], start=version + 1):
+                migration(self.conn)
+                self.conn.execute(f"PRAGMA user_version = {target}")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
         )
-        for row_id, cmd, expl, cat in cur.fetchall():
-            vec_blob = _embed(f"{cmd}\n{expl or ''}\n{cat or ''}")
-            cur.execute("UPDATE commands SET embedding=? WHERE id=?", (vec_blob, row_id))
-        self.conn.commit()
+
+    def _check_embedding_fingerprint(self):
+        """Drop stored vectors when the embedding backend changed their space.
+
+        Databases written before the fingerprint existed used the default
+        sentence-transformers model. Cleared rows are re-embedded by
+        _backfill_embeddings.
+        """
+        current = _fingerprint()
+        stored = self._get_meta("embedding_fingerprint")
+        if stored == current:
+            return
+        with self._write_transaction() as cursor:
+            if (stored or EMBED_MODEL_NAME) != current:
+                cursor.execute("UPDATE commands SET embedding = NULL, vector_slot = NULL")
+                self._reset_vectors()
+            self._set_meta("embedding_fingerprint", current)
+
+    def _backfill_embeddings(self, batch_size: Optional[int] = None):
+        """Give every row a vector slot.
+
+        Rows still carrying a legacy ``embedding`` BLOB are copied into the
+        store as-is; the rest are embedded in batches.
+        """
+        self._backfill_platform_masks()
+        batch_size = batch_size or config.embed_batch_size
+        rows = self.conn.execute(
+            "SELECT id, command, explanation, category, embedding FROM commands WHERE vector_slot IS NULL"
+        ).fetchall()
+        if not rows:
+            return
+        blobs = [row[4] for row in rows]
+        pending = [i for i, blob in enumerate(blobs) if blob is None]
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            texts = [_command_text(rows[i][1], rows[i][2], rows[i][3]) for i in chunk]
+            for i, blob in zip(chunk, _embed_batch(texts, batch_size)):
+                blobs[i] = blob
+        with self._write_transaction() as cursor:
+            slots = self._append_vectors(np.stack([_blob_to_vec(blob) for blob in blobs]))
+            cursor.executemany(
+                "UPDATE commands SET vector_slot = ?, embedding = NULL WHERE id = ?",
+                [(int(slot), row[0]) for slot, row in zip(slots, rows)],
+            )
+        self._bump_version()
+
+    def _backfill_platform_masks(self):
+        """Fill masks left NULL by inserts that bypassed add_command.
+
+        Databases migrated before platform_mask had a default can still
+        get such rows, and a NULL mask matches no platform at all.
+        """
+        if self.conn.execute("SELECT 1 FROM commands WHERE platform_mask IS NULL LIMIT 1").fetchone() is None:
+            return
+        with self._write_transaction() as cursor:
+            rows = cursor.execute("SELECT id, platform FROM commands WHERE platform_mask IS NULL").fetchall()
+            cursor.executemany(
+                "UPDATE commands SET platform_mask = ? WHERE id = ?",
+                [(platform_mask(row[1]), row[0]) for row in rows],
+            )
+        self._bump_version()
+
+    def _classify_stale(self):
+        """Re-run the safety rules over rows classified under another rule set.
+
+        The rule set version in meta makes this a single lookup once every
+        row is current.
+        """
+        version = SAFETY_RULES.version
+        if self._get_meta("safety_version") == version:
+            return
+        with self._write_transaction() as cursor:
+            rows = cursor.execute(
+                "SELECT id, command FROM commands WHERE safety_version IS NOT ?", (version,)
+            ).fetchall()
+            cursor.executemany(
+                "UPDATE commands SET danger_rules = ?, safety_version = ? WHERE id = ?",
+                [(rules, version, row[0]) for row, rules in zip(rows, danger_rules([row[1] for row in rows]))],
+            )
+            self._set_meta("safety_version", version)
 
     def _load_commands_from_json(self):
-        try:
-            json_path = Path(__file__).parent.parent / "data" / "commands.json"
-            if not json_path.exists():
-                return {}
-            with open(json_path, "r") as f:
-                commands_data = json.load(f)
-            all_commands = []
-            for category, commands in commands_data.items():
-                for cmd in commands:
-                    if "category" not in cmd:
-                        cmd["category"] = category
-                    all_commands.append(cmd)
-            return all_commands
-        except Exception:
-            return []
+        return load_bundled_commands()
 
     def _preload_common_commands(self):
         commands = self._load_commands_from_json()
@@ -211,46 +658,62 @@ class CommandDatabase:
                     "dangerous": False,
                 },
             ]
-        cursor = self.conn.cursor()
-        for cmd in commands:
-            vec_blob = _embed(f"{cmd['command']}\n{cmd['explanation']}\n{cmd.get('category', '')}")
-            cursor.execute(
-                """
-                INSERT INTO commands (command, explanation, category, platform, dangerous, danger_reason, embedding)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    cmd["command"],
-                    cmd["explanation"],
-                    cmd.get("category", ""),
-                    cmd.get("platform", ""),
-                    1 if cmd.get("dangerous", False) else 0,
-                    cmd.get("danger_reason", ""),
-                    vec_blob,
-                ),
-            )
-        self.conn.commit()
+        # Release wheels ship the sidecar; a stale or missing one (None, e.g.
+        # in a source checkout) makes add_commands embed the catalog.
+        vectors = load_catalog_vectors(catalog_texts(commands), _fingerprint())
+        self.add_commands(commands, vectors=vectors)
 
     def preload_from_json(self, commands_json: List[Dict[str, Any]]):
-        cursor = self.conn.cursor()
-        for cmd in commands_json:
-            vec_blob = _embed(f"{cmd['command']}\n{cmd['explanation']}\n{cmd.get('category', '')}")
-            cursor.execute(
+        self.add_commands(commands_json)
+
+    def add_commands(
+        self,
+        commands: List[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        vectors: Optional[np.ndarray] = None,
+    ) -> int:
+        """Bulk insert: embeds in batches and writes everything in one transaction.
+
+        ``vectors`` may carry precomputed embeddings aligned with ``commands``.
+        """
+        batch_size = batch_size or config.embed_batch_size
+        if not commands:
+            return 0
+        if vectors is None:
+            vectors = np.stack([
+                _blob_to_vec(blob)
+                for start in range(0, len(commands), batch_size)
+                for blob in _embed_batch(catalog_texts(commands[start:start + batch_size]), batch_size)
+            ])
+        rules = danger_rules([cmd["command"] for cmd in commands])
+        with self._write_transaction() as cursor:
+            slots = self._append_vectors(vectors)
+            cursor.executemany(
                 """
-                INSERT INTO commands (command, explanation, category, platform, dangerous, danger_reason, embedding)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO commands (
+                    command, explanation, category, platform, platform_mask, dangerous, danger_reason,
+                    danger_rules, safety_version, vector_slot
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (
-                    cmd["command"],
-                    cmd["explanation"],
-                    cmd.get("category", ""),
-                    cmd.get("platform", ""),
-                    1 if cmd.get("dangerous", False) else 0,
-                    cmd.get("danger_reason", ""),
-                    vec_blob,
-                ),
+                [
+                    (
+                        cmd["command"],
+                        cmd["explanation"],
+                        cmd.get("category", ""),
+                        cmd.get("platform", ""),
+                        platform_mask(cmd.get("platform", "")),
+                        1 if cmd.get("dangerous", False) else 0,
+                        cmd.get("danger_reason", ""),
+                        cmd_rules,
+                        SAFETY_RULES.version,
+                        int(slot),
+                    )
+                    for cmd, cmd_rules, slot in zip(commands, rules, slots)
+                ],
             )
-        self.conn.commit()
+        self._bump_version()
+        return len(commands)
 
     def add_command(
         self,
@@ -261,52 +724,119 @@ class CommandDatabase:
         dangerous: bool = False,
         danger_reason: str = None,
     ) -> int:
-        cursor = self.conn.cursor()
-        vec_blob = _embed(f"{command}\n{explanation or ''}\n{category or ''}")
-        cursor.execute(
-            """
-            INSERT INTO commands (command, explanation, category, platform, dangerous, danger_reason, embedding)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                command,
-                explanation,
-                category,
-                platform,
-                1 if dangerous else 0,
-                danger_reason,
-                vec_blob,
-            ),
-        )
-        command_id = cursor.lastrowid
-        self.conn.commit()
+        vec = _blob_to_vec(_embed(_command_text(command, explanation, category)))
+        rules = danger_rules([command])[0]
+        with self._write_transaction() as cursor:
+            slot = self._append_vectors(vec)[0]
+            cursor.execute(
+                """
+                INSERT INTO commands (
+                    command, explanation, category, platform, platform_mask, dangerous, danger_reason,
+                    danger_rules, safety_version, vector_slot
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    command,
+                    explanation,
+                    category,
+                    platform,
+                    platform_mask(platform),
+                    1 if dangerous else 0,
+                    danger_reason,
+                    rules,
+                    SAFETY_RULES.version,
+                    int(slot),
+                ),
+            )
+            command_id = cursor.lastrowid
+        self._bump_version()
         return command_id
 
-    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    def search(self, query: str, limit: int = 5, mode: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Rank commands for ``query``.
+
+        ``mode`` is ``"vector"`` (cosine over every row) or ``"hybrid"``
+        (FTS5 bm25 candidates reranked with embeddings); it defaults to
+        SEARCH_MODE from ~/.taczrc. Each row carries its ranking ``score``.
+        """
         query = query.strip()
         if not query:
             return []
         q_vec = _blob_to_vec(_embed(query))
-        q_norm = np.linalg.norm(q_vec)
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT * FROM commands
-            WHERE (platform LIKE ? OR platform IS NULL OR platform = '')
-              AND embedding IS NOT NULL
+        if (mode or config.search_mode) == "hybrid":
+            results = self._hybrid_search(query, q_vec, limit)
+            if results is not None:
+                return results
+        if self._use_ann():
+            return self._ann_search(q_vec, limit)
+        ids, scores = self._get_index().top_k(q_vec, limit)
+        return self._scored_commands(ids, scores)
+
+    def _fts_candidates(self, query: str, limit: int) -> List[tuple]:
+        """Best ``limit`` (id, bm25) pairs for the platform; lower bm25 is better."""
+        tokens = re.findall(r"\w+", query.lower())
+        if not tokens:
+            return []
+        match = " OR ".join(f'"{token}"' for token in dict.fromkeys(tokens))
+        masks = matching_masks(self.current_platform)
+        placeholders = ",".join("?" * len(masks))
+        return self.conn.execute(
+            f"""
+            SELECT c.id, bm25(command_fts) AS rank
+            FROM command_fts JOIN commands c ON c.id = command_fts.rowid
+            WHERE command_fts MATCH ?
+              AND c.platform_mask IN ({placeholders})
+              AND c.vector_slot IS NOT NULL
+            ORDER BY rank LIMIT ?
             """,
-            (f"%{self.current_platform}%",),
+            (match, *masks, limit),
+        ).fetchall()
+
+    def _hybrid_search(self, query: str, q_vec: np.ndarray, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Fuse bm25 and cosine scores over FTS candidates.
+
+        Returns None when FTS finds fewer than ``limit`` candidates so the
+        caller can fall back to a full vector scan.
+        """
+        candidates = self._fts_candidates(query, config.hybrid_candidates)
+        if len(candidates) < limit:
+            return None
+        ids, sims, popularity = self._candidate_similarities(
+            q_vec, np.array([row[0] for row in candidates], dtype=np.int64)
         )
-        rows = [dict(r) for r in cursor.fetchall()]
+        bm25_by_id = {row[0]: -row[1] for row in candidates}
+        lexical = np.array([bm25_by_id[i] for i in ids.tolist()], dtype=np.float32)
+        lexical = lexical / (lexical.max() + 1e-9) if len(lexical) else lexical
+        weight = config.hybrid_weight
+        fused = (weight * sims + (1 - weight) * lexical) * (1 + 0.1 * popularity)
+        top = np.argsort(-fused, kind="stable")[:limit]
+        return self._scored_commands(ids[top], fused[top])
+
+    def _candidate_similarities(self, q_vec: np.ndarray, ids: np.ndarray):
+        """Cosine similarity and popularity for a candidate set: ``(ids, sims, popularity)``.
+
+        Uses the resident index when it is in use; in ANN mode only the
+        candidates' vectors are read so the full matrix is never loaded.
+        """
+        if not self._use_ann():
+            index = self._get_index()
+            positions = index.positions(ids)
+            positions = positions[positions >= 0]
+            return index.ids[positions], index.similarities(q_vec, positions), index.popularity[positions]
+        placeholders = ",".join("?" * len(ids))
+        rows = self.conn.execute(
+            f"SELECT id, vector_slot, popularity FROM commands WHERE id IN ({placeholders}) AND vector_slot IS NOT NULL",
+            ids.tolist(),
+        ).fetchall()
         if not rows:
-            return []
-        mat = np.stack([_blob_to_vec(r["embedding"]) for r in rows])
-        norms = np.linalg.norm(mat, axis=1)
-        sims = (mat @ q_vec) / (norms * q_norm + 1e-9)
-        pops = np.array([r.get("popularity", 0) for r in rows], dtype=np.float32)
-        scores = sims * (1 + 0.1 * pops)
-        top_idx = scores.argsort()[-limit:][::-1]
-        return [rows[i] for i in top_idx if scores[i] > 0.15]
+            empty = np.empty(0, dtype=np.float32)
+            return np.empty(0, dtype=np.int64), empty, empty
+        found_ids, vectors = self._rows_to_arrays(rows)
+        q = q_vec / (np.linalg.norm(q_vec) + 1e-9)
+        sims = vectors @ q
+        popularity = np.array([r[2] or 0 for r in rows], dtype=np.float32)
+        return found_ids, sims, popularity
 
     def record_history(
         self,
@@ -335,27 +865,18 @@ class CommandDatabase:
             (command,),
         )
         self.conn.commit()
+        self._bump_version()
 
     def get_history(self, limit: int = 20) -> List[Dict[str, Any]]:
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT * FROM command_history ORDER BY timestamp DESC LIMIT ?",
-            (limit,),
-        )
-        return [dict(row) for row in cursor.fetchall()]
+        return fetch_history(self.conn, limit)
 
     def search_history(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT * FROM command_history
-            WHERE query LIKE ? OR command LIKE ?
-            ORDER BY timestamp DESC LIMIT ?
-            """,
-            (f"%{query}%", f"%{query}%", limit),
-        )
-        return [dict(row) for row in cursor.fetchall()]
+        return search_history(self.conn, query, limit)
 
     def close(self):
         if self.conn:
+            self._save_ann()
+            self.store.close()
+            if self.compact is not None:
+                self.compact.close()
             self.conn.close()
\ No newline at end of file
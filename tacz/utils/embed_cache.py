@@ -0,0 +1,174 @@
+import hashlib
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+
+from tacz.utils.sqlite_conn import connect
+
+DEFAULT_MAX_ENTRIES = 10000
+# Pending last_used updates written in one statement once this many pile up.
+TOUCH_FLUSH_SIZE = 256
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different spellings share an entry."""
+    return " ".join(text.split())
+
+
+def make_key(text: str, model_name: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent, size-bounded LRU cache of embedding vectors.
+
+    Entries are keyed by a hash of the model name and the normalized text,
+    so switching models never returns stale vectors. Reads don't write:
+    hits only note their ``last_used`` time, and the notes are written with
+    the next put, on close, or once TOUCH_FLUSH_SIZE have accumulated.
+    """
+
+    def __init__(self, path=None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if not path:
+            cache_dir = Path.home() / ".tacz"
+            cache_dir.mkdir(exist_ok=True)
+            path = cache_dir / "embed_cache.db"
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._touched: Dict[str, float] = {}
+        self.conn = connect(path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)"
+        )
+        self.conn.commit()
+        self._count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get(self, text: str, model_name: str) -> Optional[bytes]:
+        key = make_key(text, model_name)
+        row = self.conn.execute(
+            "SELECT vector FROM embeddings WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch([key])
+        return row[0]
+
+    def get_many(self, texts: List[str], model_name: str) -> List[Optional[bytes]]:
+        """Batch lookup; returns vectors aligned with ``texts`` (None for misses)."""
+        keys = [make_key(text, model_name) for text in texts]
+        found: Dict[str, bytes] = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            found.update(rows)
+        self._touch(found)
+        results = [found.get(key) for key in keys]
+        hits = sum(1 for vector in results if vector is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]], model_name: str):
+        """Store several ``(text, vector)`` pairs in one transaction."""
+        if self.max_entries <= 0:
+            return
+        now = time.time()
+        rows = [(make_key(text, model_name), vector, now) for text, vector in items]
+        self._flush_touched()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+            rows,
+        )
+        # Replacements make this an over-estimate; _evict() recounts exactly.
+        self._count += len(rows)
+        if self._count > self.max_entries:
+            self._evict()
+        self.conn.commit()
+
+    def put(self, text: str, model_name: str, vector: bytes):
+        if self.max_entries <= 0:
+            return
+        key = make_key(text, model_name)
+        self._flush_touched()
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+            (key, vector, time.time()),
+        )
+        if cursor.rowcount:
+            self._count += 1
+        else:
+            self.conn.execute(
+                "UPDATE embeddings SET vector = ?, last_used = ? WHERE key = ?",
+                (vector, time.time(), key),
+            )
+        if self._count > self.max_entries:
+            self._evict()
+        self.conn.commit()
+
+    def _touch(self, keys: Iterable[str]):
+        now = time.time()
+        for key in keys:
+            self._touched[key] = now
+        if len(self._touched) >= TOUCH_FLUSH_SIZE:
+            self._flush_touched()
+            self.conn.commit()
+
+    def _flush_touched(self):
+        """Write the pending last_used times; the caller commits."""
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        """Drop the least recently used entries down to ``max_entries``."""
+        self._count = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = self._count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                """
+                DELETE FROM embeddings WHERE key IN (
+                    SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+            self._count -= excess
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": self._count,
+            "max_entries": self.max_entries,
+        }
+
+    def close(self):
+        if self.conn:
+            self._flush_touched()
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,130 @@
+from pathlib import Path
+from typing import List, Union
+
+import numpy as np
+
+EMBED_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+
+BACKEND_SENTENCE_TRANSFORMERS = "sentence-transformers"
+BACKEND_ONNX = "onnx"
+BACKEND_ONNX_INT8 = "onnx-int8"
+BACKENDS = (BACKEND_SENTENCE_TRANSFORMERS, BACKEND_ONNX, BACKEND_ONNX_INT8)
+
+
+def embedding_fingerprint(backend: str, model_name: str = EMBED_MODEL_NAME) -> str:
+    """Identify the vector space a backend produces.
+
+    The fp32 ONNX export computes the same function as the torch model, so
+    both share a fingerprint and existing BLOBs stay valid. Quantized
+    weights shift the vectors, so int8 gets its own fingerprint and forces
+    a re-embed.
+    """
+    if backend == BACKEND_ONNX_INT8:
+        return f"{model_name}+int8"
+    return model_name
+
+
+class SentenceTransformerEmbedder:
+    """Default backend: sentence-transformers on torch, CPU only."""
+
+    def __init__(self, model_name: str = EMBED_MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32, normalize_embeddings: bool = True):
+        return self.model.encode(texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings)
+
+
+class OnnxEmbedder:
+    """bge-small on ONNX Runtime; no torch import.
+
+    Uses CLS pooling like the sentence-transformers config for bge models.
+    Files placed in ``model_dir`` (default ``~/.tacz/models/<model>``) are
+    used as they are; anything missing is read from the Hugging Face hub
+    cache, downloading it once. The int8 variant is produced locally with
+    dynamic quantization and stored in ``model_dir``.
+    """
+
+    max_length = 512
+
+    def __init__(self, model_name: str = EMBED_MODEL_NAME, quantized: bool = False, model_dir=None):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError(
+                "The ONNX embedding backend needs onnxruntime and tokenizers: pip install 'tacz[onnx]'"
+            ) from e
+
+        self.model_name = model_name
+        self.quantized = quantized
+        self.model_dir = Path(model_dir) if model_dir else (
+            Path.home() / ".tacz" / "models" / model_name.replace("/", "__")
+        )
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+
+        model_path = self._ensure_model_file()
+        self.tokenizer = Tokenizer.from_file(str(self._ensure_file("tokenizer.json")))
+        self.tokenizer.enable_truncation(max_length=self.max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _ensure_file(self, filename: str, repo_filename: str = None) -> Path:
+        path = self.model_dir / filename
+        if path.exists():
+            return path
+        from huggingface_hub import hf_hub_download
+
+        # The hub cache already keeps the file; use it in place rather than copying.
+        return Path(hf_hub_download(repo_id=self.model_name, filename=repo_filename or filename))
+
+    def _ensure_model_file(self) -> Path:
+        fp32_path = self._ensure_file("model.onnx", "onnx/model.onnx")
+        if not self.quantized:
+            return fp32_path
+        int8_path = self.model_dir / "model_int8.onnx"
+        if not int8_path.exists():
+            try:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+            except ImportError as e:
+                raise ImportError(
+                    "The onnx-int8 backend quantizes the model with the onnx package: pip install 'tacz[onnx]'"
+                ) from e
+
+            quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        return int8_path
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32, normalize_embeddings: bool = True):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        out = []
+        for start in range(0, len(batch), batch_size):
+            encodings = self.tokenizer.encode_batch(batch[start:start + batch_size])
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            out.append(hidden[:, 0, :].astype(np.float32))
+        vecs = np.concatenate(out) if out else np.empty((0, 0), dtype=np.float32)
+        if normalize_embeddings and len(vecs):
+            vecs = vecs / (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12)
+        return vecs[0] if single else vecs
+
+
+def create_embedder(backend: str, model_name: str = EMBED_MODEL_NAME, model_dir=None):
+    if backend == BACKEND_SENTENCE_TRANSFORMERS:
+        return SentenceTransformerEmbedder(model_name)
+    if backend in (BACKEND_ONNX, BACKEND_ONNX_INT8):
+        return OnnxEmbedder(model_name, quantized=backend == BACKEND_ONNX_INT8, model_dir=model_dir)
+    raise ValueError(f"Unknown embedding backend: {backend}")
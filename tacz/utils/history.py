@@ -0,0 +1,48 @@
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List
+
+from tacz.utils.sqlite_conn import connect
+
+
+def _rows(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def fetch_history(conn: sqlite3.Connection, limit: int = 20) -> List[Dict[str, Any]]:
+    return _rows(conn.execute(
+        "SELECT * FROM command_history ORDER BY timestamp DESC LIMIT ?",
+        (limit,),
+    ))
+
+
+def search_history(conn: sqlite3.Connection, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    return _rows(conn.execute(
+        """
+        SELECT * FROM command_history
+        WHERE query LIKE ? OR command LIKE ?
+        ORDER BY timestamp DESC LIMIT ?
+        """,
+        (f"%{query}%", f"%{query}%", limit),
+    ))
+
+
+def read_history(db_path, query: str = "", limit: int = 20) -> List[Dict[str, Any]]:
+    """History straight from SQLite, for ``tacz --history``.
+
+    Opens the database read-only and skips CommandDatabase entirely, so no
+    migrations run and numpy and the embedding stack are never imported.
+    """
+    if not Path(db_path).exists():
+        return []
+    conn = connect(db_path, read_only=True)
+    try:
+        if query:
+            return search_history(conn, query, limit)
+        return fetch_history(conn, limit)
+    except sqlite3.OperationalError:
+        # A database from before the history table existed.
+        return []
+    finally:
+        conn.close()
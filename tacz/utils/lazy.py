@@ -0,0 +1,36 @@
+import importlib
+from typing import Any, Optional
+
+
+class LazyImport:
+    """Module-level stand-in for a module or one of its attributes.
+
+    The import happens on first attribute access or call, so ``tacz.main``
+    can name rich, questionary and the provider stack at the top of the
+    file (where tests patch them) without paying for them on fast paths.
+    """
+
+    def __init__(self, module: str, attr: Optional[str] = None):
+        self.__dict__["_module"] = module
+        self.__dict__["_attr"] = attr
+        self.__dict__["_target"] = None
+
+    def _load(self) -> Any:
+        target = self.__dict__["_target"]
+        if target is None:
+            target = importlib.import_module(self._module)
+            if self._attr:
+                target = getattr(target, self._attr)
+            self.__dict__["_target"] = target
+        return target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        name = f"{self._module}.{self._attr}" if self._attr else self._module
+        state = "loaded" if self.__dict__["_target"] is not None else "not loaded"
+        return f"<LazyImport {name} ({state})>"
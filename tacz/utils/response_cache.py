@@ -0,0 +1,131 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from tacz.utils.sqlite_conn import connect
+
+DEFAULT_MAX_ENTRIES = 500
+# Pending last_used updates written in one statement once this many pile up.
+TOUCH_FLUSH_SIZE = 64
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, spacing and trailing punctuation don't change the question."""
+    return " ".join(prompt.lower().split()).rstrip("?.! ")
+
+
+def template_version(template: str) -> str:
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:12]
+
+
+def make_key(prompt: str, context: str, model_name: str, prompt_version: str) -> str:
+    digest = hashlib.sha256()
+    for part in (model_name, prompt_version, hashlib.sha256(context.encode("utf-8")).hexdigest(),
+                 normalize_prompt(prompt)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Persistent cache of model replies with a TTL and an LRU size cap.
+
+    Entries are keyed by the normalized prompt, a hash of the environment
+    context, the model name and the prompt template version, so a new
+    model, a changed template or a different machine state never reuse a
+    reply. Entries older than ``ttl_hours`` are treated as misses.
+
+    Hits don't write: their ``last_used`` times are written with the next
+    put, on close, or once TOUCH_FLUSH_SIZE have accumulated.
+    """
+
+    def __init__(self, path=None, ttl_hours: float = 24, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if not path:
+            cache_dir = Path.home() / ".tacz"
+            cache_dir.mkdir(exist_ok=True)
+            path = cache_dir / "response_cache.db"
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._touched: Dict[str, float] = {}
+        self.conn = connect(path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)"
+        )
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        row = self.conn.execute(
+            "SELECT response FROM responses WHERE key = ? AND created_at > ?",
+            (key, now - self.ttl_seconds),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = now
+        if len(self._touched) >= TOUCH_FLUSH_SIZE:
+            self._flush_touched()
+            self.conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, response: Dict[str, Any]):
+        if self.max_entries <= 0:
+            return
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(response), now, now),
+        )
+        self._touched.pop(key, None)
+        self._flush_touched()
+        self._evict(now)
+        self.conn.commit()
+
+    def _flush_touched(self):
+        """Write the pending last_used times; the caller commits."""
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE responses SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the least recently used beyond ``max_entries``."""
+        self.conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl_seconds,))
+        excess = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_used ASC LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "max_entries": self.max_entries}
+
+    def close(self):
+        if self.conn:
+            self._flush_touched()
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
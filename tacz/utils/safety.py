@@ -1,86 +1,334 @@
+import hashlib
 import re
-from typing import Tuple, List
-from tacz.constants import DANGEROUS_PATTERNS
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple, List
+from tacz.constants import SAFETY_RULES
+from tacz.utils.shell_parse import Word, parse_command
+
+RM_COMMANDS = {"rm", "trash"}
+# Commands that run their arguments as another command, with the options of
+# each that take a separate value (so that value isn't read as the command).
+WRAPPER_COMMANDS = {
+    "sudo": {"-u", "-g", "-C", "-D", "-h", "-p", "-r", "-t", "-U", "-R", "--user", "--group",
+             "--close-from", "--chdir", "--host", "--prompt", "--role", "--type", "--other-user",
+             "--chroot"},
+    "doas": {"-u", "-C"},
+    "xargs": {"-I", "-L", "-n", "-P", "-s", "-d", "-E", "-a", "--max-args", "--max-procs",
+              "--max-lines", "--max-chars", "--delimiter", "--arg-file"},
+    "env": {"-u", "-C", "--unset", "--chdir"},
+    "nohup": set(),
+    "time": {"-f", "-o", "--format", "--output"},
+    "nice": {"-n", "--adjustment"},
+    "ionice": {"-c", "-n", "-p"},
+    "timeout": {"-s", "-k", "--signal", "--kill-after"},
+    "stdbuf": {"-i", "-o", "-e"},
+    "command": set(),
+    "builtin": set(),
+    "exec": {"-a"},
+}
+# Positional arguments a wrapper takes before the command ("timeout 5 rm x").
+WRAPPER_POSITIONALS = {"timeout": 1}
+# Commands that run their remaining arguments as a shell script, with value-taking options.
+SCRIPT_COMMANDS = {"eval": set(), "watch": {"-n", "--interval"}}
+SHELL_COMMANDS = {"sh", "bash", "zsh", "dash", "ksh", "fish"}
+# Reserved words and grouping tokens that can precede a command name.
+PREFIX_WORDS = {"{", "(", "!", "if", "then", "do", "else", "elif", "while", "until"}
+FIND_EXEC_ACTIONS = {"-exec", "-execdir", "-ok", "-okdir"}
+# Tools with deleting subcommands ("git rm", "docker rm"): the options each
+# takes with a separate value before the subcommand, and those subcommands.
+RM_SUBCOMMANDS = {
+    "git": ({"-C", "-c", "--git-dir", "--work-tree", "--namespace", "--exec-path"}, {"rm"}),
+    "docker": ({"-H", "-c", "-l", "--host", "--context", "--config", "--log-level"}, {"rm", "rmi"}),
+    "podman": ({"-c", "--connection", "--url", "--root", "--runroot"}, {"rm", "rmi"}),
+    "hg": ({"-R", "--repository", "--cwd", "--config"}, {"rm", "remove"}),
+    "svn": (set(), {"rm", "delete", "del", "remove"}),
+}
+# Object groups between the tool and its subcommand ("docker container rm").
+SUBCOMMAND_GROUPS = {"container", "image", "volume", "network", "pod", "system"}
+# How deep eval / sh -c / substitution scripts are followed before giving up.
+MAX_SCRIPT_DEPTH = 8
+# A word whose whole value is only known at run time: $x, ${x}, $(...) or `...`.
+_DYNAMIC_WORD = re.compile(r"^(\$\w+|\$\{[^}]*\}|\$\(.*\)|`.*`)$", re.DOTALL)
+
+CHAIN_DESCRIPTIONS = [
+    (";", "semicolon (;)"),
+    ("|", "pipe (|)"),
+    ("&&", "logical AND (&&)"),
+    ("||", "logical OR (||)"),
+    ("&", "background (&)"),
+    (">>", "output append (>>)"),
+    (">", "output redirection (>)"),
+    ("<", "input redirection (<)"),
+]
+# Operator spellings reported under one of the kinds above.
+_CHAIN_KIND = {
+    "|&": "|", "&>>": ">>", "&>": ">", ">|": ">", ">&": ">",
+    "<>": "<", "<&": "<", "<<": "<", "<<<": "<", "<<-": "<",
+}
+
+
+class SafetyMatch(NamedTuple):
+    rule_id: str
+    reason: str
+
+
+class SafetyRuleSet:
+    """All safety rules compiled once into a single alternation.
+
+    Every rule becomes a named group of one combined pattern, so a clean
+    command costs one scan. Only when that scan hits are the individual
+    rules tried, starting from the first match, to report every rule that
+    applies rather than just the first.
+    """
+
+    def __init__(self, rules: List[Tuple[str, str, str]]):
+        self.rules = list(rules)
+        self._compiled = [re.compile(pattern, re.IGNORECASE) for _, pattern, _ in self.rules]
+        self._combined = re.compile(
+            "|".join(f"(?P<r{i}>{pattern})" for i, (_, pattern, _) in enumerate(self.rules)),
+            re.IGNORECASE,
+        )
+        digest = hashlib.sha256()
+        for rule_id, pattern, _ in self.rules:
+            digest.update(f"{rule_id}\0{pattern}\0".encode())
+        # Changes whenever a rule is added, removed or edited; stored
+        # classifications made under another version are stale.
+        self.version = digest.hexdigest()[:16]
+        self.reasons = {rule_id: reason for rule_id, _, reason in self.rules}
+
+    def classify(self, command: str) -> List[SafetyMatch]:
+        """Every rule matching ``command``, in rule order."""
+        command = command.strip()
+        m = self._combined.search(command)
+        if m is None:
+            return []
+        first = int(m.lastgroup[1:])
+        # No rule can match before the combined scan's leftmost hit.
+        start = m.start()
+        matches = []
+        for i, (rule_id, _, reason) in enumerate(self.rules):
+            if i == first or self._compiled[i].search(command, start):
+                matches.append(SafetyMatch(rule_id, reason))
+        return matches
+
+    def reason_for(self, rule_ids: Iterable[str]) -> str:
+        """Reason of the first known rule id, as is_dangerous_command reports it."""
+        return next((self.reasons[r] for r in rule_ids if r in self.reasons), "")
+
+    def classify_many(self, commands: Iterable[str]) -> List[List[SafetyMatch]]:
+        return [self.classify(command) for command in commands]
+
+
+RULES = SafetyRuleSet(SAFETY_RULES)
+
+
+def classify_command(command: str) -> List[SafetyMatch]:
+    return RULES.classify(command)
+
+
+def classify_commands(commands: Iterable[str]) -> List[List[SafetyMatch]]:
+    return RULES.classify_many(commands)
 
-RM_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
-    r'(^|\s|;|\||\|\||&&)rm(\s|$)',
-    r'(^|\s|;|\||\|\||&&)find\s+.*\s+-delete',
-    r'(^|\s|;|\||\|\||&&)trash(\s|$)'
-]]
 
 def is_dangerous_command(command: str) -> Tuple[bool, str]:
-    command_clean = command.strip()
-    
-    for pattern, reason in DANGEROUS_PATTERNS:
-        if re.search(pattern, command_clean, re.IGNORECASE):
-            return True, reason
-    
-    if _contains_destructive_intent(command_clean):
-        return True, "Command appears to have destructive intent"
-    
+    matches = RULES.classify(command)
+    if matches:
+        return True, matches[0].reason
     return False, ""
 
-def is_rm_command(command: str) -> bool:
-    for pattern in RM_PATTERNS:
-        if pattern.search(command):
+
+def row_danger(row: Dict[str, Any]) -> Tuple[bool, str]:
+    """Danger flag and reason for a ``commands`` row.
+
+    Reads the stored classification; a row classified under another rule
+    set (or inserted by an older tacz) is classified on the spot.
+    """
+    if row.get("safety_version") == RULES.version:
+        rule_ids = [r for r in (row.get("danger_rules") or "").split(",") if r]
+    else:
+        rule_ids = [m.rule_id for m in classify_command(row["command"])]
+    reason = row.get("danger_reason") or RULES.reason_for(rule_ids)
+    return bool(row.get("dangerous")) or bool(rule_ids), reason
+
+def _base_name(word: str) -> str:
+    return word.rsplit("/", 1)[-1]
+
+
+def _is_dynamic(word: Word) -> bool:
+    return bool(_DYNAMIC_WORD.match(word.raw.strip('"')))
+
+
+def _skip_options(words: Sequence[Word], i: int, takes_value) -> int:
+    """Index of the first word after the options starting at ``i``."""
+    while i < len(words):
+        value = words[i].value
+        if value == "--":
+            return i + 1
+        if not value.startswith("-") or value == "-":
+            return i
+        if value.startswith("--"):
+            # "--user root" takes the next word; "--user=root" is one word.
+            i += 2 if value in takes_value else 1
+            continue
+        # In a cluster like "-nu root", a value-taking option uses the rest
+        # of the word, or the next word when it comes last.
+        for k, ch in enumerate(value[1:], 1):
+            if "-" + ch in takes_value:
+                i += 2 if k == len(value) - 1 else 1
+                break
+        else:
+            i += 1
+    return i
+
+
+def _command_words(words: Sequence[Word]) -> List[Word]:
+    """argv from the word that actually runs.
+
+    Skips variable assignments, reserved words and grouping tokens, function
+    definitions and wrappers such as sudo, along with the wrappers' options.
+    """
+    words = list(words)
+    i = 0
+    while i < len(words):
+        word = words[i]
+        value = word.value
+        if "=" in value and value.split("=", 1)[0].isidentifier():
+            i += 1
+        elif value in PREFIX_WORDS or value.endswith("()"):
+            i += 1
+        elif value.startswith("(") and not _is_dynamic(word):
+            # "(rm x)": the subshell's parenthesis is glued to the name.
+            words[i] = Word(word.raw[1:], value[1:], word.start + 1, word.end)
+        elif _base_name(value) in WRAPPER_COMMANDS:
+            name = _base_name(value)
+            i = _skip_options(words, i + 1, WRAPPER_COMMANDS[name]) + WRAPPER_POSITIONALS.get(name, 0)
+        else:
+            break
+    return words[i:]
+
+
+def _shell_script(words: Sequence[Word]) -> Optional[Word]:
+    """The script given to ``sh -c`` (or ``bash -lc``, ``zsh -o x -c`` ...)."""
+    i = 1
+    while i < len(words):
+        value = words[i].value
+        if value in ("-o", "+o", "-O", "+O", "--rcfile", "--init-file"):
+            i += 2
+        elif value.startswith("--"):
+            i += 1
+        elif len(value) > 1 and value[0] in "-+":
+            if "c" in value[1:]:
+                return words[i + 1] if i + 1 < len(words) else None
+            i += 1
+        else:
+            return None
+    return None
+
+
+def _subcommand_runs_rm(name: str, words: Sequence[Word]) -> bool:
+    takes_value, deleting = RM_SUBCOMMANDS[name]
+    i = _skip_options(words, 1, takes_value)
+    while i < len(words) and words[i].value in SUBCOMMAND_GROUPS:
+        i = _skip_options(words, i + 1, set())
+    if i >= len(words):
+        return False
+    if _is_dynamic(words[i]):
+        return True
+    if words[i].value not in deleting:
+        return False
+    # "git rm --cached" only unstages; the files stay on disk.
+    return not (name == "git" and any(w.value == "--cached" for w in words[i + 1:]))
+
+
+def _runs_rm(words: Sequence[Word], depth: int) -> bool:
+    words = _command_words(words)
+    if not words:
+        return False
+    if _is_dynamic(words[0]):
+        return True
+    name = _base_name(words[0].value)
+    if name in RM_COMMANDS:
+        return True
+    if name == "find":
+        values = [w.value for w in words]
+        if "-delete" in values:
+            return True
+        return any(
+            value in FIND_EXEC_ACTIONS and _runs_rm(words[i + 1:], depth)
+            for i, value in enumerate(values)
+        )
+    if name in SCRIPT_COMMANDS:
+        rest = words[_skip_options(words, 1, SCRIPT_COMMANDS[name]):]
+        if any(_is_dynamic(w) for w in rest):
             return True
+        return _script_runs_rm(" ".join(w.value for w in rest), depth + 1)
+    if name in SHELL_COMMANDS:
+        script = _shell_script(words)
+        if script is None:
+            return False
+        return _is_dynamic(script) or _script_runs_rm(script.value, depth + 1)
+    if name in RM_SUBCOMMANDS:
+        return _subcommand_runs_rm(name, words)
     return False
- 
+
+
+def _script_runs_rm(source: str, depth: int) -> bool:
+    if depth > MAX_SCRIPT_DEPTH:
+        return True
+    parsed = parse_command(source)
+    if not parsed.complete:
+        return True
+    return (
+        any(_runs_rm(cmd.argv, depth) for cmd in parsed.commands)
+        or any(_script_runs_rm(sub.body, depth + 1) for sub in parsed.substitutions)
+    )
+
+
+def is_rm_command(command: str) -> bool:
+    """True when running ``command`` may delete files.
+
+    Follows pipelines and lists, reserved words and braces (``then rm``,
+    ``{ rm x; }``), wrappers with their options (``sudo -u root rm``), tool
+    subcommands (``git rm``, ``docker image rm``), and the scripts run by
+    eval, watch, ``sh -c`` and command substitutions.
+    When the line can't be read with confidence (an unclosed quote, or a
+    command known only at run time such as ``$cmd`` or ``eval "$x"``) the
+    answer is True, so the deletion confirmation is asked rather than
+    skipped.
+    """
+    return _script_runs_rm(command, 0)
+
+
+def _chains(source: str) -> bool:
+    """True when ``source`` runs more than one command, substitutions included."""
+    parsed = parse_command(source)
+    return bool(parsed.operators) or any(_chains(sub.body) for sub in parsed.substitutions)
+
+
 def has_command_chaining(command: str) -> Tuple[bool, List[str]]:
-    """Detect chaining operators, ignoring anything inside quotes."""
-    # strip single- and double-quoted substrings
-    def _strip_strings(text: str) -> str:
-        out, in_s, in_d = [], False, False
-        for ch in text:
-            if ch == "'" and not in_d:
-                in_s = not in_s
-                continue
-            if ch == '"' and not in_s:
-                in_d = not in_d
-                continue
-            if not in_s and not in_d:
-                out.append(ch)
-        return "".join(out)
-
-    cleaned = _strip_strings(command)
-
-    chain_patterns = [
-        (r';', "semicolon (;)"),
-        (r'(?<!\|)\|(?!\|)', "pipe (|)"),
-        (r'&&', "logical AND (&&)"),
-        (r'\|\|', "logical OR (||)"),
-        (r'>>', "output append (>>)"),
-        (r'>(?!=)', "output redirection (>)"),
-        (r'<', "input redirection (<)"),
-    ]
-
-    found = [desc for pat, desc in chain_patterns if re.search(pat, cleaned)]
+    """Detect chaining operators and redirections, ignoring anything inside quotes."""
+    kinds = set()
+    sources = [command]
+    while sources:
+        # Operators inside $(...) and backticks run too.
+        parsed = parse_command(sources.pop())
+        kinds.update(_CHAIN_KIND.get(op.op, op.op) for op in parsed.operators)
+        kinds.update(_CHAIN_KIND.get(r.op, r.op) for r in parsed.redirects)
+        sources.extend(sub.body for sub in parsed.substitutions)
+    found = [desc for kind, desc in CHAIN_DESCRIPTIONS if kind in kinds]
     return bool(found), found
 
-def _contains_destructive_intent(command: str) -> bool:
-    """Check for potentially destructive patterns not caught by regex"""
-    destructive_indicators = [
-        "format",
-        "erase",
-        "wipe",
-        "destroy",
-        "delete all",
-        "remove all",
-    ]
-    
-    command_lower = command.lower()
-    for indicator in destructive_indicators:
-        if indicator in command_lower:
-            return True
-    
-    return False
-
 def sanitize_command(command: str) -> str:
     """Sanitize command by removing potentially dangerous elements"""
-    command = re.sub(r'(?<!\\)[;&|].*$', '', command)
-    
+    parsed = parse_command(command)
+    # Keep only what runs before the first chaining operator, or before a
+    # command substitution that chains commands of its own.
+    cuts = [op.start for op in parsed.operators[:1]]
+    cuts += [sub.start for sub in parsed.substitutions if _chains(sub.body)][:1]
+    if cuts:
+        command = command[:min(cuts)]
+
     command = re.sub(r'\*{2,}', '*', command)
-    
+
     return command.strip()
 
 class CommandValidator:
@@ -0,0 +1,320 @@
+"""A small POSIX shell parser shared by the safety checks and the breakdown view.
+
+``parse_command`` splits a command line once into pipelines of simple
+commands, with their argv, redirections and the control operators between
+them. Quoting, backslash escapes, ``$(...)`` and backticks are honoured, so
+an operator inside a string is never mistaken for a real one. The bodies of
+command substitutions are reported separately, for callers to parse in
+turn, and a line with an unclosed quote or substitution is marked
+incomplete. Results are cached, as the same command is usually inspected
+several times in a row.
+
+It is not a full shell grammar: compound commands (``if``, ``for``,
+subshells) are split at their operators but not interpreted, so their
+reserved words and braces show up as ordinary words. Here-document bodies
+and aliases are not interpreted either.
+"""
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+# Longest first, so "&&" wins over "&" and "|&" over "|".
+CONTROL_OPERATORS = ("&&", "||", "|&", ";", "|", "&")
+REDIRECT_OPERATORS = ("&>>", "<<<", "<<-", "<<", ">>", "<&", ">&", "<>", ">|", "&>", "<", ">")
+PIPE_OPERATORS = ("|", "|&")
+
+_BLANK = " \t"
+_WORD_BREAK = " \t\n;&|<>"
+
+
+class Word(NamedTuple):
+    raw: str
+    value: str  # quotes and escapes removed; substitutions are kept verbatim
+    start: int
+    end: int
+
+
+class Redirect(NamedTuple):
+    op: str
+    fd: Optional[str]
+    target: Optional[Word]
+    start: int
+    end: int
+
+
+class SimpleCommand(NamedTuple):
+    argv: Tuple[Word, ...]
+    redirects: Tuple[Redirect, ...]
+    start: int
+    end: int
+
+    @property
+    def name(self) -> str:
+        return self.argv[0].value if self.argv else ""
+
+    @property
+    def args(self) -> Tuple[str, ...]:
+        return tuple(word.value for word in self.argv[1:])
+
+
+class Operator(NamedTuple):
+    op: str
+    start: int
+    end: int
+
+
+class Pipeline(NamedTuple):
+    commands: Tuple[SimpleCommand, ...]
+
+
+class Substitution(NamedTuple):
+    body: str  # the command run by ``$(...)`` or backticks
+    start: int
+    end: int
+
+
+class ParsedCommand(NamedTuple):
+    source: str
+    pipelines: Tuple[Pipeline, ...]
+    operators: Tuple[Operator, ...]  # every control operator, pipes included, in order
+    substitutions: Tuple[Substitution, ...] = ()  # outermost only; parse a body for nested ones
+    complete: bool = True  # False when a quote or substitution is never closed
+
+    @property
+    def commands(self) -> Tuple[SimpleCommand, ...]:
+        return tuple(cmd for pipeline in self.pipelines for cmd in pipeline.commands)
+
+    @property
+    def redirects(self) -> Tuple[Redirect, ...]:
+        return tuple(r for cmd in self.commands for r in cmd.redirects)
+
+    @property
+    def is_compound(self) -> bool:
+        """True when the line runs more than one command."""
+        return len(self.commands) > 1
+
+
+def _match(source: str, i: int, candidates: Tuple[str, ...]) -> Optional[str]:
+    for op in candidates:
+        if source.startswith(op, i):
+            return op
+    return None
+
+
+# The _skip_* helpers return the index just past the quoted string or
+# substitution opening at ``i``, or UNCLOSED when the source ends first.
+UNCLOSED = -1
+
+
+def _skip_single(source: str, i: int) -> int:
+    end = source.find("'", i + 1)
+    return UNCLOSED if end < 0 else end + 1
+
+
+def _skip_backtick(source: str, i: int) -> int:
+    j = i + 1
+    while j < len(source):
+        if source[j] == "\\":
+            j += 2
+            continue
+        if source[j] == "`":
+            return j + 1
+        j += 1
+    return UNCLOSED
+
+
+def _skip_double(source: str, i: int) -> int:
+    j = i + 1
+    while j < len(source):
+        c = source[j]
+        if c == "\\":
+            j += 2
+        elif c == '"':
+            return j + 1
+        elif c == "`":
+            j = _skip_backtick(source, j)
+        elif source.startswith("$(", j):
+            j = _skip_dollar_paren(source, j)
+        else:
+            j += 1
+        if j == UNCLOSED:
+            return UNCLOSED
+    return UNCLOSED
+
+
+def _skip_dollar_paren(source: str, i: int) -> int:
+    """Allows nesting and quotes inside the ``$(...)``."""
+    depth, j = 0, i + 1
+    while j < len(source):
+        c = source[j]
+        if c == "\\":
+            j += 2
+            continue
+        if c in "'\"`":
+            j = {"'": _skip_single, '"': _skip_double, "`": _skip_backtick}[c](source, j)
+            if j == UNCLOSED:
+                return UNCLOSED
+            continue
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth == 0:
+                return j + 1
+        j += 1
+    return UNCLOSED
+
+
+def _unquote_double(text: str) -> str:
+    out, j = [], 0
+    while j < len(text):
+        c = text[j]
+        if c == "\\" and j + 1 < len(text) and text[j + 1] in '$`"\\\n':
+            if text[j + 1] != "\n":
+                out.append(text[j + 1])
+            j += 2
+            continue
+        out.append(c)
+        j += 1
+    return "".join(out)
+
+
+def _read_word(source: str, i: int) -> Tuple[Word, int]:
+    start, value = i, []
+    while i < len(source) and source[i] not in _WORD_BREAK:
+        c = source[i]
+        if c == "\\":
+            if source.startswith("\\\n", i):
+                i += 2  # line continuation
+                continue
+            value.append(source[i + 1:i + 2])
+            i += 2
+        elif c == "'":
+            end = _skip_single(source, i)
+            value.append(source[i + 1:end - 1] if end != UNCLOSED else source[i + 1:])
+            i = end if end != UNCLOSED else len(source)
+        elif c == '"':
+            end = _skip_double(source, i)
+            value.append(_unquote_double(source[i + 1:end - 1] if end != UNCLOSED else source[i + 1:]))
+            i = end if end != UNCLOSED else len(source)
+        elif c == "`" or source.startswith("$(", i):
+            end = (_skip_backtick if c == "`" else _skip_dollar_paren)(source, i)
+            end = end if end != UNCLOSED else len(source)
+            value.append(source[i:end])
+            i = end
+        else:
+            value.append(c)
+            i += 1
+    return Word(source[start:i], "".join(value), start, i), i
+
+
+def _scan_substitutions(source: str) -> Tuple[Tuple[Substitution, ...], bool]:
+    """The outermost command substitutions, and whether every quote is closed."""
+    found, i, in_double = [], 0, False
+    while i < len(source):
+        c = source[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "#" and not in_double and (i == 0 or source[i - 1] in " \t\n;&|("):
+            end = source.find("\n", i)
+            i = len(source) if end < 0 else end
+            continue
+        if c == "'" and not in_double:
+            end = _skip_single(source, i)
+        elif c == "`" or source.startswith("$(", i):
+            end = (_skip_backtick if c == "`" else _skip_dollar_paren)(source, i)
+            if end != UNCLOSED:
+                found.append(Substitution(source[i + (1 if c == "`" else 2):end - 1], i, end))
+        else:
+            if c == '"':
+                in_double = not in_double
+            i += 1
+            continue
+        if end == UNCLOSED:
+            return tuple(found), False
+        i = end
+    return tuple(found), not in_double
+
+
+def _tokenize(source: str):
+    """Yield ``("word", Word)``, ``("redirect", (op, fd, start, end))`` and ``("op", Operator)``."""
+    i = 0
+    while i < len(source):
+        c = source[i]
+        if c in _BLANK:
+            i += 1
+            continue
+        if c == "\n":
+            yield "op", Operator(";", i, i + 1)
+            i += 1
+            continue
+        if c == "#":
+            end = source.find("\n", i)
+            i = len(source) if end < 0 else end
+            continue
+        redirect = _match(source, i, REDIRECT_OPERATORS)
+        if redirect:
+            yield "redirect", (redirect, None, i, i + len(redirect))
+            i += len(redirect)
+            continue
+        op = _match(source, i, CONTROL_OPERATORS)
+        if op:
+            yield "op", Operator(op, i, i + len(op))
+            i += len(op)
+            continue
+        word, i = _read_word(source, i)
+        # An all-digit word glued to a redirection is its file descriptor ("2>&1").
+        redirect = _match(source, i, REDIRECT_OPERATORS) if word.raw.isdigit() else None
+        if redirect and redirect[0] in "<>":
+            yield "redirect", (redirect, word.raw, word.start, i + len(redirect))
+            i += len(redirect)
+            continue
+        yield "word", word
+
+
+@lru_cache(maxsize=256)
+def parse_command(source: str) -> ParsedCommand:
+    pipelines, operators = [], []
+    pipeline, argv, redirects = [], [], []
+    pending = None
+
+    def finish_command():
+        nonlocal argv, redirects, pending
+        if pending is not None:
+            redirects.append(Redirect(pending[0], pending[1], None, pending[2], pending[3]))
+            pending = None
+        if argv or redirects:
+            items = argv + redirects
+            pipeline.append(SimpleCommand(
+                tuple(argv), tuple(redirects),
+                min(item.start for item in items), max(item.end for item in items),
+            ))
+        argv, redirects = [], []
+
+    def finish_pipeline():
+        nonlocal pipeline
+        if pipeline:
+            pipelines.append(Pipeline(tuple(pipeline)))
+        pipeline = []
+
+    for kind, token in _tokenize(source):
+        if kind == "word":
+            if pending is not None:
+                op, fd, start, _ = pending
+                redirects.append(Redirect(op, fd, token, start, token.end))
+                pending = None
+            else:
+                argv.append(token)
+        elif kind == "redirect":
+            if pending is not None:
+                redirects.append(Redirect(pending[0], pending[1], None, pending[2], pending[3]))
+            pending = token
+        else:
+            operators.append(token)
+            finish_command()
+            if token.op not in PIPE_OPERATORS:
+                finish_pipeline()
+    finish_command()
+    finish_pipeline()
+    substitutions, complete = _scan_substitutions(source)
+    return ParsedCommand(source, tuple(pipelines), tuple(operators), substitutions, complete)
@@ -0,0 +1,42 @@
+import sqlite3
+from pathlib import Path
+
+from tacz.config import config
+
+
+def apply_profile(conn: sqlite3.Connection, read_only: bool = False):
+    """Apply the SQLITE_* settings from ~/.taczrc to an open connection.
+
+    WAL lets readers (other tacz processes, the daemon) run alongside a
+    writer, and with synchronous=NORMAL a commit no longer waits for an
+    fsync. The journal mode is a property of the database file, so
+    read-only connections leave it alone.
+    """
+    conn.execute(f"PRAGMA busy_timeout = {config.sqlite_busy_timeout_ms}")
+    if not read_only:
+        conn.execute(f"PRAGMA journal_mode = {config.sqlite_journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {config.sqlite_synchronous}")
+    conn.execute(f"PRAGMA mmap_size = {config.sqlite_mmap_size}")
+    # A negative cache_size is in KiB rather than pages.
+    conn.execute(f"PRAGMA cache_size = -{config.sqlite_cache_kib}")
+    conn.execute(f"PRAGMA temp_store = {config.sqlite_temp_store}")
+
+
+def connect(database, read_only: bool = False) -> sqlite3.Connection:
+    """Open a tacz database with the configured connection profile.
+
+    ``read_only`` opens the file through a ``mode=ro`` URI; ``database``
+    must then be a path.
+    """
+    if read_only:
+        target, uri = f"{Path(database).as_uri()}?mode=ro", True
+    else:
+        target, uri = str(database), False
+    conn = sqlite3.connect(
+        target,
+        uri=uri,
+        timeout=config.sqlite_busy_timeout_ms / 1000,
+        cached_statements=config.sqlite_cached_statements,
+    )
+    apply_profile(conn, read_only=read_only)
+    return conn
@@ -0,0 +1,84 @@
+"""Import-time profiling for ``tacz --profile-startup`` and the import budget test.
+
+The profiled command runs in a fresh interpreter under ``-X importtime``
+with a throwaway HOME, so it never touches the user's config or database.
+"""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+# What `tacz --version` executes, minus the console-script wrapper.
+VERSION_PATH_CODE = "import sys; sys.argv = ['tacz', '--version']; from tacz.main import app; app()"
+
+# Default ceiling for the --version path's imports; TACZ_IMPORT_BUDGET_MS overrides it.
+IMPORT_BUDGET_MS = 250
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def import_budget_ms() -> float:
+    try:
+        return float(os.environ.get("TACZ_IMPORT_BUDGET_MS", IMPORT_BUDGET_MS))
+    except ValueError:
+        return IMPORT_BUDGET_MS
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    records = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return records
+
+
+def profile_imports(code: str = VERSION_PATH_CODE) -> List[ImportRecord]:
+    """Run ``code`` under ``-X importtime`` and return the records it caused.
+
+    Interpreter start-up imports (site, encodings, ...) are dropped: only
+    imports from the first ``tacz`` module onwards are kept.
+    """
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / ".taczrc").write_text("")
+        env = {**os.environ, "HOME": home, "USERPROFILE": home}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True, text=True, env=env,
+        )
+    records = parse_importtime(result.stderr)
+    # -X importtime prints children before their parent, so a top-level tacz
+    # record closes the block of imports it triggered.
+    first = next((i for i, r in enumerate(records) if r.depth == 0 and r.module.startswith("tacz")), None)
+    if first is None:
+        return []
+    start = first
+    while start > 0 and records[start - 1].depth > 0:
+        start -= 1
+    return records[start:]
+
+
+def total_ms(records: List[ImportRecord]) -> float:
+    return sum(r.cumulative_us for r in records if r.depth == 0) / 1000
+
+
+def format_report(records: List[ImportRecord], top: Optional[int] = 30) -> str:
+    lines = [f"Startup imports: {total_ms(records):.1f} ms (budget {import_budget_ms():.0f} ms)", ""]
+    lines.append(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    ranked = sorted(records, key=lambda r: r.cumulative_us, reverse=True)
+    for r in ranked[:top] if top else ranked:
+        lines.append(f"{r.cumulative_us / 1000:>14.1f} {r.self_us / 1000:>9.1f}  {'  ' * r.depth}{r.module}")
+    return "\n".join(lines)
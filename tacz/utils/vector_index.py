@@ -0,0 +1,104 @@
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+# Quantized scans keep this many candidates per requested result for the
+# float32 rescoring pass, and never fewer than RESCORE_MIN.
+RESCORE_FACTOR = 4
+RESCORE_MIN = 32
+_SCAN_CHUNK = 8192
+
+
+class VectorIndex:
+    """Resident, pre-normalized embedding matrix for one platform's commands.
+
+    Rows of ``matrix`` are unit length and aligned with ``ids`` and
+    ``popularity``, so a query costs one matvec plus a top-k selection.
+
+    ``matrix`` may also be a compact float16 or int8 copy (int8 rows are
+    multiplied by ``scales``). The scan then runs over the compact form and
+    ``exact(positions)`` supplies float32 rows to rescore the best candidates.
+
+    With ``slots``, row ``i`` lives at ``matrix[slots[i]]``: ``matrix`` is a
+    whole memory-mapped vector file, scanned in blocks, so its pages stay
+    shared with other processes instead of being gathered into a copy.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        matrix: np.ndarray,
+        popularity: np.ndarray,
+        scales: Optional[np.ndarray] = None,
+        exact: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        slots: Optional[np.ndarray] = None,
+    ):
+        self.ids = ids
+        self.matrix = matrix
+        self.popularity = popularity
+        self.scales = scales
+        self.exact = exact
+        self.slots = slots
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def quantized(self) -> bool:
+        return self.matrix.dtype != np.float32
+
+    def _approx_sims(self, q: np.ndarray) -> np.ndarray:
+        if not self.quantized and self.slots is None:
+            return self.matrix @ q
+        if self.slots is None:
+            stop = len(self.matrix)
+        else:
+            stop = int(self.slots.max()) + 1 if len(self.slots) else 0
+        # Widen a cache-sized block at a time; the full matrix stays compact.
+        sims = np.empty(stop, dtype=np.float32)
+        for start in range(0, stop, _SCAN_CHUNK):
+            block = self.matrix[start:min(start + _SCAN_CHUNK, stop)].astype(np.float32, copy=False)
+            sims[start:start + len(block)] = block @ q
+        if self.scales is not None:
+            sims *= self.scales[:stop]
+        return sims if self.slots is None else sims[self.slots]
+
+    def scores(self, q_vec: np.ndarray) -> np.ndarray:
+        q = q_vec / (np.linalg.norm(q_vec) + 1e-9)
+        sims = self._approx_sims(q.astype(np.float32))
+        return sims * (1 + 0.1 * self.popularity)
+
+    def positions(self, ids) -> np.ndarray:
+        """Row positions of ``ids`` (-1 where absent); ``self.ids`` is sorted."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(ids), -1, dtype=np.int64)
+        pos = np.searchsorted(self.ids, ids)
+        pos[pos >= len(self.ids)] = 0
+        return np.where(self.ids[pos] == ids, pos, -1)
+
+    def similarities(self, q_vec: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against a subset of rows, at full precision."""
+        q = (q_vec / (np.linalg.norm(q_vec) + 1e-9)).astype(np.float32)
+        if self.exact is not None:
+            return self.exact(positions) @ q
+        rows = positions if self.slots is None else self.slots[positions]
+        sims = self.matrix[rows].astype(np.float32) @ q
+        return sims * self.scales[rows] if self.scales is not None else sims
+
+    def top_k(self, q_vec: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the ids and scores of the ``k`` best rows, best first."""
+        if not len(self) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self.scores(q_vec)
+        rescore = self.quantized and self.exact is not None
+        keep = max(k * RESCORE_FACTOR, RESCORE_MIN) if rescore else k
+        if keep < len(scores):
+            top = np.argpartition(-scores, keep - 1)[:keep]
+        else:
+            top = np.arange(len(scores))
+        top_scores = scores[top]
+        if rescore:
+            top_scores = self.similarities(q_vec, top) * (1 + 0.1 * self.popularity[top])
+        order = np.argsort(-top_scores, kind="stable")[:k]
+        return self.ids[top[order]], top_scores[order]
@@ -0,0 +1,200 @@
+import os
+import struct
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"TACZVEC1"
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<8sII")
+
+FORMAT_FLOAT32 = "float32"
+FORMAT_FLOAT16 = "float16"
+FORMAT_INT8 = "int8"
+# Stored in the header's format field.
+FORMATS = {FORMAT_FLOAT32: 0, FORMAT_FLOAT16: 1, FORMAT_INT8: 2}
+
+
+def row_dtype(fmt: str, dim: int) -> np.dtype:
+    """On-disk layout of one vector; int8 rows carry their own float32 scale."""
+    if fmt == FORMAT_INT8:
+        return np.dtype([("scale", "<f4"), ("codes", "i1", (dim,))])
+    return np.dtype(("<f2" if fmt == FORMAT_FLOAT16 else "<f4", (dim,)))
+
+
+def quantize(vectors: np.ndarray, fmt: str) -> np.ndarray:
+    """Encode float32 rows as ``fmt``, one record per row."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if fmt == FORMAT_FLOAT32:
+        return vectors
+    if fmt == FORMAT_FLOAT16:
+        return vectors.astype(np.float16)
+    out = np.empty(len(vectors), dtype=row_dtype(fmt, vectors.shape[1]))
+    scale = np.abs(vectors).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    out["scale"] = scale
+    out["codes"] = np.clip(np.rint(vectors / scale[:, None]), -127, 127)
+    return out
+
+
+def _contiguous(slots: np.ndarray) -> bool:
+    return len(slots) > 0 and bool((np.diff(slots) == 1).all())
+
+
+class VectorStore:
+    """Append-only file of unit-length vectors, read through ``np.memmap``.
+
+    ``commands.vector_slot`` holds each row's position in the file. Slots are
+    never rewritten, so any number of processes can map the file and share
+    its pages; appends must happen under the database write lock, which is
+    what serializes slot assignment between writers.
+
+    Layout: a 64-byte header (magic, dimension, format) followed by one
+    fixed-size row per slot, see :func:`row_dtype`.
+    """
+
+    def __init__(self, path, fmt: str = FORMAT_FLOAT32):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown vector format: {fmt}")
+        self.path = Path(path)
+        self.fmt = fmt
+        self.dim: Optional[int] = None
+        self._map: Optional[np.memmap] = None
+        self._map_key = None
+        self._dirty = False
+
+    def _read_header(self) -> Optional[int]:
+        try:
+            with open(self.path, "rb") as f:
+                magic, dim, fmt_code = _HEADER.unpack(f.read(_HEADER.size))
+        except (OSError, struct.error):
+            return None
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a tacz vector file")
+        if fmt_code != FORMATS[self.fmt]:
+            raise ValueError(f"{self.path} does not hold {self.fmt} vectors")
+        return dim
+
+    def _row_bytes(self) -> int:
+        return row_dtype(self.fmt, self.dim).itemsize
+
+    def _matrix(self) -> Optional[np.memmap]:
+        """Current mapping, refreshed when another process appended or reset the file."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._map = self._map_key = None
+            return None
+        key = (st.st_ino, st.st_size)
+        if key != self._map_key:
+            self.dim = self._read_header()
+            rows = (st.st_size - HEADER_SIZE) // self._row_bytes() if self.dim else 0
+            self._map = np.memmap(
+                self.path, dtype=row_dtype(self.fmt, self.dim), mode="r", offset=HEADER_SIZE, shape=(rows,)
+            ) if rows else None
+            self._map_key = key
+        return self._map
+
+    def __len__(self) -> int:
+        matrix = self._matrix()
+        return 0 if matrix is None else len(matrix)
+
+    def take(self, slots) -> np.ndarray:
+        """Rows for ``slots``, in order; a single gather straight from the mapping.
+
+        float32 and float16 stores return a ``(n, dim)`` array, int8 stores a
+        record array with ``scale`` and ``codes`` fields. A contiguous,
+        ascending run of slots comes back as a view of the mapping; any other
+        selection is a private copy.
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        matrix = self._matrix()
+        if matrix is None:
+            if len(slots):
+                raise IndexError("vector file is empty")
+            return np.empty(0, dtype=row_dtype(self.fmt, self.dim or 0))
+        if _contiguous(slots):
+            if slots[-1] >= len(matrix):
+                raise IndexError(f"slot {slots[-1]} is past the end of the vector file")
+            return matrix[slots[0]:slots[-1] + 1]
+        return matrix[slots]
+
+    def select(self, slots) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Rows for ``slots`` without copying any vectors out of the mapping.
+
+        Returns ``(rows, None)`` when :meth:`take` can hand back a view, and
+        otherwise ``(mapping, slots)``: the whole file, to be scanned in
+        blocks and indexed by ``slots`` (see ``VectorIndex``).
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        matrix = self._matrix()
+        if matrix is None or not len(slots) or _contiguous(slots):
+            return self.take(slots), None
+        if slots.max() >= len(matrix):
+            raise IndexError(f"slot {slots.max()} is past the end of the vector file")
+        return matrix, slots
+
+    def append(self, vectors: np.ndarray) -> np.ndarray:
+        """Normalize and append ``vectors``; returns their slots.
+
+        The caller must hold the database write lock (BEGIN IMMEDIATE),
+        and call :meth:`sync` before committing.
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if not len(vectors):
+            return np.empty(0, dtype=np.int64)
+        self._ensure_file(vectors.shape[1])
+        size = self.path.stat().st_size
+        # Round up past any torn write left by a crashed appender.
+        first = -(-(size - HEADER_SIZE) // self._row_bytes())
+        self.write(first, vectors)
+        return np.arange(first, first + len(vectors), dtype=np.int64)
+
+    def write(self, first_slot: int, vectors: np.ndarray):
+        """Write ``vectors`` at consecutive slots from ``first_slot``.
+
+        Used to keep a compact copy slot-aligned with the float32 store.
+        Nothing is fsynced here; see :meth:`sync`.
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if not len(vectors):
+            return
+        vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-9)
+        self._ensure_file(vectors.shape[1])
+        with open(self.path, "r+b") as f:
+            f.seek(HEADER_SIZE + first_slot * self._row_bytes())
+            f.write(np.ascontiguousarray(quantize(vectors, self.fmt)).tobytes())
+        self._dirty = True
+
+    def sync(self):
+        """fsync everything written since the last sync, once for the whole batch."""
+        if not self._dirty:
+            return
+        with open(self.path, "rb") as f:
+            os.fsync(f.fileno())
+        self._dirty = False
+
+    def _ensure_file(self, dim: int):
+        stored = self._read_header()
+        if stored is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, dim, FORMATS[self.fmt]).ljust(HEADER_SIZE, b"\0"))
+            stored = dim
+        if dim != stored:
+            raise ValueError(f"vector dimension {dim} does not match store dimension {stored}")
+        self.dim = dim
+
+    def reset(self):
+        """Start a new, empty file. Processes still mapping the old one keep its inode."""
+        self.close()
+        self._dirty = False
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        self.dim = None
+
+    def close(self):
+        self._map = self._map_key = None
@@ -11,6 +11,21 @@ def temp_dir():
     with tempfile.TemporaryDirectory() as tmpdirname:
         yield Path(tmpdirname)
 
+@pytest.fixture(autouse=True)
+def isolated_embed_cache(monkeypatch, tmp_path):
+    """Keep the embedding cache out of the real ~/.tacz.
+
+    Test and stub vectors would otherwise be stored under the real model's
+    fingerprint and served to the developer's own tacz runs.
+    """
+    from tacz.utils import command_db
+    from tacz.utils.embed_cache import EmbeddingCache
+
+    cache = EmbeddingCache(tmp_path / "embed_cache.db")
+    monkeypatch.setattr(command_db, "_CACHE", cache)
+    yield cache
+    cache.close()
+
 @pytest.fixture
 def temp_db_path(temp_dir):
     """Create a temporary database path."""
@@ -150,4 +165,74 @@ def test_db(temp_db_path):
     
     yield conn
     
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+class HashingEmbedder:
+    """Deterministic bag-of-words stand-in for the sentence-transformer model."""
+
+    dim = 384
+
+    def __init__(self):
+        self.calls = 0
+        self.encoded = 0
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=True, **kwargs):
+        import hashlib
+        import re
+        import numpy as np
+
+        self.calls += 1
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        self.encoded += len(batch)
+        out = np.zeros((len(batch), self.dim), dtype=np.float32)
+        for i, text in enumerate(batch):
+            for token in re.findall(r"\w+", text.lower()):
+                bucket = int(hashlib.md5(token.encode()).hexdigest(), 16) % self.dim
+                out[i, bucket] += 1.0
+            norm = np.linalg.norm(out[i])
+            if normalize_embeddings and norm:
+                out[i] /= norm
+        return out[0] if single else out
+
+
+@pytest.fixture
+def fake_embedder(monkeypatch, temp_dir):
+    """Swap the embedding model for HashingEmbedder and isolate the embedding cache."""
+    from tacz.utils import command_db
+    from tacz.utils.embed_cache import EmbeddingCache
+
+    embedder = HashingEmbedder()
+    cache = EmbeddingCache(temp_dir / "embed_cache.db")
+    monkeypatch.setattr(command_db, "_MODEL", embedder)
+    monkeypatch.setattr(command_db, "_CACHE", cache)
+    yield embedder
+    cache.close()
+
+
+@pytest.fixture
+def open_empty_db(temp_db_path, fake_embedder):
+    """Open a CommandDatabase at temp_db_path without preloading the bundled catalog.
+
+    Call it again to reopen the same database (after changing config, say);
+    every database it opened is closed at teardown.
+    """
+    from tacz.utils.command_db import CommandDatabase
+
+    opened = []
+
+    def open_db():
+        with patch.object(CommandDatabase, "_preload_common_commands"):
+            db = CommandDatabase(temp_db_path)
+        opened.append(db)
+        return db
+
+    yield open_db
+    for db in opened:
+        db.close()
+
+
+@pytest.fixture
+def empty_db(open_empty_db):
+    """A CommandDatabase with no commands, searched with HashingEmbedder."""
+    return open_empty_db()
@@ -0,0 +1,100 @@
+import numpy as np
+
+from tacz.utils.ann_index import IVFIndex
+
+
+def _clustered(n, dim=16, clusters=8, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, size=n)] + 0.1 * rng.normal(size=(n, dim))
+    return np.arange(1, n + 1, dtype=np.int64), vectors.astype(np.float32)
+
+
+def _take(vectors):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return lambda slots: unit[slots]
+
+
+def _exact_top(ids, vectors, q, k):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    sims = unit @ (q / np.linalg.norm(q))
+    return set(ids[np.argsort(-sims)[:k]].tolist())
+
+
+def test_recall_improves_with_nprobe():
+    ids, vectors = _clustered(2000)
+    index = IVFIndex.build(ids, vectors, nlist=32)
+    take = _take(vectors)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), 20)]
+
+    def recall(nprobe):
+        hits = 0
+        for q in queries:
+            found, _ = index.search(q, 10, take, nprobe=nprobe)
+            hits += len(set(found.tolist()) & _exact_top(ids, vectors, q, 10))
+        return hits / (10 * len(queries))
+
+    assert recall(32) == 1.0
+    assert recall(4) >= 0.8
+
+
+def test_incremental_add_and_persistence(temp_dir):
+    ids, vectors = _clustered(500)
+    index = IVFIndex.build(ids, vectors, nlist=8, fingerprint="model-x")
+    extra = np.ones((1, vectors.shape[1]), dtype=np.float32)
+    index.add([9999], extra, [len(vectors)])
+    assert len(index) == 501
+    assert index.max_id == 9999
+
+    index.save(temp_dir / "commands.ivf.npz")
+    loaded = IVFIndex.load(temp_dir / "commands.ivf.npz")
+
+    assert loaded.fingerprint == "model-x"
+    assert loaded.max_id == 9999
+    found, sims = loaded.search(extra[0], 1, _take(np.vstack([vectors, extra])), nprobe=8)
+    assert found.tolist() == [9999]
+    assert np.isclose(sims[0], 1.0)
+
+
+def test_search_scans_only_allowed_masks():
+    ids, vectors = _clustered(600)
+    masks = np.array([1, 4, 7])[ids % 3]
+    index = IVFIndex.build(ids, vectors, masks=masks, nlist=8)
+
+    found, _ = index.search(vectors[0], 50, _take(vectors), nprobe=8, allowed_masks=[4, 7])
+
+    assert len(found) == 50
+    assert set(masks[found - 1].tolist()) <= {4, 7}
+
+
+def test_truncated_file_is_a_cache_miss(temp_dir):
+    ids, vectors = _clustered(200)
+    path = temp_dir / "commands.ivf.npz"
+    IVFIndex.build(ids, vectors, nlist=4).save(path)
+    path.write_bytes(path.read_bytes()[:100])
+
+    assert IVFIndex.load(path) is None
+
+
+def test_trained_rows_survive_appends_and_reload(temp_dir):
+    ids, vectors = _clustered(200)
+    index = IVFIndex.build(ids, vectors, nlist=4)
+    index.add([1000], vectors[:1], [0])
+    index.save(temp_dir / "commands.ivf.npz")
+
+    loaded = IVFIndex.load(temp_dir / "commands.ivf.npz")
+
+    assert loaded.trained_rows == 200
+    assert len(loaded) == 201
+
+
+def test_saved_index_holds_slots_not_vectors(temp_dir):
+    ids, vectors = _clustered(300)
+    path = temp_dir / "commands.ivf.npz"
+    IVFIndex.build(ids, vectors, slots=ids + 100, nlist=4).save(path)
+
+    with np.load(path) as data:
+        assert "vectors" not in data.files
+        assert sorted(data["slots"].tolist()) == (ids + 100).tolist()
+    assert not (temp_dir / "commands.ivf.npz.tmp").exists()
@@ -0,0 +1,66 @@
+import numpy as np
+from unittest.mock import patch
+
+from tacz.utils import command_db
+from tacz.utils.catalog_vectors import load_catalog_vectors, save_catalog_vectors
+from tacz.utils.command_db import CommandDatabase, catalog_texts
+
+CATALOG = [
+    {"command": "ls -la", "explanation": "List all files", "category": "file", "platform": "linux,macos"},
+    {"command": "df -h", "explanation": "Show disk usage", "category": "system", "platform": "linux,macos"},
+]
+
+
+def test_roundtrip(temp_dir):
+    texts = ["a", "b"]
+    vectors = np.eye(2, 4, dtype=np.float32)
+    save_catalog_vectors(vectors, texts, "model-x", temp_dir)
+
+    loaded = load_catalog_vectors(texts, "model-x", temp_dir)
+    assert np.array_equal(loaded, vectors)
+
+
+def test_stale_sidecar_is_ignored(temp_dir):
+    save_catalog_vectors(np.eye(2, 4, dtype=np.float32), ["a", "b"], "model-x", temp_dir)
+
+    assert load_catalog_vectors(["a", "b"], "model-y", temp_dir) is None
+    assert load_catalog_vectors(["a", "changed"], "model-x", temp_dir) is None
+    assert load_catalog_vectors(["a"], "model-x", temp_dir) is None
+
+
+def test_missing_sidecar(temp_dir):
+    assert load_catalog_vectors(["a"], "model-x", temp_dir) is None
+
+
+def test_preload_uses_sidecar_without_model(temp_db_path, temp_dir, fake_embedder):
+    texts = catalog_texts(CATALOG)
+    vectors = fake_embedder.encode(texts)
+    fake_embedder.calls = 0
+    save_catalog_vectors(vectors, texts, command_db._fingerprint(), temp_dir)
+
+    def load_from_temp(texts, fingerprint):
+        return load_catalog_vectors(texts, fingerprint, temp_dir)
+
+    with patch.object(command_db, "load_bundled_commands", return_value=[dict(c) for c in CATALOG]), \
+         patch.object(command_db, "load_catalog_vectors", side_effect=load_from_temp):
+        db = CommandDatabase(temp_db_path)
+
+    assert fake_embedder.calls == 0
+    rows = db.conn.execute("SELECT command, vector_slot FROM commands ORDER BY id").fetchall()
+    assert [r["command"] for r in rows] == ["ls -la", "df -h"]
+    stored = db.store.take([rows[1]["vector_slot"]])[0]
+    assert np.allclose(stored, vectors[1] / np.linalg.norm(vectors[1]))
+    db.close()
+
+
+def test_release_check_requires_matching_sidecar(temp_dir):
+    from tacz.tools.build_embeddings import check
+
+    texts = catalog_texts(command_db.load_bundled_commands())
+    assert not check(data_dir=temp_dir)
+
+    save_catalog_vectors(np.zeros((len(texts), 4), dtype=np.float32), texts, command_db._fingerprint(), temp_dir)
+    assert check(data_dir=temp_dir)
+
+    save_catalog_vectors(np.zeros((len(texts), 4), dtype=np.float32), texts, "another-model", temp_dir)
+    assert not check(data_dir=temp_dir)
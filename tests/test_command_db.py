@@ -320,4 +320,528 @@ def test_update_command_popularity(temp_db_path):
     cursor.execute("SELECT popularity FROM commands WHERE id=?", (cmd_id,))
     updated_popularity = cursor.fetchone()[0]
     
-    assert updated_popularity == initial_popularity + 1
\ No newline at end of file
+    assert updated_popularity == initial_popularity + 1
+
+def test_import_does_not_load_embedding_model():
+    """Importing command_db must not pull in sentence_transformers/torch."""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, tacz.utils.command_db; "
+        "print('sentence_transformers' in sys.modules, 'torch' in sys.modules)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False False"
+
+
+def test_get_model_loads_once(monkeypatch):
+    """The embedding model is created lazily and reused afterwards."""
+    import sys
+    import types
+    from tacz.utils import command_db
+
+    created = []
+
+    class FakeModel:
+        def __init__(self, name, device=None):
+            created.append((name, device))
+
+    monkeypatch.setitem(sys.modules, "sentence_transformers",
+                        types.SimpleNamespace(SentenceTransformer=FakeModel))
+    monkeypatch.setattr(command_db, "_MODEL", None)
+
+    first = command_db._get_model()
+    second = command_db._get_model()
+
+    assert first is second
+    assert created == [(command_db.EMBED_MODEL_NAME, "cpu")]
+
+
+def test_repeat_search_uses_embedding_cache(empty_db, fake_embedder):
+    """A repeated query is served from the embedding cache, not the model."""
+    from tacz.utils import command_db
+
+    empty_db.add_command("df -h", "Show disk usage", category="system")
+
+    empty_db.search("disk usage")
+    calls = fake_embedder.calls
+    empty_db.search("disk usage")
+
+    assert fake_embedder.calls == calls
+    assert command_db._CACHE.stats()["hits"] >= 1
+
+
+def test_add_commands_embeds_in_batches(empty_db, fake_embedder):
+    """Bulk inserts call the model once per batch rather than once per row."""
+    commands = [
+        {"command": f"echo {i}", "explanation": f"Print number {i}", "category": "test"}
+        for i in range(10)
+    ]
+
+    assert empty_db.add_commands(commands, batch_size=4) == 10
+
+    assert fake_embedder.calls == 3
+    count = empty_db.conn.execute(
+        "SELECT COUNT(*) FROM commands WHERE vector_slot IS NOT NULL"
+    ).fetchone()[0]
+    assert count == 10
+
+
+def test_backfill_embeddings_batches_missing_rows(empty_db, fake_embedder):
+    empty_db.conn.executemany(
+        "INSERT INTO commands (command, explanation, category) VALUES (?, ?, ?)",
+        [(f"cmd{i}", f"explanation {i}", "misc") for i in range(5)],
+    )
+    empty_db.conn.commit()
+
+    empty_db._backfill_embeddings(batch_size=2)
+
+    assert fake_embedder.calls == 3
+    missing = empty_db.conn.execute(
+        "SELECT COUNT(*) FROM commands WHERE vector_slot IS NULL"
+    ).fetchone()[0]
+    assert missing == 0
+
+
+def test_rows_inserted_without_mask_stay_visible(empty_db):
+    empty_db.current_platform = "linux"
+    empty_db.conn.execute("INSERT INTO commands (command, explanation) VALUES ('df -h', 'Show disk usage')")
+    empty_db.conn.execute(
+        "INSERT INTO commands (command, explanation, platform, platform_mask) "
+        "VALUES ('free -m', 'Show memory usage', 'linux', NULL)"
+    )
+    empty_db.conn.commit()
+
+    empty_db._backfill_embeddings()
+
+    masks = dict(empty_db.conn.execute("SELECT command, platform_mask FROM commands").fetchall())
+    assert masks == {"df -h": 7, "free -m": 1}
+    assert empty_db.search("disk usage")[0]["command"] == "df -h"
+    assert empty_db.search("memory usage")[0]["command"] == "free -m"
+
+
+def test_search_reuses_resident_index(empty_db):
+    empty_db.current_platform = "linux"
+    empty_db.add_command("df -h", "Show disk usage", category="system", platform="linux")
+
+    empty_db.search("disk usage")
+    index = empty_db._index
+    empty_db.search("disk space")
+    assert empty_db._index is index
+
+    empty_db.add_command("free -m", "Show memory usage", category="system", platform="linux")
+    results = empty_db.search("memory usage")
+    assert empty_db._index is not index
+    assert results[0]["command"] == "free -m"
+
+
+def test_index_invalidated_by_other_connection(open_empty_db):
+    db = open_empty_db()
+    other = open_empty_db()
+    db.current_platform = "linux"
+
+    assert db.search("memory usage") == []
+    other.add_command("free -m", "Show memory usage", category="system", platform="linux")
+
+    assert [r["command"] for r in db.search("memory usage")] == ["free -m"]
+
+
+def test_vector_index_top_k_orders_by_score():
+    import numpy as np
+    from tacz.utils.vector_index import VectorIndex
+
+    index = VectorIndex(
+        np.array([10, 11, 12], dtype=np.int64),
+        np.eye(3, dtype=np.float32),
+        np.zeros(3, dtype=np.float32),
+    )
+
+    ids, scores = index.top_k(np.array([0.1, 1.0, 0.5], dtype=np.float32), 2)
+    assert list(ids) == [11, 12]
+    assert scores[0] > scores[1]
+
+
+def test_quantized_index_rescores_with_exact_vectors():
+    import numpy as np
+    from tacz.utils.vector_index import VectorIndex
+    from tacz.utils.vector_store import quantize
+
+    rng = np.random.default_rng(0)
+    exact = rng.normal(size=(500, 64)).astype(np.float32)
+    exact /= np.linalg.norm(exact, axis=1, keepdims=True)
+    codes = quantize(exact, "int8")
+    index = VectorIndex(
+        np.arange(500), codes["codes"], np.zeros(500, dtype=np.float32),
+        scales=codes["scale"], exact=lambda positions: exact[positions],
+    )
+    q = exact[42] + 0.05 * rng.normal(size=64).astype(np.float32)
+
+    ids, scores = index.top_k(q, 5)
+
+    expected = np.argsort(-(exact @ (q / np.linalg.norm(q))))[:5]
+    assert list(ids) == list(expected)
+    assert np.allclose(scores, exact[ids] @ (q / np.linalg.norm(q)), atol=1e-5)
+
+
+def test_backend_change_triggers_reembed(open_empty_db, fake_embedder, monkeypatch):
+    from tacz.config import config
+
+    db = open_empty_db()
+    db.add_command("df -h", "Show disk usage", category="system")
+    db.close()
+
+    monkeypatch.setattr(config, "vals", {"EMBED_BACKEND": "onnx"})
+    db = open_empty_db()
+    assert fake_embedder.encoded == 1
+    db.close()
+
+    monkeypatch.setattr(config, "vals", {"EMBED_BACKEND": "onnx-int8"})
+    db = open_empty_db()
+    assert fake_embedder.encoded == 2
+    assert db._get_meta("embedding_fingerprint").endswith("+int8")
+
+
+def test_schema_migrations_run_once(open_empty_db):
+    from unittest.mock import MagicMock
+    from tacz.utils import command_db
+
+    db = open_empty_db()
+    version = db.conn.execute("PRAGMA user_version").fetchone()[0]
+    assert version == command_db.SCHEMA_VERSION
+    db.close()
+
+    migration = MagicMock()
+    with patch.object(command_db, "_MIGRATIONS", [migration] * command_db.SCHEMA_VERSION):
+        db = open_empty_db()
+    migration.assert_not_called()
+
+
+def test_fts_index_maintained_incrementally(empty_db):
+    cmd_id = empty_db.add_command("tar -xzf archive.tar.gz", "Extract a gzipped tarball", category="archive")
+
+    def fts_ids(term):
+        rows = empty_db.conn.execute(
+            "SELECT rowid FROM command_fts WHERE command_fts MATCH ?", (term,)
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    assert fts_ids("tarball") == [cmd_id]
+    empty_db.conn.execute("UPDATE commands SET explanation = 'Unpack an archive' WHERE id = ?", (cmd_id,))
+    assert fts_ids("tarball") == []
+    assert fts_ids("unpack") == [cmd_id]
+    empty_db.conn.execute("DELETE FROM commands WHERE id = ?", (cmd_id,))
+    assert fts_ids("unpack") == []
+
+
+def test_legacy_database_is_upgraded(temp_db_path, fake_embedder):
+    conn = sqlite3.connect(temp_db_path)
+    conn.executescript(
+        """
+        CREATE TABLE commands (
+            id INTEGER PRIMARY KEY, command TEXT NOT NULL, explanation TEXT,
+            category TEXT, platform TEXT, dangerous INTEGER DEFAULT 0,
+            danger_reason TEXT, popularity INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE VIRTUAL TABLE command_fts USING fts5(command, explanation, category);
+        INSERT INTO commands (command, explanation, category) VALUES ('uptime', 'Show system uptime', 'system');
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    db = CommandDatabase(temp_db_path)
+    row = db.conn.execute("SELECT vector_slot FROM commands WHERE command = 'uptime'").fetchone()
+    assert row["vector_slot"] is not None
+    hits = db.conn.execute(
+        "SELECT rowid FROM command_fts WHERE command_fts MATCH 'uptime'"
+    ).fetchall()
+    assert len(hits) == 1
+    db.close()
+
+
+def test_hybrid_search_prefers_exact_flags(empty_db):
+    empty_db.current_platform = "linux"
+    empty_db.add_commands([
+        {"command": "tar -czf out.tar.gz dir", "explanation": "Create a gzipped archive", "platform": "linux"},
+        {"command": "tar -xzf out.tar.gz", "explanation": "Extract a gzipped archive", "platform": "linux"},
+        {"command": "unzip file.zip", "explanation": "Extract a zip archive", "platform": "linux"},
+    ])
+
+    results = empty_db.search("tar -xzf", limit=2, mode="hybrid")
+
+    assert results[0]["command"] == "tar -xzf out.tar.gz"
+
+
+def test_hybrid_search_falls_back_to_vector(empty_db):
+    empty_db.current_platform = "linux"
+    empty_db.add_command("free -m", "Show memory usage", platform="linux")
+
+    with patch.object(empty_db, "_fetch_commands", wraps=empty_db._fetch_commands) as fetch:
+        results = empty_db.search("memory", limit=3, mode="hybrid")
+
+    assert [r["command"] for r in results] == ["free -m"]
+    fetch.assert_called_once()
+
+
+def test_ann_search_persists_and_updates_incrementally(open_empty_db, monkeypatch):
+    from tacz.config import config
+
+    monkeypatch.setattr(config, "vals", {"ANN_MODE": "on", "ANN_NLIST": "2", "ANN_NPROBE": "2"})
+    db = open_empty_db()
+    db.current_platform = "linux"
+    db.add_commands([
+        {"command": "df -h", "explanation": "Show disk usage", "platform": "linux"},
+        {"command": "free -m", "explanation": "Show memory usage", "platform": "linux"},
+        {"command": "dir", "explanation": "List directory", "platform": "windows"},
+    ])
+
+    assert db.search("memory usage", limit=1)[0]["command"] == "free -m"
+    assert db._ann_path().exists()
+
+    db.add_command("uptime", "Show system uptime", platform="linux")
+    assert db.search("system uptime", limit=1)[0]["command"] == "uptime"
+    assert len(db._ann) == 4
+    assert all(r["platform"] != "windows" for r in db.search("list directory"))
+
+
+def test_ann_saved_on_build_and_close_and_retrained_when_doubled(open_empty_db, monkeypatch):
+    from tacz.config import config
+    from tacz.utils.ann_index import IVFIndex
+
+    monkeypatch.setattr(config, "vals", {"ANN_MODE": "on", "ANN_NLIST": "2", "ANN_NPROBE": "2"})
+    db = open_empty_db()
+    db.current_platform = "linux"
+    db.add_commands([
+        {"command": f"tool{i}", "explanation": f"Run tool number {i}", "platform": "linux"} for i in range(4)
+    ])
+    db.search("tool")
+    saved = db._ann_path().stat().st_mtime_ns
+
+    with patch("tacz.utils.ann_index.IVFIndex.save") as save:
+        db.add_command("uptime", "Show system uptime", platform="linux")
+        db.search("system uptime")
+        save.assert_not_called()
+        assert db._ann.trained_rows == 4
+
+        db.add_commands([
+            {"command": f"extra{i}", "explanation": f"Extra command {i}", "platform": "linux"} for i in range(3)
+        ])
+        db.search("extra command")
+        assert db._ann.trained_rows == len(db._ann) == 8
+        save.assert_called_once()
+
+    db.add_command("free -m", "Show memory usage", platform="linux")
+    db.search("memory")
+    db.close()
+    assert db._ann_path().stat().st_mtime_ns != saved
+    assert len(IVFIndex.load(db._ann_path())) == 9
+
+
+def test_platform_mask_normalization():
+    from tacz.utils.command_db import matching_masks, platform_mask
+
+    assert platform_mask("linux") == 1
+    assert platform_mask("macos, linux") == 3
+    assert platform_mask("linux,macos,windows") == platform_mask("") == platform_mask(None) == 7
+    assert platform_mask("freebsd") == 0
+    assert matching_masks("windows") == [4, 5, 6, 7]
+    assert matching_masks("unknown") == [7]
+
+
+def test_search_filters_platform_with_mask_index(empty_db):
+    empty_db.current_platform = "windows"
+    empty_db.add_commands([
+        {"command": "ls -la", "explanation": "List files", "platform": "linux,macos"},
+        {"command": "dir", "explanation": "List files", "platform": "windows"},
+        {"command": "git status", "explanation": "List changed files", "platform": ""},
+    ])
+
+    assert {r["command"] for r in empty_db.search("list files", limit=5)} == {"dir", "git status"}
+    plan = empty_db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM commands WHERE platform_mask IN (4, 5, 6, 7)"
+    ).fetchall()
+    assert any("idx_commands_platform_mask" in row[3] for row in plan)
+
+
+def test_platform_mask_backfilled_on_upgrade(temp_db_path, fake_embedder):
+    from tacz.utils.command_db import _migration_1
+
+    conn = sqlite3.connect(temp_db_path)
+    _migration_1(conn)
+    conn.execute("INSERT INTO commands (command, platform) VALUES ('dir', 'windows'), ('pwd', NULL)")
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    conn.close()
+
+    db = CommandDatabase(temp_db_path)
+    masks = dict(db.conn.execute("SELECT command, platform_mask FROM commands").fetchall())
+    assert masks == {"dir": 4, "pwd": 7}
+    db.close()
+
+
+def test_legacy_embedding_blobs_move_to_vector_store(temp_db_path, fake_embedder):
+    import numpy as np
+    from tacz.utils.command_db import _migration_1, _migration_2
+
+    vec = np.zeros(384, dtype=np.float32)
+    vec[7] = 1.0
+    conn = sqlite3.connect(temp_db_path)
+    _migration_1(conn)
+    _migration_2(conn)
+    conn.execute(
+        "INSERT INTO commands (command, explanation, platform_mask, embedding) VALUES ('ls', 'List files', 7, ?)",
+        (vec.tobytes(),),
+    )
+    conn.execute("PRAGMA user_version = 2")
+    conn.commit()
+    conn.close()
+
+    db = CommandDatabase(temp_db_path)
+
+    assert fake_embedder.encoded == 0
+    row = db.conn.execute("SELECT embedding, vector_slot FROM commands").fetchone()
+    assert row["embedding"] is None
+    assert np.allclose(db.store.take([row["vector_slot"]])[0], vec)
+    db.close()
+
+
+def test_int8_vector_format_search_and_resync(open_empty_db, monkeypatch):
+    from tacz.config import config
+
+    db = open_empty_db()
+    db.add_command("df -h", "Show disk usage", platform="linux")
+    db.close()
+
+    monkeypatch.setattr(config, "vals", {"VECTOR_FORMAT": "int8"})
+    db = open_empty_db()
+    db.current_platform = "linux"
+    assert len(db.compact) == len(db.store) == 1
+
+    db.add_command("free -m", "Show memory usage", platform="linux")
+    assert len(db.compact) == 2
+    assert db._get_index().quantized
+    assert db.search("memory usage", limit=1)[0]["command"] == "free -m"
+
+
+@pytest.mark.parametrize("fmt", ["float32", "int8"])
+def test_index_scans_the_shared_mapping(open_empty_db, monkeypatch, fmt):
+    import numpy as np
+    from tacz.config import config
+
+    monkeypatch.setattr(config, "vals", {"VECTOR_FORMAT": fmt})
+    db = open_empty_db()
+    db.current_platform = "linux"
+    db.add_commands([
+        {"command": "free -m", "explanation": "Show memory usage", "platform": "linux"},
+        {"command": "vm_stat", "explanation": "Show memory statistics", "platform": "macos"},
+        {"command": "df -h", "explanation": "Show disk usage", "platform": "linux"},
+    ])
+
+    index = db._get_index()
+    assert isinstance(index.matrix, np.memmap)
+    assert index.slots is not None
+    assert [r["command"] for r in db.search("memory usage", limit=2)] == ["free -m", "df -h"]
+
+    db.current_platform = "unknown"
+    db.add_command("uptime", "Show how long the system has been running")
+    assert db._get_index().slots is None
+
+
+def test_opening_synced_compact_store_takes_no_write_lock(open_empty_db, monkeypatch):
+    from tacz.config import config
+
+    monkeypatch.setattr(config, "vals", {"VECTOR_FORMAT": "int8"})
+    db = open_empty_db()
+    db.add_command("df -h", "Show disk usage", platform="linux")
+    db.close()
+
+    with patch.object(CommandDatabase, '_write_transaction', side_effect=AssertionError("write lock taken")):
+        db = open_empty_db()
+    assert len(db.compact) == len(db.store) == 1
+
+
+def test_vectors_fsynced_once_per_batch(open_empty_db, monkeypatch):
+    from tacz.config import config
+
+    monkeypatch.setattr(config, "vals", {"VECTOR_FORMAT": "float16"})
+    db = open_empty_db()
+    with patch("tacz.utils.vector_store.os.fsync") as fsync:
+        db.add_commands([
+            {"command": f"cmd{i}", "explanation": f"Command {i}"} for i in range(5)
+        ])
+    # One fsync for the float32 store, one for the compact copy.
+    assert fsync.call_count == 2
+
+
+def test_commands_classified_at_ingest(empty_db):
+    from tacz.utils.safety import row_danger
+    from tacz.utils.safety import RULES
+
+    empty_db.add_commands([
+        {"command": "sudo rm -rf build", "explanation": "Delete build output"},
+        {"command": "ls -la", "explanation": "List files"},
+    ])
+    empty_db.add_command("dd if=/dev/zero of=/dev/sdb", "Zero a disk")
+
+    rows = {r["command"]: dict(r) for r in empty_db.conn.execute("SELECT * FROM commands")}
+    assert rows["sudo rm -rf build"]["danger_rules"].split(",")[:2] == ["rm-rf", "sudo"]
+    assert rows["ls -la"]["danger_rules"] == ""
+    assert {r["safety_version"] for r in rows.values()} == {RULES.version}
+    assert row_danger(rows["dd if=/dev/zero of=/dev/sdb"]) == (True, "Raw disk overwrite with dd")
+    assert row_danger(rows["ls -la"]) == (False, "")
+
+
+def test_only_stale_rows_are_reclassified(open_empty_db):
+    from tacz.utils.safety import RULES
+
+    db = open_empty_db()
+    db.add_command("shutdown -h now", "Power off")
+    db.add_command("ls", "List files")
+    db.conn.execute("UPDATE commands SET danger_rules = 'stale', safety_version = 'old' WHERE command = 'ls'")
+    db.conn.execute("UPDATE commands SET danger_rules = 'kept' WHERE command = 'shutdown -h now'")
+    db.conn.execute("UPDATE meta SET value = 'old' WHERE key = 'safety_version'")
+    db.conn.commit()
+    db.close()
+
+    db = open_empty_db()
+    rows = dict(db.conn.execute("SELECT command, danger_rules FROM commands").fetchall())
+    assert rows == {"shutdown -h now": "kept", "ls": ""}
+    assert db._get_meta("safety_version") == RULES.version
+
+    with patch("tacz.utils.command_db.classify_commands") as classify:
+        db._classify_stale()
+    classify.assert_not_called()
+
+
+def test_connection_profile_applied(open_empty_db, monkeypatch):
+    from tacz.config import config
+
+    db = open_empty_db()
+    pragma = lambda name: db.conn.execute(f"PRAGMA {name}").fetchone()[0]
+    assert pragma("journal_mode") == "wal"
+    assert pragma("synchronous") == 1  # NORMAL
+    assert pragma("temp_store") == 2  # MEMORY
+    assert pragma("cache_size") == -16384
+    assert pragma("busy_timeout") == 5000
+    db.close()
+
+    monkeypatch.setattr(config, "vals", {"SQLITE_JOURNAL_MODE": "delete", "SQLITE_SYNCHRONOUS": "full",
+                                         "SQLITE_BUSY_TIMEOUT_MS": "250"})
+    db = open_empty_db()
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert db.conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    assert db.conn.execute("PRAGMA busy_timeout").fetchone()[0] == 250
+
+
+def test_search_results_carry_scores(empty_db):
+    empty_db.current_platform = "linux"
+    empty_db.add_command("df -h", "Show disk usage", platform="linux")
+    empty_db.add_command("free -m", "Show memory usage", platform="linux")
+
+    for mode in ("vector", "hybrid"):
+        results = empty_db.search("disk usage", limit=2, mode=mode)
+        scores = [row["score"] for row in results]
+        assert results[0]["command"] == "df -h"
+        assert scores == sorted(scores, reverse=True) and all(isinstance(s, float) for s in scores)
@@ -0,0 +1,147 @@
+import json
+import threading
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from tacz import daemon
+
+
+@pytest.fixture
+def running_daemon(temp_dir):
+    db = MagicMock()
+    db.current_platform = "linux"
+    server = daemon.TaczServer(temp_dir / "tacz.sock", db)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, db
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def mock_openai():
+    with patch("openai.OpenAI") as mock_openai:
+        yield mock_openai.return_value
+
+
+def _stream(content, size=7):
+    return [
+        MagicMock(choices=[MagicMock(delta=MagicMock(content=content[i:i + size]))])
+        for i in range(0, len(content), size)
+    ]
+
+
+def test_connect_returns_none_without_daemon(temp_dir):
+    assert daemon.connect(temp_dir / "missing.sock") is None
+
+
+def test_options_search_through_daemon_and_stream_locally(mock_config, running_daemon, mock_openai):
+    server, db = running_daemon
+    db.search.return_value = [
+        {"id": 1, "command": "df -h", "explanation": "Disk usage", "category": "system",
+         "dangerous": 0, "danger_reason": "", "score": 0.5, "embedding": b"\x00\x01"}
+    ]
+    mock_openai.chat.completions.create.return_value = _stream(json.dumps({
+        "is_valid": True, "commands": [{"command": "du -sh *", "explanation": "Size of each item"}]
+    }))
+    seen = []
+
+    remote = daemon.connect(server.path)
+    response = remote.get_options(prompt="disk space", context="Platform: Linux (bash)",
+                                  display_callback=seen.append)
+
+    assert [c.command for c in response.commands] == ["df -h", "du -sh *"]
+    assert seen[-1][-1] == {"cmd": "du -sh *", "explanation": "Size of each item"}
+    assert remote.db.current_platform == "linux"
+    db.search.assert_called_once_with(query="disk space", limit=3)
+
+
+def test_search_and_writes_are_forwarded(mock_config, running_daemon, mock_openai):
+    server, db = running_daemon
+    db.search.return_value = [{"id": 1, "command": "ls", "embedding": b"\x00\x01"}]
+    db.search_history.return_value = [{"query": "list", "command": "ls"}]
+    db.add_command.return_value = 7
+    db.record_history.return_value = None
+
+    remote = daemon.connect(server.path)
+    assert remote.db.search("list", limit=2) == [{"id": 1, "command": "ls"}]
+    remote.db.record_history(query="list", command="ls", executed=True, success=True)
+    remote.add_to_favorites("ls", "List files")
+
+    assert remote.get_command_history(query="list") == [{"query": "list", "command": "ls"}]
+    db.record_history.assert_called_once_with(
+        query="list", command="ls", executed=True, success=True, platform=None
+    )
+    db.add_command.assert_called_once_with(
+        command="ls", explanation="List files", category="favorite", platform=None,
+        dangerous=False, danger_reason=None,
+    )
+
+
+def test_daemon_errors_are_reported(running_daemon):
+    server, db = running_daemon
+    db.search.side_effect = RuntimeError("boom")
+
+    with pytest.raises(daemon.DaemonError, match="boom"):
+        daemon.DaemonClient(server.path).request("search", query="x")
+
+
+def test_unknown_ops_are_refused(running_daemon):
+    server, _ = running_daemon
+
+    with pytest.raises(daemon.DaemonError, match="Unknown op"):
+        daemon.DaemonClient(server.path).request("close")
+
+
+def test_failed_request_falls_back_in_process(temp_dir):
+    client = MagicMock()
+    client.request.side_effect = daemon.DaemonError("timed out")
+    local = MagicMock()
+    local.search.return_value = [{"id": 1, "command": "ls"}]
+    opened = []
+    remote_db = daemon._RemoteDatabase(client, "linux", open_local=lambda: opened.append(local) or local)
+
+    assert remote_db.search("list") == [{"id": 1, "command": "ls"}]
+    remote_db.record_history(query="list", command="ls")
+    remote_db.close()
+
+    assert opened == [local]
+    client.request.assert_called_once()
+    local.record_history.assert_called_once_with(
+        query="list", command="ls", executed=False, success=None, platform=None
+    )
+    local.close.assert_called_once()
+
+
+def test_open_provider_falls_back_in_process():
+    from tacz.main import open_provider
+
+    with patch("tacz.main.daemon.connect", return_value=None), \
+         patch("tacz.main.OllamaProvider") as mock_provider_cls:
+        assert open_provider() is mock_provider_cls.return_value
+
+
+def test_client_skips_database_and_model_imports(temp_dir):
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, threading\n"
+        "from unittest.mock import MagicMock\n"
+        "from tacz import daemon\n"
+        "db = MagicMock(current_platform='linux')\n"
+        f"server = daemon.TaczServer({str(temp_dir / 'tacz.sock')!r}, db)\n"
+        "threading.Thread(target=server.serve_forever, daemon=True).start()\n"
+        f"assert daemon.connect({str(temp_dir / 'tacz.sock')!r}) is not None\n"
+        "heavy = [m for m in ('numpy', 'tacz.utils.command_db') if m in sys.modules]\n"
+        "print('HEAVY', heavy)\n"
+    )
+    (temp_dir / ".taczrc").write_text("")
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True,
+        env={"HOME": str(temp_dir), "PATH": "/usr/bin:/bin"},
+    )
+
+    assert "HEAVY []" in result.stdout, result.stderr
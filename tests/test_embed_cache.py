@@ -0,0 +1,65 @@
+from tacz.utils.embed_cache import EmbeddingCache, make_key
+
+
+def test_make_key_normalizes_whitespace():
+    assert make_key("list  files\n", "m") == make_key("list files", "m")
+    assert make_key("list files", "m") != make_key("list files", "other-model")
+
+
+def test_get_put_counts_hits_and_misses(temp_dir):
+    cache = EmbeddingCache(temp_dir / "cache.db")
+
+    assert cache.get("list files", "m") is None
+    cache.put("list files", "m", b"\x00\x01")
+    assert cache.get("list   files", "m") == b"\x00\x01"
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    cache.close()
+
+
+def test_cache_persists_between_instances(temp_dir):
+    cache = EmbeddingCache(temp_dir / "cache.db")
+    cache.put("disk usage", "m", b"abc")
+    cache.close()
+
+    reopened = EmbeddingCache(temp_dir / "cache.db")
+    assert reopened.get("disk usage", "m") == b"abc"
+    reopened.close()
+
+
+def test_lru_eviction(temp_dir):
+    cache = EmbeddingCache(temp_dir / "cache.db", max_entries=2)
+    cache.put("a", "m", b"a")
+    cache.put("b", "m", b"b")
+    cache.get("a", "m")
+    cache.put("c", "m", b"c")
+
+    assert cache.stats()["entries"] == 2
+    assert cache.get("a", "m") == b"a"
+    assert cache.get("b", "m") is None
+    assert cache.get("c", "m") == b"c"
+    cache.close()
+
+
+def test_get_many_and_put_many(temp_dir):
+    cache = EmbeddingCache(temp_dir / "cache.db")
+    cache.put_many([("a", b"1"), ("b", b"2")], "m")
+
+    assert cache.get_many(["a", "x", "b"], "m") == [b"1", None, b"2"]
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+    cache.close()
+
+
+def test_hits_do_not_write_until_flushed(temp_dir):
+    cache = EmbeddingCache(temp_dir / "cache.db")
+    cache.put("a", "m", b"a")
+    before = cache.conn.total_changes
+
+    for _ in range(10):
+        assert cache.get("a", "m") == b"a"
+    assert cache.get_many(["a"], "m") == [b"a"]
+
+    assert cache.conn.total_changes == before
+    cache.close()
@@ -0,0 +1,105 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from tacz.utils.embedders import (
+    BACKEND_ONNX,
+    BACKEND_ONNX_INT8,
+    BACKEND_SENTENCE_TRANSFORMERS,
+    OnnxEmbedder,
+    create_embedder,
+    embedding_fingerprint,
+)
+
+
+def test_fingerprint_shared_between_torch_and_fp32_onnx():
+    assert embedding_fingerprint(BACKEND_SENTENCE_TRANSFORMERS) == embedding_fingerprint(BACKEND_ONNX)
+    assert embedding_fingerprint(BACKEND_ONNX_INT8) != embedding_fingerprint(BACKEND_ONNX)
+
+
+def test_create_embedder_unknown_backend():
+    with pytest.raises(ValueError):
+        create_embedder("tensorflow")
+
+
+@pytest.fixture
+def fake_onnx(monkeypatch):
+    """Fake onnxruntime/tokenizers modules; the session echoes token ids as hidden states."""
+    class Encoding:
+        def __init__(self, ids):
+            self.ids = ids
+            self.attention_mask = [1] * len(ids)
+            self.type_ids = [0] * len(ids)
+
+    class Tokenizer:
+        @classmethod
+        def from_file(cls, path):
+            return cls()
+
+        def enable_truncation(self, max_length):
+            pass
+
+        def enable_padding(self):
+            pass
+
+        def encode_batch(self, texts):
+            return [Encoding([len(t), 1, 2]) for t in texts]
+
+    class Session:
+        def __init__(self, path, sess_options=None, providers=None):
+            self.path = path
+
+        def get_inputs(self):
+            return [types.SimpleNamespace(name="input_ids"), types.SimpleNamespace(name="attention_mask")]
+
+        def run(self, outputs, feeds):
+            assert set(feeds) == {"input_ids", "attention_mask"}
+            ids = feeds["input_ids"].astype(np.float32)
+            hidden = np.zeros((ids.shape[0], ids.shape[1], 4), dtype=np.float32)
+            hidden[:, 0, 0] = ids[:, 0]
+            hidden[:, 0, 1] = 1.0
+            return [hidden]
+
+    ort = types.SimpleNamespace(
+        SessionOptions=lambda: types.SimpleNamespace(),
+        GraphOptimizationLevel=types.SimpleNamespace(ORT_ENABLE_ALL=99),
+        InferenceSession=Session,
+    )
+    monkeypatch.setitem(sys.modules, "onnxruntime", ort)
+    monkeypatch.setitem(sys.modules, "tokenizers", types.SimpleNamespace(Tokenizer=Tokenizer))
+
+
+def test_onnx_embedder_cls_pooling_and_normalization(fake_onnx, temp_dir):
+    (temp_dir / "model.onnx").write_bytes(b"")
+    (temp_dir / "tokenizer.json").write_text("{}")
+
+    embedder = OnnxEmbedder(model_dir=temp_dir)
+    vecs = embedder.encode(["abc", "abcdefg"], batch_size=1)
+
+    assert vecs.shape == (2, 4)
+    assert np.allclose(np.linalg.norm(vecs, axis=1), 1.0)
+    assert vecs[1, 0] > vecs[0, 0]
+    assert embedder.encode("abc").shape == (4,)
+
+
+def test_onnx_model_files_used_from_hub_cache(fake_onnx, temp_dir, monkeypatch):
+    hub_dir = temp_dir / "hub"
+    hub_dir.mkdir()
+    model_dir = temp_dir / "models"
+    requested = []
+
+    def hf_hub_download(repo_id, filename):
+        requested.append(filename)
+        path = hub_dir / filename.replace("/", "_")
+        path.write_bytes(b"weights")
+        return str(path)
+
+    monkeypatch.setitem(sys.modules, "huggingface_hub", types.SimpleNamespace(hf_hub_download=hf_hub_download))
+
+    embedder = OnnxEmbedder(model_dir=model_dir)
+
+    assert requested == ["onnx/model.onnx", "tokenizer.json"]
+    assert embedder.session.path == str(hub_dir / "onnx_model.onnx")
+    assert list(model_dir.iterdir()) == []
@@ -0,0 +1,33 @@
+import sqlite3
+
+from tacz.utils.history import read_history
+from tacz.utils.lazy import LazyImport
+
+
+def test_read_history_without_command_database(temp_db_path):
+    conn = sqlite3.connect(temp_db_path)
+    conn.execute(
+        "CREATE TABLE command_history (id INTEGER PRIMARY KEY, query TEXT, command TEXT, "
+        "executed INTEGER, success INTEGER, platform TEXT, timestamp TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO command_history (query, command, timestamp) VALUES (?, ?, ?)",
+        [("disk", "df -h", "2024-01-01 10:00:00"), ("files", "ls -la", "2024-01-02 10:00:00")],
+    )
+    conn.commit()
+    conn.close()
+
+    assert [h["command"] for h in read_history(temp_db_path)] == ["ls -la", "df -h"]
+    assert [h["command"] for h in read_history(temp_db_path, query="disk")] == ["df -h"]
+
+
+def test_read_history_missing_database(temp_dir):
+    assert read_history(temp_dir / "missing.db") == []
+
+
+def test_lazy_import_loads_on_first_use():
+    lazy = LazyImport("json", "dumps")
+
+    assert "not loaded" in repr(lazy)
+    assert lazy({"a": 1}) == '{"a": 1}'
+    assert "(loaded)" in repr(lazy)
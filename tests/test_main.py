@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, MagicMock, call, ANY
 from pathlib import Path
 import pyperclip
 
@@ -110,6 +110,7 @@ class TestMain:
         with patch('tacz.main._provider_instance', mock_provider):
             cleanup()
             mock_provider.db.close.assert_called_once()
+            mock_provider.cache.close.assert_called_once()
     
     def test_app_version_flag(self):
         """Test app function with --version flag."""
@@ -147,6 +148,21 @@ class TestMain:
             
             mock_show_favorites.assert_called_once()
     
+    def test_app_warm_flag(self):
+        """Test app function with --warm flag."""
+        with patch('sys.argv', ['tacz', '--warm']), \
+             patch('tacz.main.ollama_http.warm_up', return_value=True) as mock_warm_up, \
+             patch('tacz.main.interactive_mode') as mock_interactive, \
+             patch('builtins.print'), \
+             patch('tacz.main.ensure_directories'), \
+             patch('pathlib.Path.exists', return_value=True), \
+             patch('tacz.main.dotenv.load_dotenv'):
+
+            app()
+
+            mock_warm_up.assert_called_once()
+            mock_interactive.assert_not_called()
+
     def test_app_setup_needed(self):
         """Test app function when setup is needed."""
         with patch('sys.argv', ['tacz']), \
@@ -206,7 +222,7 @@ class TestMain:
             interactive_mode()
             mock_show_history.assert_called_once()
             mock_show_favorites.assert_called_once()
-            mock_show_options.assert_called_once_with("list files")
+            mock_show_options.assert_called_once_with("list files", session=ANY)
     
     def test_show_options_with_commands(self, mock_ollama_provider):
         """Test show_options with valid commands."""
@@ -0,0 +1,55 @@
+from unittest.mock import patch, MagicMock
+
+from tacz.llms import ollama_http
+from tacz.llms.providers.ollama_provider import OllamaProvider
+
+
+def test_native_url_strips_openai_suffix():
+    assert ollama_http.native_url("http://localhost:11434/v1") == "http://localhost:11434"
+    assert ollama_http.native_url("http://localhost:11434/v1/") == "http://localhost:11434"
+    assert ollama_http.native_url("http://gpu-box:11434") == "http://gpu-box:11434"
+
+
+def test_keep_alive_can_be_disabled(mock_config):
+    assert ollama_http.keep_alive_body() == {"keep_alive": "30m"}
+
+    mock_config["OLLAMA_KEEP_ALIVE"] = "off"
+    assert ollama_http.keep_alive_body() == {}
+
+
+def test_shared_client_is_reused():
+    with patch.object(ollama_http, "_CLIENT", None):
+        first = ollama_http.shared_client()
+        assert ollama_http.shared_client() is first
+        first.close()
+
+
+def test_warm_up_loads_model_with_keep_alive(mock_config):
+    client = MagicMock()
+    with patch.object(ollama_http, "shared_client", return_value=client):
+        assert ollama_http.warm_up() is True
+
+    url = client.post.call_args[0][0]
+    assert url == "http://localhost:11434/api/generate"
+    assert client.post.call_args[1]["json"] == {"model": "test-model", "keep_alive": "30m"}
+
+
+def test_warm_up_failure_is_reported_not_raised(mock_config):
+    client = MagicMock()
+    client.post.side_effect = OSError("connection refused")
+    with patch.object(ollama_http, "shared_client", return_value=client):
+        assert ollama_http.warm_up() is False
+
+
+def test_provider_uses_pooled_client_and_keep_alive(mock_config):
+    client = MagicMock()
+    with patch("openai.OpenAI") as mock_openai, \
+         patch("tacz.utils.command_db.CommandDatabase"), \
+         patch("tacz.llms.providers.ollama_provider.shared_client", return_value=client):
+        mock_openai.return_value.chat.completions.create.return_value = []
+        provider = OllamaProvider()
+        provider._stream_completion("list files", "Platform: Linux", lambda commands: None)
+
+    assert mock_openai.call_args[1]["http_client"] is client
+    create_kwargs = mock_openai.return_value.chat.completions.create.call_args[1]
+    assert create_kwargs["extra_body"] == {"keep_alive": "30m"}
@@ -6,11 +6,19 @@ import json
 from tacz.llms.providers.ollama_provider import OllamaProvider
 from tacz.llms.types import CommandsResponse, Command
 
+
+def _stream(content, size=7):
+    """Chat completion chunks delivering ``content`` a few characters at a time."""
+    return [
+        MagicMock(choices=[MagicMock(delta=MagicMock(content=content[i:i + size]))])
+        for i in range(0, len(content), size)
+    ]
+
 class TestOllamaProvider:
     @pytest.fixture
     def mock_openai(self):
         """Mock the OpenAI client."""
-        with patch('tacz.llms.providers.ollama_provider.OpenAI') as mock_openai:
+        with patch('openai.OpenAI') as mock_openai:
             mock_client = MagicMock()
             mock_openai.return_value = mock_client
             yield mock_client
@@ -18,7 +26,7 @@ class TestOllamaProvider:
     @pytest.fixture
     def mock_db(self):
         """Mock the CommandDatabase."""
-        with patch('tacz.llms.providers.ollama_provider.CommandDatabase') as mock_db:
+        with patch('tacz.utils.command_db.CommandDatabase') as mock_db:
             mock_db_instance = MagicMock()
             mock_db.return_value = mock_db_instance
             yield mock_db_instance
@@ -60,12 +68,10 @@ class TestOllamaProvider:
     
     def test_get_options_from_llm_json(self, mock_config, mock_openai, mock_db):
         """Test getting options from the LLM with valid JSON response."""
+        mock_config["SAVE_GENERATED"] = "true"
         mock_db.search.return_value = []
         
-        mock_chat = MagicMock()
-        mock_openai.chat.completions.create.return_value = mock_chat
-        mock_chat.choices = [
-            MagicMock(message=MagicMock(content=json.dumps({
+        mock_openai.chat.completions.create.return_value = _stream(json.dumps({
                 "is_valid": True,
                 "commands": [
                     {
@@ -74,8 +80,7 @@ class TestOllamaProvider:
                         "is_dangerous": False
                     }
                 ]
-            })))
-        ]
+            }))
         
         provider = OllamaProvider()
         
@@ -96,10 +101,7 @@ class TestOllamaProvider:
         """Test JSON parsing fallbacks."""
         mock_db.search.return_value = []
         
-        mock_chat = MagicMock()
-        mock_openai.chat.completions.create.return_value = mock_chat
-        mock_chat.choices = [
-            MagicMock(message=MagicMock(content="""
+        mock_openai.chat.completions.create.return_value = _stream("""
             Here's the command:
             
             ```
@@ -107,8 +109,7 @@ class TestOllamaProvider:
             ```
             
             Hope this helps!
-            """))
-        ]
+            """)
         
         provider = OllamaProvider()
         
@@ -126,10 +127,7 @@ class TestOllamaProvider:
         """Test code block fallback parsing."""
         mock_db.search.return_value = []
         
-        mock_chat = MagicMock()
-        mock_openai.chat.completions.create.return_value = mock_chat
-        mock_chat.choices = [
-            MagicMock(message=MagicMock(content="""
+        mock_openai.chat.completions.create.return_value = _stream("""
             You can list files using this command:
             
             ```bash
@@ -137,8 +135,7 @@ class TestOllamaProvider:
             ```
             
             This will show all files including hidden ones.
-            """))
-        ]
+            """)
         
         provider = OllamaProvider()
         
@@ -156,14 +153,10 @@ class TestOllamaProvider:
     def test_get_options_plain_text_fallback(self, mock_config, mock_openai, mock_db):
         mock_db.search.return_value = []
         
-        mock_chat = MagicMock()
-        mock_openai.chat.completions.create.return_value = mock_chat
-        mock_chat.choices = [
-            MagicMock(message=MagicMock(content="""
+        mock_openai.chat.completions.create.return_value = _stream("""
             ls -la
             This command lists all files including hidden ones.
-            """))
-        ]
+            """)
         
         provider = OllamaProvider()
         
@@ -180,10 +173,7 @@ class TestOllamaProvider:
     def test_safety_checks(self, mock_config, mock_openai, mock_db):
         mock_db.search.return_value = []
         
-        mock_chat = MagicMock()
-        mock_openai.chat.completions.create.return_value = mock_chat
-        mock_chat.choices = [
-            MagicMock(message=MagicMock(content=json.dumps({
+        mock_openai.chat.completions.create.return_value = _stream(json.dumps({
                 "is_valid": True,
                 "commands": [
                     {
@@ -192,8 +182,7 @@ class TestOllamaProvider:
                         "is_dangerous": False
                     }
                 ]
-            })))
-        ]
+            }))
         
         provider = OllamaProvider()
         
@@ -252,4 +241,160 @@ class TestOllamaProvider:
         history = provider.get_command_history(query="files")
         
         assert history == mock_history
-        mock_db.search_history.assert_called_once_with("files", 10)
\ No newline at end of file
+        mock_db.search_history.assert_called_once_with("files", 10)
+    
+    def test_streamed_commands_reach_display_callback(self, mock_config, mock_openai, mock_db):
+        """Test that each command is shown as soon as its JSON object completes."""
+        mock_db.search.return_value = []
+        content = json.dumps({
+            "is_valid": True,
+            "commands": [
+                {"command": "du -sh *", "explanation": "Size of each item"},
+                {"command": "df -h", "explanation": "Free space per filesystem"},
+            ]
+        })
+        chunks = _stream(content)
+        consumed = []
+
+        def tracking_stream():
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        mock_openai.chat.completions.create.return_value = tracking_stream()
+        seen = []
+        provider = OllamaProvider()
+
+        response = provider.get_options(
+            prompt="disk usage",
+            context="Platform: Linux (bash)",
+            display_callback=lambda cmds: seen.append((len(consumed), cmds)),
+        )
+
+        assert mock_openai.chat.completions.create.call_args.kwargs["stream"] is True
+        assert [cmds for _, cmds in seen] == [
+            [{"cmd": "du -sh *", "explanation": "Size of each item"}],
+            [{"cmd": "du -sh *", "explanation": "Size of each item"},
+             {"cmd": "df -h", "explanation": "Free space per filesystem"}],
+        ]
+        assert seen[0][0] < len(chunks)
+        assert [c.command for c in response.commands] == ["du -sh *", "df -h"]
+        mock_db.add_command.assert_not_called()
+
+    def test_repeated_question_served_from_response_cache(self, mock_config, mock_openai, mock_db):
+        """Test that an identical question skips the model the second time."""
+        mock_db.search.return_value = []
+        mock_openai.chat.completions.create.side_effect = lambda **kwargs: _stream(json.dumps({
+            "is_valid": True,
+            "commands": [{"command": "df -h", "explanation": "Disk space"}]
+        }))
+        provider = OllamaProvider()
+        context = "Platform: Linux (bash)"
+
+        first = provider.get_options(prompt="disk space", context=context)
+        second = provider.get_options(prompt="Disk  space?", context=context)
+
+        assert mock_openai.chat.completions.create.call_count == 1
+        assert second == first
+
+    def test_catalog_and_generated_commands_merged(self, mock_config, mock_openai, mock_db):
+        """Test that model commands are merged after catalog hits, without duplicates."""
+        mock_config["SAVE_GENERATED"] = "true"
+        mock_db.search.return_value = [
+            {"command": "df -h", "explanation": "Disk space", "dangerous": 0, "danger_reason": "", "score": 0.5}
+        ]
+        mock_openai.chat.completions.create.return_value = _stream(json.dumps({
+            "is_valid": True,
+            "commands": [
+                {"command": "df  -h", "explanation": "Free space"},
+                {"command": "du -sh *", "explanation": "Size of each item"},
+            ]
+        }))
+        seen = []
+        provider = OllamaProvider()
+
+        response = provider.get_options(prompt="disk space", context="Platform: Linux (bash)",
+                                        display_callback=seen.append)
+
+        assert [c.command for c in response.commands] == ["df -h", "du -sh *"]
+        assert seen[-1] == [
+            {"cmd": "df -h", "explanation": "Disk space"},
+            {"cmd": "du -sh *", "explanation": "Size of each item"},
+        ]
+        mock_db.add_command.assert_called_once()
+        assert mock_db.add_command.call_args.kwargs["command"] == "du -sh *"
+
+    def test_confident_catalog_match_cancels_generation(self, mock_config, mock_openai, mock_db):
+        """Test that a high-scoring catalog hit returns without waiting for the model."""
+        import threading
+
+        mock_db.search.return_value = [
+            {"command": "df -h", "explanation": "Disk space", "dangerous": 0, "danger_reason": "", "score": 0.95}
+        ]
+        chunks = _stream(json.dumps({"is_valid": True, "commands": [{"command": "du -sh *", "explanation": "x"}]}))
+        release, finished, consumed = threading.Event(), threading.Event(), []
+
+        def slow_stream():
+            try:
+                for chunk in chunks:
+                    consumed.append(chunk)
+                    yield chunk
+                    release.wait(5)
+            finally:
+                finished.set()
+
+        mock_openai.chat.completions.create.return_value = slow_stream()
+        provider = OllamaProvider()
+
+        response = provider.get_options(prompt="disk space", context="Platform: Linux (bash)")
+        release.set()
+
+        assert [c.command for c in response.commands] == ["df -h"]
+        assert finished.wait(5)
+        assert len(consumed) < len(chunks)
+        mock_db.add_command.assert_not_called()
+
+    def test_saved_generated_commands_do_not_cancel_generation(self, mock_config, mock_openai, mock_db):
+        """Test that a high-scoring row saved from an earlier reply still asks the model."""
+        mock_db.search.return_value = [
+            {"command": "df -h", "explanation": "Disk space", "category": "generated",
+             "dangerous": 0, "danger_reason": "", "score": 0.99}
+        ]
+        mock_openai.chat.completions.create.return_value = _stream(json.dumps({
+            "is_valid": True, "commands": [{"command": "du -sh *", "explanation": "Size of each item"}]
+        }))
+        provider = OllamaProvider()
+
+        response = provider.get_options(prompt="disk space", context="Platform: Linux (bash)")
+
+        assert [c.command for c in response.commands] == ["df -h", "du -sh *"]
+        mock_db.add_command.assert_not_called()
+
+    def test_cancel_closes_stream_waiting_for_a_chunk(self, mock_config, mock_openai, mock_db):
+        """Test that cancelling closes the stream instead of waiting for its next chunk."""
+        import threading
+
+        rows = [{"command": "df -h", "explanation": "Disk space", "dangerous": 0, "danger_reason": "", "score": 0.95}]
+        waiting, closed, finished = threading.Event(), threading.Event(), threading.Event()
+
+        class BlockingStream:
+            def __iter__(self):
+                waiting.set()
+                closed.wait(5)
+                finished.set()
+                raise ConnectionError("stream closed")
+                yield
+
+            def close(self):
+                closed.set()
+
+        # The search finishes only once the worker is blocked on the stream.
+        mock_db.search.side_effect = lambda *args, **kwargs: (waiting.wait(5), rows)[1]
+        mock_openai.chat.completions.create.return_value = BlockingStream()
+        provider = OllamaProvider()
+
+        response = provider.get_options(prompt="disk space", context="Platform: Linux (bash)")
+
+        assert [c.command for c in response.commands] == ["df -h"]
+        assert closed.wait(1)
+        assert finished.wait(1)
@@ -0,0 +1,56 @@
+import time
+from unittest.mock import patch
+
+from tacz.utils.response_cache import ResponseCache, make_key
+
+CONTEXT = "Platform: Linux (bash)\nShell: bash"
+
+
+def test_make_key_covers_prompt_context_model_and_template():
+    key = make_key("List  files?", CONTEXT, "llama3.1:8b", "v1")
+
+    assert key == make_key("list files", CONTEXT, "llama3.1:8b", "v1")
+    assert key != make_key("list files", CONTEXT + "\nGit Branch: dev", "llama3.1:8b", "v1")
+    assert key != make_key("list files", CONTEXT, "qwen2.5:7b", "v1")
+    assert key != make_key("list files", CONTEXT, "llama3.1:8b", "v2")
+
+
+def test_entries_expire_after_ttl(temp_dir):
+    cache = ResponseCache(temp_dir / "responses.db", ttl_hours=1)
+    cache.put("k", {"is_valid": True, "commands": []})
+
+    assert cache.get("k") == {"is_valid": True, "commands": []}
+    with patch("tacz.utils.response_cache.time.time", return_value=time.time() + 3601):
+        assert cache.get("k") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    cache.close()
+
+
+def test_size_cap_evicts_least_recently_used(temp_dir):
+    cache = ResponseCache(temp_dir / "responses.db", max_entries=2)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("a")
+    cache.put("c", {"n": 3})
+
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("b") is None
+    assert cache.get("c") == {"n": 3}
+    cache.close()
+
+
+def test_hits_do_not_write_until_flushed(temp_dir):
+    cache = ResponseCache(temp_dir / "responses.db")
+    cache.put("k", {"n": 1})
+    before = cache.conn.total_changes
+
+    for _ in range(10):
+        assert cache.get("k") == {"n": 1}
+    assert cache.conn.total_changes == before
+
+    used = cache._touched["k"]
+    cache.close()
+    reopened = ResponseCache(temp_dir / "responses.db")
+    assert reopened.conn.execute("SELECT last_used FROM responses").fetchone()[0] == used
+    reopened.close()
@@ -3,8 +3,11 @@ from tacz.utils.safety import (
     is_rm_command,
     has_command_chaining,
     sanitize_command,
+    classify_command,
+    SafetyRuleSet,
     CommandValidator
 )
+from tacz.constants import SAFETY_RULES
 
 class TestSafetyUtils:
     def test_is_dangerous_command(self):
@@ -36,6 +39,26 @@ class TestSafetyUtils:
             is_dangerous, reason = is_dangerous_command(cmd)
             assert not is_dangerous, f"Command should not be detected as dangerous: {cmd}"
     
+    def test_classify_reports_every_matching_rule(self):
+        """Test that classification lists all matched rules in rule order."""
+        rule_ids = [m.rule_id for m in classify_command("sudo rm -rf /tmp/build")]
+        assert rule_ids == ["rm-rf", "sudo", "rm-no-confirm", "rm-force", "rm-recursive", "rm-recursive-force"]
+
+        assert classify_command("ls -la") == []
+        assert classify_command("echo done; rm notes.txt")[0].rule_id == "rm-after-semicolon"
+        assert classify_command("ERASE the disk")[0].rule_id == "destructive-intent"
+
+    def test_is_dangerous_command_matches_first_rule(self):
+        """Test that the reported reason is the first rule that applies, as before."""
+        assert is_dangerous_command("sudo rm -rf /") == (True, "Recursive delete of files/directories")
+        assert is_dangerous_command("wipe everything") == (True, "Command appears to have destructive intent")
+
+    def test_rule_set_version_tracks_rules(self):
+        """Test that the rule set version changes only when the rules change."""
+        rules = SafetyRuleSet(SAFETY_RULES)
+        assert rules.version == SafetyRuleSet(list(SAFETY_RULES)).version
+        assert rules.version != SafetyRuleSet(SAFETY_RULES[:-1]).version
+
     def test_is_rm_command(self):
         """Test rm command detection."""
         rm_commands = [
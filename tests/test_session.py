@@ -0,0 +1,45 @@
+from unittest.mock import MagicMock, patch
+
+from tacz.main import interactive_mode
+from tacz.session import Session
+
+
+class TestSession:
+    def test_provider_and_context_opened_once(self):
+        open_provider = MagicMock()
+        env_context = MagicMock(return_value="Platform: Linux (bash)")
+        session = Session(open_provider, env_context)
+
+        assert session.provider is session.provider
+        assert session.context == session.context == "Platform: Linux (bash)"
+        open_provider.assert_called_once()
+        env_context.assert_called_once()
+
+        session.refresh_context()
+        session.context
+        assert env_context.call_count == 2
+
+    def test_close_releases_provider(self):
+        provider = MagicMock()
+        with Session(lambda: provider, str) as session:
+            session.provider
+        provider.db.close.assert_called_once()
+
+        session.close()
+        provider.db.close.assert_called_once()
+
+    def test_interactive_queries_share_one_session(self):
+        with patch('tacz.main.Console'), \
+             patch('tacz.main.questionary') as mock_questionary, \
+             patch('tacz.main.show_favorites') as mock_show_favorites, \
+             patch('tacz.main.show_options') as mock_show_options, \
+             patch('tacz.main.open_provider') as mock_open_provider:
+            mock_questionary.text.return_value.ask.side_effect = ["list files", "--favorites", "disk usage", "exit"]
+
+            interactive_mode()
+
+            sessions = {c.kwargs["session"] for c in mock_show_options.call_args_list}
+            sessions.add(mock_show_favorites.call_args.kwargs["session"])
+            assert len(sessions) == 1
+            # Opened lazily by the first query that needs it, never per query.
+            mock_open_provider.assert_not_called()
@@ -0,0 +1,110 @@
+from tacz.utils.shell_parse import parse_command
+from tacz.utils.safety import has_command_chaining, is_rm_command, sanitize_command
+from tacz.main import break_down_command
+
+
+class TestShellParse:
+    def test_pipelines_and_operators(self):
+        parsed = parse_command("cat log | grep err && echo ok; rm tmp &")
+
+        assert [op.op for op in parsed.operators] == ["|", "&&", ";", "&"]
+        assert [len(p.commands) for p in parsed.pipelines] == [2, 1, 1]
+        assert [cmd.name for cmd in parsed.commands] == ["cat", "grep", "echo", "rm"]
+
+    def test_quotes_and_substitutions_stay_in_one_word(self):
+        parsed = parse_command(r"""echo 'a;b' "x|y" $(ls | wc -l) `date && true` a\;b""")
+
+        assert not parsed.operators
+        assert parsed.commands[0].args == ("a;b", "x|y", "$(ls | wc -l)", "`date && true`", "a;b")
+
+    def test_redirections(self):
+        cmd = parse_command("make 2>&1 >> build.log < input").commands[0]
+
+        assert [w.value for w in cmd.argv] == ["make"]
+        assert [(r.op, r.fd, r.target.value) for r in cmd.redirects] == [
+            (">&", "2", "1"), (">>", None, "build.log"), ("<", None, "input"),
+        ]
+
+    def test_results_are_cached(self):
+        assert parse_command("ls -la | wc -l") is parse_command("ls -la | wc -l")
+
+    def test_consumers_respect_quoting(self):
+        assert has_command_chaining("git commit -m 'fix: a && b; c > d'") == (False, [])
+        assert has_command_chaining("sleep 10 &") == (True, ["background (&)"])
+        assert sanitize_command("echo 'a; b' && rm x") == "echo 'a; b'"
+        assert sanitize_command("make 2>&1") == "make 2>&1"
+        assert is_rm_command("sudo -n rm -f lock")
+        assert is_rm_command("find . -name '*.o' -exec rm {} +")
+        assert not is_rm_command("git rm --cached file")
+
+    def test_tool_rm_subcommands(self):
+        assert is_rm_command("git rm -r src")
+        assert is_rm_command("git -C repo rm notes.txt")
+        assert is_rm_command("docker rm -f web")
+        assert is_rm_command("sudo docker container rm web")
+        assert is_rm_command("podman rmi alpine")
+        assert not is_rm_command("git status")
+        assert not is_rm_command("git commit -m rm")
+        assert not is_rm_command("docker ps -a")
+
+    def test_substitutions_and_unclosed_quotes(self):
+        parsed = parse_command("echo $(ls; rm -rf ~) `id`")
+
+        assert [sub.body for sub in parsed.substitutions] == ["ls; rm -rf ~", "id"]
+        assert parsed.complete
+        assert not parse_command("echo 'it is").complete
+        assert not parse_command("echo $(date").complete
+
+    def test_rm_after_wrapper_option_values(self):
+        assert is_rm_command("sudo -u root rm -rf x")
+        assert is_rm_command("sudo -nu root rm -rf x")
+        assert is_rm_command("timeout 5 rm x")
+        assert not is_rm_command("sudo -u root ls")
+
+    def test_rm_in_brace_group(self):
+        assert is_rm_command("{ rm -rf x; }")
+
+    def test_rm_in_subshell(self):
+        assert is_rm_command("( rm -rf x )")
+        assert is_rm_command("(rm -rf x)")
+
+    def test_rm_in_if(self):
+        assert is_rm_command("if true; then rm -rf x; fi")
+
+    def test_rm_in_for_loop(self):
+        assert is_rm_command("for f in *; do rm $f; done")
+
+    def test_rm_through_eval(self):
+        assert is_rm_command("eval rm -rf x")
+        assert is_rm_command('eval "$cmd"')
+
+    def test_rm_in_shell_script(self):
+        assert is_rm_command("bash -c 'cd /tmp && rm -rf x'")
+        assert is_rm_command('sh -c "$CMD"')
+        assert not is_rm_command("sh -c 'echo $HOME'")
+
+    def test_rm_through_watch(self):
+        assert is_rm_command("watch rm x")
+        assert not is_rm_command("watch -n 5 df -h")
+
+    def test_rm_in_command_substitution(self):
+        assert is_rm_command("echo $(ls; rm -rf ~)")
+        assert is_rm_command("echo `rm x`")
+        assert not is_rm_command("echo $(date)")
+
+    def test_unreadable_line_counts_as_rm(self):
+        assert is_rm_command("echo 'unterminated")
+        assert is_rm_command("$cmd -rf x")
+
+    def test_sanitize_drops_chaining_substitution(self):
+        assert sanitize_command("echo $(ls; rm -rf ~)") == "echo"
+        assert sanitize_command("echo $(date) done") == "echo $(date) done"
+        assert has_command_chaining("echo $(ls; rm -rf ~)") == (True, ["semicolon (;)"])
+
+    def test_break_down_keeps_redirections(self):
+        result = break_down_command("grep -n 'a b' notes.txt > hits.txt")
+
+        assert result["command"] == "grep"
+        assert [(a["value"], a["type"]) for a in result["args"]] == [
+            ("-n", "option"), ("'a b'", "value"), ("notes.txt", "value"), ("> hits.txt", "redirect"),
+        ]
@@ -0,0 +1,78 @@
+from unittest.mock import patch
+
+from tacz.utils.startup_profile import (
+    ImportRecord,
+    format_report,
+    import_budget_ms,
+    parse_importtime,
+    profile_imports,
+    total_ms,
+)
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 | encodings
+import time:       300 |        300 |   tacz.config
+import time:       500 |        900 | tacz
+import time:      1000 |       1000 |     json.decoder
+import time:       200 |       1200 |   tacz.utils
+import time:        50 |       1250 | tacz.main
+"""
+
+
+def test_parse_importtime():
+    records = parse_importtime(SAMPLE)
+
+    assert records[0] == ImportRecord("encodings", 120, 120, 0)
+    assert records[3] == ImportRecord("json.decoder", 1000, 1000, 2)
+    assert total_ms([r for r in records if r.module != "encodings"]) == 2.15
+
+
+def test_format_report_ranks_by_cumulative_time():
+    report = format_report(parse_importtime(SAMPLE), top=2)
+
+    lines = report.splitlines()
+    assert "tacz.main" in lines[3]
+    assert "tacz.utils" in lines[4]
+    assert len(lines) == 5
+
+
+def test_profile_startup_flag(capsys):
+    from tacz.main import app
+
+    with patch("sys.argv", ["tacz", "--profile-startup"]), \
+         patch("tacz.main.profile_imports", return_value=parse_importtime(SAMPLE)), \
+         patch("tacz.main.run_setup") as mock_setup:
+        app()
+
+    assert "Startup imports:" in capsys.readouterr().out
+    mock_setup.assert_not_called()
+
+
+def test_version_path_import_budget():
+    """`tacz --version` must stay within the import budget (TACZ_IMPORT_BUDGET_MS)."""
+    records = profile_imports()
+
+    assert records, "tacz --version failed to run"
+    elapsed = total_ms(records)
+    assert elapsed <= import_budget_ms(), format_report(records, top=15)
+
+
+def test_history_path_skips_embedding_stack(temp_dir):
+    import subprocess
+    import sys
+
+    code = (
+        "import sys; sys.argv = ['tacz', '--history']\n"
+        "from tacz.main import app; app()\n"
+        "heavy = [m for m in ('numpy', 'openai', 'questionary', 'rich.live', 'sentence_transformers') "
+        "if m in sys.modules]\n"
+        "print('HEAVY', heavy)\n"
+    )
+    (temp_dir / ".taczrc").write_text("")
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True,
+        env={"HOME": str(temp_dir), "PATH": "/usr/bin:/bin"},
+    )
+
+    assert "HEAVY []" in result.stdout, result.stderr
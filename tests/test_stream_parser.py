@@ -0,0 +1,32 @@
+import json
+
+from tacz.llms.stream_parser import StreamingCommandParser
+
+
+def _feed_all(text, size):
+    parser = StreamingCommandParser()
+    found = []
+    for i in range(0, len(text), size):
+        found.extend(c["command"] for c in parser.feed(text[i:i + size]))
+    return found
+
+
+def test_commands_emitted_across_any_chunking():
+    reply = json.dumps({
+        "is_valid": True,
+        "commands": [
+            {"command": 'echo "}] {"', "explanation": "Braces inside strings"},
+            {"command": "ls", "explanation": "List", "is_dangerous": False},
+        ],
+    })
+    for size in (1, 2, 5, len(reply)):
+        assert _feed_all(reply, size) == ['echo "}] {"', "ls"]
+
+
+def test_prose_and_code_fences_are_skipped():
+    reply = 'Sure, here you go "quoted":\n```json\n{"commands": [{"command": "pwd", "explanation": "Where am I"}]}\n```'
+    assert _feed_all(reply, 3) == ["pwd"]
+
+
+def test_objects_without_command_are_ignored():
+    assert _feed_all('{"commands": [{"explanation": "no command"}, [1, 2]]}', 4) == []
@@ -0,0 +1,90 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from tacz.utils.vector_store import HEADER_SIZE, VectorStore
+
+
+def test_append_and_take_round_trip(temp_dir):
+    store = VectorStore(temp_dir / "commands.vectors")
+    vectors = np.random.default_rng(0).normal(size=(3, 8)).astype(np.float32)
+
+    slots = store.append(vectors)
+
+    assert slots.tolist() == [0, 1, 2]
+    expected = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    assert np.allclose(store.take([2, 0]), expected[[2, 0]], atol=1e-6)
+
+
+def test_reader_sees_appends_from_another_instance(temp_dir):
+    path = temp_dir / "commands.vectors"
+    reader, writer = VectorStore(path), VectorStore(path)
+    writer.append(np.ones((1, 4), dtype=np.float32))
+    assert len(reader) == 1
+
+    writer.append(np.eye(4, dtype=np.float32)[:2])
+
+    assert len(reader) == 3
+    assert np.allclose(reader.take([2]), [[0, 1, 0, 0]])
+
+
+def test_take_and_select_read_from_the_mapping(temp_dir):
+    store = VectorStore(temp_dir / "commands.vectors")
+    store.append(np.eye(4, dtype=np.float32))
+
+    assert isinstance(store.take([1, 2, 3]), np.memmap)
+    rows, slots = store.select([0, 2, 3])
+    assert isinstance(rows, np.memmap) and len(rows) == 4
+    assert slots.tolist() == [0, 2, 3]
+    assert store.select([1, 2])[1] is None
+
+
+def test_append_skips_torn_write(temp_dir):
+    path = temp_dir / "commands.vectors"
+    store = VectorStore(path)
+    store.append(np.ones((1, 4), dtype=np.float32))
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 6)
+
+    assert store.append(np.ones((1, 4), dtype=np.float32)).tolist() == [2]
+    assert path.stat().st_size == HEADER_SIZE + 3 * 16
+
+
+def test_sync_fsyncs_pending_writes_once(temp_dir):
+    store = VectorStore(temp_dir / "commands.vectors")
+    with patch("tacz.utils.vector_store.os.fsync") as fsync:
+        store.append(np.ones((1, 4), dtype=np.float32))
+        store.append(np.ones((2, 4), dtype=np.float32))
+        assert fsync.call_count == 0
+
+        store.sync()
+        store.sync()
+
+    assert fsync.call_count == 1
+
+
+def test_dimension_mismatch_and_reset(temp_dir):
+    store = VectorStore(temp_dir / "commands.vectors")
+    store.append(np.ones((1, 4), dtype=np.float32))
+
+    with pytest.raises(ValueError):
+        store.append(np.ones((1, 8), dtype=np.float32))
+
+    store.reset()
+    assert len(store) == 0
+    assert store.append(np.ones((1, 8), dtype=np.float32)).tolist() == [0]
+
+
+@pytest.mark.parametrize("fmt, row_bytes", [("float16", 2 * 384), ("int8", 4 + 384)])
+def test_compact_formats_shrink_rows_and_stay_close(temp_dir, fmt, row_bytes):
+    store = VectorStore(temp_dir / f"commands.vectors.{fmt}", fmt)
+    vectors = np.random.default_rng(0).normal(size=(10, 384)).astype(np.float32)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    store.append(vectors)
+    rows = store.take(np.arange(10))
+
+    assert (temp_dir / f"commands.vectors.{fmt}").stat().st_size == HEADER_SIZE + 10 * row_bytes
+    decoded = rows["codes"] * rows["scale"][:, None] if fmt == "int8" else rows.astype(np.float32)
+    assert np.abs(decoded - unit).max() < 0.01